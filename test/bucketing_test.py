@@ -0,0 +1,164 @@
+import json
+import os
+import tempfile
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import TestCase
+from testify import bucketing
+from testify import test_runner
+from testify.test_history import TestHistory
+
+
+def history_of(results):
+    history = TestHistory()
+    for class_name, method_name, run_time, fixture_type in results:
+        module, _, cls = class_name.rpartition('.')
+        history.add_result({
+            'run_time': run_time,
+            'method': {'module': module, 'class': cls, 'name': method_name, 'fixture_type': fixture_type},
+        })
+    return history
+
+
+def bucket_loads(plan, durations, bucket_count):
+    loads = [0.0] * bucket_count
+    for name, pieces in plan.pieces.items():
+        for bucket in pieces:
+            loads[bucket] += durations[name]
+    return loads
+
+
+class PlanBucketsTestCase(TestCase):
+
+    def test_longest_first_packing(self):
+        durations = {'m.A': 7.0, 'm.B': 5.0, 'm.C': 4.0, 'm.D': 3.0, 'm.E': 1.0}
+        history = history_of((name, 'run', run_time, None) for name, run_time in durations.items())
+        plan = bucketing.plan_buckets(dict((name, []) for name in durations), 2, history)
+
+        assert_equal(bucket_loads(plan, durations, 2), [10.0, 10.0])
+        assert_equal(plan.name_overrides('m.A', 0), None)
+
+    def test_unknown_classes_are_hashed(self):
+        plan = bucketing.plan_buckets({'x.Unknown': [], 'y.Unknown': []}, 4, TestHistory())
+        assert_equal(plan.buckets('x.Unknown'), set([bucketing.hash_bucket('x.Unknown', 4)]))
+        assert_equal(plan.buckets('y.Unknown'), set([bucketing.hash_bucket('y.Unknown', 4)]))
+
+    def test_large_class_is_split_across_buckets(self):
+        methods = ['test_%d' % i for i in range(8)]
+        history = history_of(
+            [('m.Big', method, 10.0, None) for method in methods] +
+            [('m.Big', 'run', 82.0, None), ('m.Big', 'class_setup_db', 2.0, 'class_setup')] +
+            [('m.Small', 'run', 5.0, None)]
+        )
+        plan = bucketing.plan_buckets({'m.Big': methods + ['test_new'], 'm.Small': ['test_it']}, 4, history)
+
+        assert_equal(plan.buckets('m.Big'), set(range(4)))
+        pieces = [plan.name_overrides('m.Big', bucket) for bucket in range(4)]
+        assert_equal(sorted(len(piece) for piece in pieces), [2, 2, 2, 3])
+        assert_equal(set().union(*pieces), set(methods + ['test_new']))
+
+    def test_class_setup_cost_prevents_split(self):
+        methods = ['test_one', 'test_two']
+        history = history_of(
+            [('m.Slow', method, 1.0, None) for method in methods] +
+            [('m.Slow', 'run', 42.0, None), ('m.Slow', 'class_setup_db', 40.0, 'class_setup')] +
+            [('m.Other', 'run', 30.0, None)]
+        )
+        plan = bucketing.plan_buckets({'m.Slow': methods, 'm.Other': []}, 2, history)
+
+        assert_equal(len(plan.buckets('m.Slow')), 1)
+
+    def test_plan_ignores_input_order(self):
+        history = history_of([('m.A', 'run', 3.0, None), ('m.B', 'run', 3.0, None), ('m.C', 'run', 1.0, None)])
+        names = ['m.A', 'm.B', 'm.C', 'm.D']
+        assert_equal(
+            bucketing.plan_buckets(dict((name, []) for name in names), 3, history).pieces,
+            bucketing.plan_buckets(dict((name, []) for name in reversed(names)), 3, history).pieces,
+        )
+
+
+class ConsistentHashPlanTestCase(TestCase):
+
+    names = ['module.Class%d' % i for i in range(500)]
+
+    def test_adding_a_bucket_only_moves_classes_onto_it(self):
+        before = bucketing.plan_buckets(dict.fromkeys(self.names, []), 4, TestHistory(), strategy='consistent')
+        after = bucketing.plan_buckets(dict.fromkeys(self.names, []), 5, TestHistory(), strategy='consistent')
+
+        moved = after.moved_classes(before)
+        assert 0 < len(moved) < len(self.names) / 3, len(moved)
+        assert_equal(set(bucket for name in moved for bucket in after.buckets(name)), set([4]))
+
+    def test_adding_classes_moves_nothing(self):
+        before = bucketing.plan_buckets(dict.fromkeys(self.names[:400], []), 4, TestHistory(), strategy='consistent')
+        after = bucketing.plan_buckets(dict.fromkeys(self.names, []), 4, TestHistory(), strategy='consistent')
+
+        assert_equal(after.moved_classes(before), [])
+
+    def test_json_lines_round_trip(self):
+        plan = bucketing.BucketPlan()
+        plan.add('m.A', 0)
+        plan.add('m.B', 0, set(['test_one']))
+        plan.add('m.B', 1, set(['test_two']))
+
+        assert_equal(bucketing.BucketPlan.from_json_lines(plan.to_json_lines()).pieces, plan.pieces)
+
+
+class TestRunnerBucketTestCase(TestCase):
+
+    @setup_teardown
+    def write_timings(self):
+        fd, self.timings = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            yield
+        finally:
+            os.remove(self.timings)
+
+    def write_results(self, results):
+        with open(self.timings, 'w') as timings:
+            for class_name, method_name, run_time in results:
+                timings.write(json.dumps({
+                    'run_time': run_time,
+                    'method': {
+                        'module': 'testing_suite.example_test',
+                        'class': class_name,
+                        'name': method_name,
+                        'fixture_type': None,
+                    },
+                }) + '\n')
+            timings.write('RUN COMPLETE\n')
+
+    def discover_bucket(self, bucket):
+        runner = test_runner.TestRunner(
+            'testing_suite',
+            bucket=bucket,
+            bucket_count=2,
+            bucket_timings=[self.timings],
+        )
+        return [
+            test_runner.TestRunner.get_test_method_name(test_method)
+            for test_case in runner.discover()
+            for test_method in test_case.runnable_test_methods()
+        ]
+
+    def test_buckets_split_by_timing(self):
+        self.write_results([('ExampleTestCase', 'run', 5.0), ('SecondTestCase', 'run', 4.0)])
+        assert_equal(self.discover_bucket(0), [
+            'testing_suite.example_test ExampleTestCase.test_one',
+            'testing_suite.example_test ExampleTestCase.test_two',
+        ])
+        assert_equal(self.discover_bucket(1), ['testing_suite.example_test SecondTestCase.test_one'])
+
+    def test_buckets_split_methods(self):
+        self.write_results([
+            ('ExampleTestCase', 'test_one', 5.0),
+            ('ExampleTestCase', 'test_two', 5.0),
+            ('SecondTestCase', 'run', 1.0),
+        ])
+        assert_equal(self.discover_bucket(0), [
+            'testing_suite.example_test ExampleTestCase.test_one',
+            'testing_suite.example_test SecondTestCase.test_one',
+        ])
+        assert_equal(self.discover_bucket(1), ['testing_suite.example_test ExampleTestCase.test_two'])
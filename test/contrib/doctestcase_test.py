@@ -2,9 +2,13 @@
 from __future__ import absolute_import
 from __future__ import unicode_literals
 
+from doctest import DocTestFinder
 import sys
 
+import mock
+
 import testify as T
+from testify.contrib import doctestcase
 from testify.contrib.doctestcase import DocTestCase
 
 
@@ -25,3 +29,73 @@ class TestNoPollutionDocTestCase(T.TestCase):
 
         MyDocTestCase().run()
         T.assert_not_in('_', __builtins__)
+
+
+class TestLazyDocTestCase(T.TestCase):
+    @T.setup_teardown
+    def count_finds(self):
+        doctestcase._doctest_cache.clear()
+        with mock.patch.object(DocTestFinder, 'find', autospec=True, side_effect=DocTestFinder.find) as self.find:
+            yield
+        doctestcase._doctest_cache.clear()
+
+    def test_doctests_found_when_needed(self):
+        class MyDocTestCase(DocTestCase):
+            module = sys.modules[foo.__module__]
+
+        T.assert_equal(self.find.call_count, 0)
+        T.assert_not_in('test_doc:foo', vars(MyDocTestCase))
+        T.assert_equal(list(MyDocTestCase._test_method_table()), ['test_doc:foo'])
+        T.assert_equal(self.find.call_count, 1)
+
+    def test_doctests_parsed_once_per_module(self):
+        class MyDocTestCase(DocTestCase):
+            module = sys.modules[foo.__module__]
+
+        class OtherDocTestCase(DocTestCase):
+            module = foo.__module__
+            extraglobs = {'bar': 2}
+
+        MyDocTestCase().run()
+        OtherDocTestCase().run()
+        T.assert_equal(self.find.call_count, 1)
+        T.assert_equal(OtherDocTestCase.__dict__['test_doc:foo'].doctest_name, 'test_doc.foo')
+
+    def test_suites_ruled_out_without_finding(self):
+        class MyDocTestCase(DocTestCase):
+            module = sys.modules[foo.__module__]
+            _suites = {'slow'}
+
+        T.assert_equal(MyDocTestCase._has_runnable_methods(lambda mask: mask == 0), False)
+        T.assert_equal(self.find.call_count, 0)
+
+
+class TestParallelDocTestCase(T.TestCase):
+    def run_test_case(self, test_case_class):
+        test_case = test_case_class()
+        fixtures, results = [], []
+        test_case.register_callback(test_case.EVENT_ON_COMPLETE_CLASS_SETUP_METHOD, fixtures.append)
+        test_case.register_callback(test_case.EVENT_ON_COMPLETE_TEST_METHOD, results.append)
+        test_case.run()
+        return test_case, fixtures, results
+
+    def test_jobs(self):
+        class MyDocTestCase(DocTestCase):
+            module = foo.__module__
+            jobs = 2
+
+            def test_ordinary(self):
+                pass
+
+        test_case, fixtures, results = self.run_test_case(MyDocTestCase)
+        T.assert_in('run_doctests_in_workers', [fixture['method']['name'] for fixture in fixtures])
+        T.assert_equal([result['success'] for result in results], [True, True])
+        T.assert_equal(test_case.worker_results['test_doc.foo'][0], 0)
+
+    def test_no_fixture_without_jobs(self):
+        class MyDocTestCase(DocTestCase):
+            module = foo.__module__
+
+        test_case, fixtures, results = self.run_test_case(MyDocTestCase)
+        T.assert_not_in('run_doctests_in_workers', [fixture['method']['name'] for fixture in fixtures])
+        T.assert_equal([result['success'] for result in results], [True])
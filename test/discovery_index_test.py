@@ -0,0 +1,193 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_discovery
+from testify import test_runner
+from testify.discovery_index import DiscoveryIndex
+from test.utils.temp_package import temp_package
+
+
+class DiscoveryIndexTestCase(TestCase):
+
+    @setup_teardown
+    def make_tempdir(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'index.json')
+        try:
+            yield
+        finally:
+            shutil.rmtree(self.tempdir)
+
+    def build_index(self, test_path='test.test_suite_subdir'):
+        return DiscoveryIndex.from_test_classes(test_path, list(test_discovery.discover(test_path)))
+
+    def test_from_test_classes(self):
+        modules = self.build_index().modules
+        assert_equal(sorted(modules), [
+            'test.test_suite_subdir',
+            'test.test_suite_subdir.define_testcase',
+            'test.test_suite_subdir.define_unittestcase',
+            'test.test_suite_subdir.import_testcase',
+        ])
+        entry = modules['test.test_suite_subdir.define_testcase']
+        assert_equal(entry['file'], sys.modules['test.test_suite_subdir.define_testcase'].__file__)
+        assert_equal(entry['suites'], ['fake'])
+        assert_equal(entry['classes'], {
+            'DummyTestCase': {'test': True, 'suites': ['fake'], 'methods': {'test_blah': []}},
+        })
+        assert_equal(
+            modules['test.test_suite_subdir.define_unittestcase']['classes']['TestifiedDummyUnitTestCase']['methods'],
+            {'test_foo': []},
+        )
+        assert_equal(modules['test.test_suite_subdir.import_testcase']['classes'], {})
+
+    def test_save_and_load(self):
+        index = self.build_index()
+        index.save(self.filename)
+
+        loaded = DiscoveryIndex.load(self.filename, 'test.test_suite_subdir')
+        assert_equal(loaded.modules, index.modules)
+        assert_equal(loaded.test_methods(lambda class_name: class_name == 'DummyTestCase'), {
+            'test.test_suite_subdir.define_testcase.DummyTestCase': ['test_blah'],
+        })
+        assert_equal(loaded.stale_modules(), (set(), set()))
+
+    def test_load_missing_or_for_another_path(self):
+        assert_equal(DiscoveryIndex.load(self.filename, 'test.test_suite_subdir'), None)
+
+        self.build_index().save(self.filename)
+        assert_equal(DiscoveryIndex.load(self.filename, 'test.test_runner_subdir'), None)
+
+    def test_added_and_removed_modules_are_stale(self):
+        index = self.build_index()
+        del index.modules['test.test_suite_subdir.import_testcase']
+        index.modules['test.test_suite_subdir.gone'] = index.modules['test.test_suite_subdir']
+        assert_equal(
+            index.stale_modules(),
+            (set(['test.test_suite_subdir.import_testcase']), set(['test.test_suite_subdir.gone'])),
+        )
+
+
+class DiscoveryIndexRefreshTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        files = {}
+        for filename, source in (
+            ('__init__.py', ''),
+            ('base.py', (
+                'import testify\n\n\nclass Base(testify.TestCase):\n    __test__ = False\n\n'
+                '    def test_base(self):\n        pass\n'
+            )),
+            ('a_test.py', 'from indexpkg.base import Base\n\n\nclass ATest(Base):\n    def test_a(self):\n        pass\n'),
+            ('b_test.py', (
+                'import testify\n\n_suites = ["b"]\n\n\nclass BTest(testify.TestCase):\n'
+                '    @testify.suite("slow")\n    def test_b(self):\n        pass\n'
+            )),
+        ):
+            files['indexpkg/' + filename] = source
+
+        with temp_package(files, chdir=True) as self.root:
+            self.filename = os.path.join(self.root, 'index.json')
+            self.package = os.path.join(self.root, 'indexpkg')
+            yield
+
+    def write(self, filename, source):
+        with open(os.path.join(self.package, filename), 'w') as f:
+            f.write(source)
+
+    def forget_modules(self):
+        for module_name in list(sys.modules):
+            if module_name.split('.')[0] == 'indexpkg':
+                del sys.modules[module_name]
+
+    def test_index_contents(self):
+        index = DiscoveryIndex.from_test_classes('indexpkg', list(test_discovery.discover('indexpkg')))
+        assert_equal(index.modules['indexpkg.base']['classes'], {'Base': {'test': False}})
+        assert_equal(index.modules['indexpkg.b_test']['suites'], ['b'])
+        assert_equal(index.modules['indexpkg.b_test']['classes']['BTest']['methods'], {'test_b': ['slow']})
+        assert_equal(sorted(index.test_methods().items()), [
+            ('indexpkg.a_test.ATest', ['test_a', 'test_base']),
+            ('indexpkg.b_test.BTest', ['test_b']),
+        ])
+
+    def test_only_changed_modules_and_their_importers_are_reimported(self):
+        DiscoveryIndex.from_test_classes('indexpkg', list(test_discovery.discover('indexpkg'))).save(self.filename)
+        self.forget_modules()
+
+        # a touched file with the same contents is not re-imported
+        os.utime(os.path.join(self.package, 'b_test.py'), (0, 0))
+        self.write('base.py', (
+            'import testify\n\n\nclass Base(testify.TestCase):\n    __test__ = False\n\n'
+            '    def test_base(self):\n        pass\n\n    def test_more(self):\n        pass\n'
+        ))
+        os.utime(os.path.join(self.package, 'base.py'), (0, 0))
+
+        index = DiscoveryIndex.load(self.filename, 'indexpkg')
+        with mock.patch.object(test_discovery, 'discover', wraps=test_discovery.discover) as discover_mock:
+            assert_equal(index.refresh(), True)
+        assert_equal(sorted(call[0][0] for call in discover_mock.call_args_list), ['indexpkg.a_test', 'indexpkg.base'])
+        assert_equal(index.test_methods()['indexpkg.a_test.ATest'], ['test_a', 'test_base', 'test_more'])
+        assert_equal(index.modules['indexpkg.b_test']['mtime'], 0)
+        assert 'indexpkg.b_test' not in sys.modules
+
+        assert_equal(index.refresh(), False)
+
+    def test_list_tests_from_index(self):
+        list(test_runner.TestRunner('indexpkg', discovery_index=self.filename).discover())
+        self.forget_modules()
+
+        runner = test_runner.TestRunner('indexpkg', discovery_index=self.filename, suites_require=['slow'])
+        with mock.patch.object(test_discovery, 'discover') as discover_mock:
+            assert_equal(
+                [(name, sorted(suites)) for name, suites, _ in runner.indexed_tests(runner.load_discovery_index()[0])],
+                [('indexpkg.b_test BTest.test_b', ['b', 'slow'])],
+            )
+            assert_equal(runner.list_suites(), {'b': '1 tests', 'slow': '1 tests'})
+        assert_equal(discover_mock.call_count, 0)
+
+
+class BucketWithDiscoveryIndexTestCase(TestCase):
+
+    @setup_teardown
+    def write_index(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+        os.remove(self.filename)
+        try:
+            yield
+        finally:
+            os.remove(self.filename)
+
+    def runner(self, bucket):
+        return test_runner.TestRunner(
+            'test.test_suite_subdir',
+            bucket=bucket,
+            bucket_count=2,
+            bucket_strategy='consistent',
+            discovery_index=self.filename,
+        )
+
+    def test_only_assigned_modules_are_imported(self):
+        # The first run builds the index with a full discovery
+        all_tests = [type(test_case).__name__ for test_case in self.runner(0).discover()]
+        all_tests += [type(test_case).__name__ for test_case in self.runner(1).discover()]
+        assert_equal(sorted(all_tests), ['DummyTestCase', 'TestifiedDummyUnitTestCase'])
+
+        plan = self.runner(0).list_buckets()
+        for bucket in range(2):
+            expected_modules = sorted(
+                class_key.rpartition('.')[0]
+                for class_key in plan.pieces
+                if bucket in plan.buckets(class_key)
+            )
+            with mock.patch.object(test_discovery, 'discover', wraps=test_discovery.discover) as discover_mock:
+                list(self.runner(bucket).discover())
+            assert_equal([call[0][0] for call in discover_mock.call_args_list], expected_modules)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import mock
+import six
+
+from testify import assert_equal
+from testify import exit
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_runner
+from testify.import_graph import ImportGraph
+from testify.import_graph import parse_imports
+from testify.import_graph import StaticImportGraph
+
+
+class ImportGraphTestCase(TestCase):
+
+    def test_dependents_are_transitive(self):
+        graph = ImportGraph()
+        graph.add('a_test', 'helpers')
+        graph.add('helpers', 'util')
+        graph.add('b_test', 'other')
+
+        assert_equal(graph.dependents(['util']), set(['util', 'helpers', 'a_test']))
+        assert_equal(graph.dependents(['other']), set(['other', 'b_test']))
+
+    def test_forget_drops_outgoing_edges(self):
+        graph = ImportGraph()
+        graph.add('a_test', 'util')
+        graph.forget(['a_test'])
+
+        assert_equal(graph.dependents(['util']), set(['util']))
+
+
+class ParseImportsTestCase(TestCase):
+
+    def test_absolute_and_relative_imports(self):
+        source = (
+            'import os.path\n'
+            'from . import sibling\n'
+            'from ..other import thing\n'
+            'def f():\n'
+            '    import json\n'
+        )
+        assert_equal(
+            parse_imports(source, 'pkg.sub.mod', is_package=False),
+            set(['os.path', 'pkg.sub', 'pkg.sub.sibling', 'pkg.other', 'pkg.other.thing', 'json']),
+        )
+
+    def test_relative_import_in_package(self):
+        assert_equal(parse_imports('from .mod import x', 'pkg', is_package=True), set(['pkg.mod', 'pkg.mod.x']))
+
+
+class StaticImportGraphTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        self.root = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.root, 'pkg'))
+        for filename, source in (
+            ('pkg/__init__.py', ''),
+            ('pkg/util.py', 'import os\n'),
+            ('pkg/helpers.py', 'from pkg import util\n'),
+            ('pkg/a_test.py', 'from .helpers import helper\n'),
+            ('pkg/b_test.py', 'import pkg.other\n'),
+            ('pkg/other.py', ''),
+            ('pkg/broken.py', 'def (\n'),
+        ):
+            with open(os.path.join(self.root, filename), 'w') as f:
+                f.write(source)
+        try:
+            yield
+        finally:
+            shutil.rmtree(self.root)
+
+    def path(self, filename):
+        return os.path.join(self.root, filename)
+
+    def test_affected_modules(self):
+        graph = StaticImportGraph.build(self.root)
+        assert_equal(
+            graph.affected_modules([self.path('pkg/util.py')]),
+            set(['pkg.util', 'pkg.helpers', 'pkg.a_test']),
+        )
+        assert_equal(
+            graph.affected_modules([self.path('pkg/__init__.py')]),
+            set(['pkg', 'pkg.util', 'pkg.helpers', 'pkg.a_test', 'pkg.b_test', 'pkg.other', 'pkg.broken']),
+        )
+        assert_equal(graph.affected_modules([self.path('README.md')]), set())
+
+    def test_deleted_modules_affect_their_importers(self):
+        os.remove(self.path('pkg/other.py'))
+        graph = StaticImportGraph.build(self.root)
+        assert_equal(graph.affected_modules([self.path('pkg/other.py')]), set(['pkg.other', 'pkg.b_test']))
+        assert_equal(graph.affected_modules([self.path('pkg/gone/__init__.py')]), set(['pkg.gone']))
+
+    def test_cache_reparses_only_changed_files(self):
+        cache = self.path('cache.json')
+        StaticImportGraph.build(self.root, cache=cache)
+
+        with open(self.path('pkg/other.py'), 'w') as f:
+            f.write('from pkg import util\n')
+        os.utime(self.path('pkg/other.py'), (0, 0))
+
+        graph = StaticImportGraph.build(self.root, cache=cache)
+        assert_equal(graph.affected_modules([self.path('pkg/util.py')]), set([
+            'pkg.util', 'pkg.helpers', 'pkg.a_test', 'pkg.other', 'pkg.b_test',
+        ]))
+
+
+class TestRunnerChangedFilesTestCase(TestCase):
+
+    def test_only_affected_test_modules_are_discovered(self):
+        runner = test_runner.TestRunner('test.test_runner_subdir', changed_files=['test/test_runner_subdir/base_class.py'])
+        assert_equal(runner.affected_test_modules(), [
+            'test.test_runner_subdir.base_class',
+            'test.test_runner_subdir.inheriting_class',
+        ])
+
+        runner = test_runner.TestRunner('test.test_runner_subdir', changed_files=['testing_suite/example_test.py'])
+        assert_equal(list(runner.discover()), [])
+
+    def test_nothing_affected_is_ok(self):
+        runner = test_runner.TestRunner('test.test_runner_subdir', changed_files=['README.md'])
+        with mock.patch.object(sys, 'stderr', six.StringIO()):
+            assert_equal(runner.run(), exit.OK)
@@ -0,0 +1,67 @@
+import builtins
+import json
+import os
+
+from testify import assert_equal
+from testify import assert_gte
+from testify import assert_lt
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_discovery
+from testify import test_runner
+from testify.import_profile import ImportProfiler
+from test.utils.temp_package import temp_package
+
+
+class ImportProfilerTestCase(TestCase):
+
+    @setup_teardown
+    def make_package(self):
+        with temp_package({
+            'profpkg/__init__.py': '',
+            'profpkg/slow_helper.py': 'import time\ntime.sleep(0.05)\n',
+            'profpkg/a_test.py': (
+                'import testify\n\nfrom . import slow_helper\n\n\n'
+                'class ATest(testify.TestCase):\n    def test_a(self):\n        pass\n'
+            ),
+            'profpkg/b_test.py': 'from profpkg import slow_helper\n',
+        }) as self.root:
+            yield
+
+    def test_inclusive_and_exclusive_times(self):
+        profiler = ImportProfiler()
+        original_import = builtins.__import__
+        classes = list(profiler.profile(test_discovery.discover('profpkg')))
+        assert_equal([cls.__name__ for cls in classes], ['ATest'])
+        assert builtins.__import__ is original_import
+
+        assert_equal(sorted(profiler.imports), ['profpkg', 'profpkg.a_test', 'profpkg.b_test', 'profpkg.slow_helper'])
+        helper = profiler.imports['profpkg.slow_helper']
+        a_test = profiler.imports['profpkg.a_test']
+        assert_equal(helper['test_module'], 'profpkg.a_test')
+        assert_gte(helper['exclusive'], 0.05)
+        assert_gte(a_test['inclusive'], helper['inclusive'])
+        assert_lt(a_test['exclusive'], 0.05)
+        # already loaded by a_test, so b_test's import of it is free
+        assert_lt(profiler.imports['profpkg.b_test']['inclusive'], 0.05)
+
+        assert_equal(profiler.slowest(1)[0][0], 'profpkg.slow_helper')
+        assert_equal(max(profiler.by_test_module().items(), key=lambda item: item[1])[0], 'profpkg.a_test')
+
+    def test_package_already_imported(self):
+        __import__('profpkg')
+        profiler = ImportProfiler()
+        list(profiler.profile(test_discovery.discover('profpkg')))
+        # discovery's __import__(..., fromlist=['__trash']) doesn't load a module
+        assert_equal(sorted(profiler.imports), ['profpkg.a_test', 'profpkg.b_test', 'profpkg.slow_helper'])
+        assert_equal(profiler.imports['profpkg.slow_helper']['test_module'], 'profpkg.a_test')
+
+    def test_runner_writes_json(self):
+        filename = os.path.join(self.root, 'imports.json')
+        runner = test_runner.TestRunner('profpkg', import_profile_json=filename)
+        list(runner.discover())
+        runner.report_import_profile()
+        with open(filename) as f:
+            profile = json.load(f)
+        assert_equal(profile['imports']['profpkg.slow_helper']['test_module'], 'profpkg.a_test')
+        assert_gte(profile['test_modules']['profpkg.a_test'], 0.05)
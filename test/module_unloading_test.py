@@ -0,0 +1,72 @@
+import sys
+
+import mock
+import six
+
+from testify import assert_equal
+from testify import assert_gte
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_runner
+from testify.module_unloading import ModuleUnloader
+from test.utils.temp_package import temp_package
+
+
+class ModuleUnloadingTestCase(TestCase):
+
+    @setup_teardown
+    def make_package(self):
+        with temp_package({
+            'unloadpkg/__init__.py': '',
+            'unloadpkg/a_test.py': (
+                'import sys\n\nimport testify\n\nDATA = b"x" * (32 * 1024 * 1024)\n\n\n'
+                'class ATest(testify.TestCase):\n    def test_a(self):\n        assert len(DATA)\n\n\n'
+                'class AnotherATest(testify.TestCase):\n    def test_another(self):\n'
+                '        assert "unloadpkg.a_test" in sys.modules\n'
+            ),
+            'unloadpkg/b_test.py': (
+                'import sys\n\nimport testify\n\n\n'
+                'class BTest(testify.TestCase):\n    def test_b(self):\n        assert "unloadpkg.a_test" not in sys.modules\n'
+            ),
+        }):
+            yield
+
+    def run_tests(self, **kwargs):
+        reporter = mock.Mock()
+        runner = test_runner.TestRunner('unloadpkg', unload_modules=True, test_reporters=[reporter], **kwargs)
+        with mock.patch.object(sys, 'stderr', six.StringIO()):
+            runner.run()
+        return runner.module_unloader.unloaded, [call[0][0] for call in reporter.test_complete.call_args_list]
+
+    def test_modules_unloaded_after_their_tests(self):
+        unloaded, results = self.run_tests()
+        assert_equal([result['success'] for result in results], [True] * 3)
+        assert_equal([module_name for module_name, _, _ in unloaded], ['unloadpkg.a_test', 'unloadpkg.b_test'])
+        assert 'unloadpkg.a_test' not in sys.modules
+        assert not hasattr(sys.modules['unloadpkg'], 'a_test')
+        if unloaded[0][1] is not None:
+            assert_gte(unloaded[0][1], 16 * 1024 * 1024)
+
+    def test_reordered_classes(self):
+        unloaded, _ = self.run_tests(order='random', order_seed=1)
+        assert_equal(sorted(module_name for module_name, _, _ in unloaded), ['unloadpkg.a_test', 'unloadpkg.b_test'])
+
+    def test_starting_interleaved_modules(self):
+        class FakeTestCase(object):
+            pass
+
+        def test_case(module_name):
+            return type('FakeTestCase', (FakeTestCase,), {'__module__': module_name})()
+
+        unloader = ModuleUnloader()
+        classes = [(type(test_case(name)), {}) for name in ('unloadpkg.a_test', 'unloadpkg.b_test', 'unloadpkg.a_test')]
+        list(unloader.expect(classes))
+        __import__('unloadpkg.a_test')
+        __import__('unloadpkg.b_test')
+
+        unloader.starting(test_case('unloadpkg.a_test'))
+        unloader.starting(test_case('unloadpkg.b_test'))
+        unloader.starting(test_case('unloadpkg.a_test'))
+        assert_equal([module_name for module_name, _, _ in unloader.unloaded], ['unloadpkg.b_test'])
+        unloader.finish()
+        assert_equal([module_name for module_name, _, _ in unloader.unloaded], ['unloadpkg.b_test', 'unloadpkg.a_test'])
@@ -0,0 +1,168 @@
+import inspect
+import os
+import sys
+import tempfile
+
+import mock
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import TestCase
+from testify.plugins.coverage_index import changed_lines_from_diff
+from testify.plugins import coverage_index
+from testify.plugins.coverage_index import CoverageIndex
+from testify.plugins.coverage_index import CoverageIndexReporter
+from testify.plugins.coverage_index import minimize
+from testify.plugins.coverage_index import MonitoringRecorder
+from testify.plugins.coverage_index import SetTraceRecorder
+
+
+def covered_function(value):
+    if value:
+        return 'yes'
+    return 'no'
+
+
+def function_lines(value):
+    first_line = inspect.getsourcelines(covered_function)[1]
+    if value is None:
+        # every line of the function
+        return set(range(first_line, first_line + len(inspect.getsourcelines(covered_function)[0])))
+    if value:
+        return set([first_line + 1, first_line + 2])
+    return set([first_line + 1, first_line + 3])
+
+
+class RecorderTestCase(TestCase):
+
+    def assert_records_lines(self, recorder):
+        recorder.start()
+        try:
+            covered_function(True)
+            first = recorder.harvest()
+            covered_function(False)
+            second = recorder.harvest()
+        finally:
+            recorder.stop()
+
+        # sys.monitoring also reports the lines of frames already running, like this one
+        filename = covered_function.__code__.co_filename
+        in_function = function_lines(None)
+        assert_equal(set(line for path, line in first if path == filename and line in in_function), function_lines(True))
+        assert_equal(set(line for path, line in second if path == filename and line in in_function), function_lines(False))
+
+    def test_settrace_recorder(self):
+        self.assert_records_lines(SetTraceRecorder())
+
+    # sys.monitoring is only available from Python 3.12
+    if hasattr(sys, 'monitoring'):
+        def test_monitoring_recorder(self):
+            self.assert_records_lines(MonitoringRecorder())
+
+
+class CoverageIndexTestCase(TestCase):
+
+    @setup_teardown
+    def make_tempfile(self):
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            yield
+        finally:
+            os.remove(self.filename)
+
+    def test_save_load_and_select(self):
+        root = os.path.abspath('.')
+        index = CoverageIndex(root)
+        index.add('mod A.test_one', [(os.path.join(root, 'pkg/util.py'), 3), ('/elsewhere/lib.py', 1)])
+        index.add('mod A.test_two', [(os.path.join(root, 'pkg/util.py'), 4)])
+        index.save(self.filename)
+
+        loaded = CoverageIndex.load(self.filename, root)
+        assert_equal(loaded.tests_covering([('pkg/util.py', 3)]), ['mod A.test_one'])
+        assert_equal(loaded.tests_covering([('pkg/util.py', 3), ('pkg/util.py', 4)]), ['mod A.test_one', 'mod A.test_two'])
+        assert_equal(loaded.tests_covering([('/elsewhere/lib.py', 1)]), [])
+
+    def test_reporter_records_global_and_test_case_lines(self):
+        root = os.path.abspath('.')
+        recorder = mock.Mock()
+        recorder.harvest.side_effect = [
+            set([(os.path.join(root, 'helper.py'), 1)]),  # imported before the test case
+            set([(os.path.join(root, 'helper.py'), 5)]),  # class_setup
+            set([(os.path.join(root, 'helper.py'), 10)]),
+            set(),
+            set([(os.path.join(root, 'helper.py'), 20)]),
+            set([(os.path.join(root, 'helper.py'), 6)]),  # class_teardown
+            set(),
+        ]
+        with mock.patch.object(coverage_index, 'build_recorder', return_value=recorder):
+            reporter = CoverageIndexReporter(mock.Mock(coverage_index=self.filename))
+        reporter.test_case_start({})
+        for test_name in ('m C.test_one', 'm C.test_two'):
+            reporter.test_start({})
+            reporter.test_complete({'method': {'full_name': test_name}})
+        reporter.test_case_complete({})
+        reporter.index.add('m D.test_other', [])
+        reporter.report()
+
+        loaded = CoverageIndex.load(self.filename, root)
+        assert_equal(loaded.tests_covering([('helper.py', 10)]), ['m C.test_one'])
+        assert_equal(loaded.tests_covering([('helper.py', 5)]), ['m C.test_one', 'm C.test_two'])
+        assert_equal(loaded.tests_covering([('helper.py', 6)]), ['m C.test_one', 'm C.test_two'])
+        assert_equal(loaded.tests_covering([('helper.py', 1)]), ['m C.test_one', 'm C.test_two', 'm D.test_other'])
+
+
+class MinimizeTestCase(TestCase):
+
+    @setup_teardown
+    def make_index(self):
+        self.index = CoverageIndex('/project')
+        self.index.add('m A.test_broad', [('/project/f.py', line) for line in range(1, 11)])
+        self.index.add('m A.test_left', [('/project/f.py', line) for line in range(1, 6)])
+        self.index.add('m A.test_right', [('/project/f.py', line) for line in range(6, 12)])
+        self.index.add('m A.test_nothing', [])
+        yield
+
+    def test_keeps_cheapest_cover(self):
+        durations = {'m A.test_broad': 10.0, 'm A.test_left': 1.0, 'm A.test_right': 1.0, 'm A.test_nothing': 0.0}
+        kept, redundant, uncovered = minimize(self.index, durations)
+        assert_equal(sorted(kept), ['m A.test_left', 'm A.test_right'])
+        assert_equal(sorted(redundant), ['m A.test_broad', 'm A.test_nothing'])
+        assert_equal(uncovered, set())
+
+    def test_prefers_fewer_tests_when_cheap(self):
+        durations = {'m A.test_broad': 1.0, 'm A.test_left': 1.0, 'm A.test_right': 1.0, 'm A.test_nothing': 1.0}
+        kept, redundant, uncovered = minimize(self.index, durations)
+        assert_equal(kept, ['m A.test_broad', 'm A.test_right'])
+        assert_equal(uncovered, set())
+
+    def test_budget(self):
+        durations = {'m A.test_broad': 10.0, 'm A.test_left': 1.0, 'm A.test_right': 1.0, 'm A.test_nothing': 0.0}
+        kept, redundant, uncovered = minimize(self.index, durations, budget=1.5)
+        assert_equal(kept, ['m A.test_right'])
+        assert_equal(uncovered, set(('f.py', line) for line in range(1, 6)))
+
+
+class ChangedLinesFromDiffTestCase(TestCase):
+
+    def test_old_side_lines(self):
+        diff = (
+            'diff --git a/pkg/util.py b/pkg/util.py\n'
+            '--- a/pkg/util.py\n'
+            '+++ b/pkg/util.py\n'
+            '@@ -10,4 +10,4 @@ def f():\n'
+            ' context\n'
+            '-removed\n'
+            '+added\n'
+            ' context\n'
+            '@@ -30,2 +30,3 @@\n'
+            ' context\n'
+            '+inserted\n'
+            ' context\n'
+            '--- /dev/null\n'
+            '+++ b/pkg/new.py\n'
+            '@@ -0,0 +1 @@\n'
+            '+new\n'
+        ).splitlines(True)
+        changed = changed_lines_from_diff(diff)
+        assert_equal(changed, set([('pkg/util.py', 11), ('pkg/util.py', 12), ('pkg/util.py', 30), ('pkg/util.py', 31)]))
@@ -43,9 +43,11 @@ output_str = (
     """"fixture_type": null, "class": "TestCase", """
     """"module": "testify.test_case", "name": "run"}, """
     """"exception_info_pretty": null, "end_time": %s, "error": null, """
-    """"exception_only": ""}\n""" % (time.mktime(start_time.timetuple()),
-                                     str(time.mktime(end_time.timetuple()) - time.mktime(start_time.timetuple())),
-                                     time.mktime(end_time.timetuple())))
+    """"exception_only": "", "class_fixture_time": 0.0}\n""" % (
+        time.mktime(start_time.timetuple()),
+        str(time.mktime(end_time.timetuple()) - time.mktime(start_time.timetuple())),
+        time.mktime(end_time.timetuple()),
+    ))
 
 
 class TestCaseJSONReporterTestCase(TestCase):
@@ -74,3 +76,16 @@ class TestCaseJSONReporterTestCase(TestCase):
                 json.loads(self.reporter.log_file.getvalue()),
                 json.loads(output_str),
             )
+
+    def test_class_fixture_time_in_test_case_record(self):
+        self.set_options()
+        with mock_conf_files():
+            self.reporter = TestCaseJSONReporter(self.options)
+            self.reporter.class_setup_complete({'run_time': 1.5})
+            self.reporter.class_teardown_complete({'run_time': 0.5})
+            self.reporter.test_case_complete({'run_time': 5.0})
+            self.reporter.test_case_complete({'run_time': 1.0})
+            assert_equal(
+                [json.loads(line) for line in self.reporter.log_file.getvalue().splitlines()],
+                [{'run_time': 5.0, 'class_fixture_time': 2.0}, {'run_time': 1.0, 'class_fixture_time': 0.0}],
+            )
@@ -0,0 +1,54 @@
+import importlib.util
+import os
+
+from testify import assert_equal
+from testify import precompile
+from testify import setup_teardown
+from testify import TestCase
+from test.utils.temp_package import temp_package
+
+
+class PrecompileTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        with temp_package({
+            'helper.py': 'VALUE = 1\n',
+            'precpkg/__init__.py': '',
+            'precpkg/a_test.py': 'import helper\n',
+            'precpkg/broken_test.py': 'def (\n',
+            'not_a_package/script.py': 'print("not compiled")\n',
+        }) as self.root:
+            yield
+
+    def test_source_files(self):
+        assert_equal(
+            [os.path.relpath(filename, self.root) for filename in precompile.source_files('precpkg', self.root)],
+            ['helper.py', 'precpkg/__init__.py', 'precpkg/a_test.py', 'precpkg/broken_test.py'],
+        )
+
+    def test_compile_tree(self):
+        failed = precompile.compile_tree('precpkg', jobs=2, root=self.root)
+        assert_equal(failed, [os.path.join(self.root, 'precpkg', 'broken_test.py')])
+
+        pyc = importlib.util.cache_from_source(os.path.join(self.root, 'precpkg', 'a_test.py'))
+        with open(pyc, 'rb') as f:
+            header = f.read(16)
+        # the flags word: hash-based, checked against the source
+        assert_equal(int.from_bytes(header[4:8], 'little'), precompile.CHECKED_HASH_FLAGS)
+        assert not os.path.exists(importlib.util.cache_from_source(os.path.join(self.root, 'not_a_package', 'script.py')))
+
+    def test_unchanged_files_not_recompiled(self):
+        precompile.compile_tree('precpkg', jobs=1, root=self.root)
+        source = os.path.join(self.root, 'precpkg', 'a_test.py')
+        pyc = importlib.util.cache_from_source(source)
+        os.utime(pyc, (0, 0))
+
+        precompile.compile_tree('precpkg', jobs=1, root=self.root)
+        assert_equal(os.stat(pyc).st_mtime, 0)
+
+        with open(source, 'a') as f:
+            f.write('VALUE = 2\n')
+        assert not precompile.up_to_date(source)
+        precompile.compile_tree('precpkg', jobs=1, root=self.root)
+        assert precompile.up_to_date(source)
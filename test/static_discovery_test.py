@@ -0,0 +1,102 @@
+import os
+import sys
+
+import mock
+import six
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_discovery
+from testify import test_runner
+from testify.discovery_index import DiscoveryIndex
+from testify.static_discovery import StaticDiscovery
+from testify.static_discovery import Unresolvable
+from test.utils.temp_package import temp_package
+
+
+class StaticDiscoveryTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        files = {}
+        for filename, source in (
+            ('__init__.py', '_suites = ["pkg"]\n'),
+            ('base.py', (
+                'import testify\n\n\nclass Base(testify.TestCase):\n    __test__ = False\n    _suites = ["base"]\n\n'
+                '    def test_base(self):\n        pass\n\n    def test_overridden(self):\n        pass\n'
+            )),
+            ('a_test.py', (
+                'import does_not_exist\n'
+                'from testify import suite\n\nfrom .base import Base as Renamed\n\n\n'
+                'class ATest(Renamed):\n    test_overridden = None\n\n'
+                '    @suite("slow")\n    def test_a(self):\n        pass\n\n'
+                '    @suite("never", conditions=False)\n    def test_b(self):\n        pass\n'
+            )),
+            ('u_test.py', (
+                'import unittest\n\n\nclass UTest(unittest.TestCase):\n    def test_u(self):\n        pass\n'
+            )),
+            ('dynamic_test.py', (
+                'import testify\n\n_suites = ["dyn" + "amic"]\n\n\n'
+                'class DynamicTest(testify.TestCase):\n    def test_d(self):\n        pass\n'
+            )),
+        ):
+            files['staticpkg/' + filename] = source
+
+        with temp_package(files, chdir=True) as self.root:
+            self.package = os.path.join(self.root, 'staticpkg')
+            yield
+
+    def test_index_without_importing(self):
+        index, imported = StaticDiscovery().index('staticpkg')
+
+        assert_equal(imported, ['staticpkg.dynamic_test'])
+        assert 'staticpkg.a_test' not in sys.modules
+        assert_equal(index.modules['staticpkg.base']['classes'], {'Base': {'test': False}})
+        assert_equal(index.modules['staticpkg.a_test']['classes'], {
+            'ATest': {
+                'test': True,
+                'suites': ['base', 'pkg'],
+                'methods': {'test_a': ['slow'], 'test_b': [], 'test_base': []},
+            },
+        })
+        assert_equal(index.modules['staticpkg.dynamic_test']['suites'], ['dynamic', 'pkg'])
+
+    def test_matches_imported_index(self):
+        with open(os.path.join(self.package, 'a_test.py')) as f:
+            source = f.read()
+        with open(os.path.join(self.package, 'a_test.py'), 'w') as f:
+            f.write(source.replace('import does_not_exist\n', ''))
+
+        static_index, _ = StaticDiscovery().index('staticpkg')
+        imported_index = DiscoveryIndex.from_test_classes('staticpkg', list(test_discovery.discover('staticpkg')))
+        for module_name, entry in imported_index.modules.items():
+            assert_equal((module_name, static_index.modules[module_name]['classes']), (module_name, entry['classes']))
+            assert_equal(static_index.modules[module_name]['suites'], entry['suites'])
+
+    def test_unresolvable_modules(self):
+        with open(os.path.join(self.package, 'c_test.py'), 'w') as f:
+            f.write('from unknown import Base\n\n\nclass CTest(Base):\n    pass\n')
+
+        discovery = StaticDiscovery()
+        for module_name in ('staticpkg.c_test', 'staticpkg.dynamic_test'):
+            try:
+                discovery.module_entry(module_name)
+            except Unresolvable:
+                pass
+            else:
+                assert False, module_name
+
+    def test_list_tests(self):
+        runner = test_runner.TestRunner('staticpkg', static_discovery=True, suites_require=['pkg'])
+        with mock.patch.object(sys, 'stdout', six.StringIO()) as stdout:
+            runner.list_tests(format='txt')
+        assert_equal(stdout.getvalue().splitlines(), [
+            'staticpkg.a_test ATest.test_a',
+            'staticpkg.a_test ATest.test_b',
+            'staticpkg.a_test ATest.test_base',
+            'staticpkg.dynamic_test DynamicTest.test_d',
+            'staticpkg.u_test TestifiedUTest.test_u',
+        ])
+        assert_equal(runner.list_suites(), {'base': '3 tests', 'dynamic': '1 tests', 'pkg': '5 tests', 'slow': '1 tests'})
+        assert 'staticpkg.a_test' not in sys.modules
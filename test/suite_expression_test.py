@@ -0,0 +1,93 @@
+from testify import assert_equal
+from testify import assert_raises
+from testify import suite
+from testify import TestCase
+from testify.suite_expression import suite_bit
+from testify.suite_expression import suites_mask
+from testify.suite_expression import SuiteExpression
+
+
+class SuitesMaskTestCase(TestCase):
+
+    def test_bits_are_stable_and_distinct(self):
+        assert_equal(suite_bit('mask-a'), suite_bit('mask-a'))
+        assert_equal(suites_mask(['mask-a', 'mask-b']), suite_bit('mask-a') | suite_bit('mask-b'))
+        assert_equal(suite_bit('mask-a') & suite_bit('mask-b'), 0)
+        assert_equal(suites_mask([]), 0)
+
+
+class SuiteExpressionTestCase(TestCase):
+
+    def matches(self, expression, suites):
+        return SuiteExpression(expression).matches(suites_mask(suites))
+
+    def test_operators(self):
+        assert self.matches('db', ['db', 'slow'])
+        assert not self.matches('db', ['cache'])
+        assert self.matches('db and slow', ['db', 'slow'])
+        assert not self.matches('db and slow', ['db'])
+        assert self.matches('db or cache', ['cache'])
+        assert not self.matches('not db', ['db'])
+        assert self.matches('not not db', ['db'])
+
+    def test_precedence_and_parentheses(self):
+        # not binds tightest, then and, then or
+        assert self.matches('db or cache and slow', ['db'])
+        assert not self.matches('(db or cache) and slow', ['db'])
+        assert self.matches('(db or cache) and not slow', ['cache'])
+        assert not self.matches('(db or cache) and not slow', ['cache', 'slow'])
+        assert self.matches('not db and not cache', [])
+
+    def test_suite_names_with_punctuation(self):
+        assert self.matches('known-failure or mysql5.6', ['mysql5.6'])
+
+    def test_invalid(self):
+        for expression in ('', 'db and', '(db', 'db)', 'and db', 'db cache', 'not'):
+            with assert_raises(ValueError):
+                SuiteExpression(expression)
+
+
+@suite('example')
+class ExpressionTestCase(TestCase):
+    __test__ = False
+
+    @suite('db')
+    def test_db(self):
+        pass
+
+    @suite('db', 'slow')
+    def test_db_slow(self):
+        pass
+
+    @suite('cache')
+    def test_cache(self):
+        pass
+
+    def test_plain(self):
+        pass
+
+
+class RunnableTestMethodsTestCase(TestCase):
+
+    def runnable(self, expression, **kwargs):
+        instance = ExpressionTestCase(suites_expression=SuiteExpression(expression), **kwargs)
+        return sorted(method.__name__ for method in instance.runnable_test_methods())
+
+    def test_suites_expression(self):
+        assert_equal(self.runnable('db or cache'), ['test_cache', 'test_db', 'test_db_slow'])
+        assert_equal(self.runnable('(db or cache) and not slow'), ['test_cache', 'test_db'])
+        assert_equal(self.runnable('not (db or cache)'), ['test_plain'])
+        # class-level suites count too
+        assert_equal(self.runnable('example and slow and db'), ['test_db_slow'])
+
+    def test_combines_with_exclude_and_require(self):
+        assert_equal(self.runnable('db', suites_exclude={'slow'}), ['test_db'])
+        assert_equal(self.runnable('not cache', suites_require={'db'}), ['test_db', 'test_db_slow'])
+
+    def test_suite_added_after_class_creation(self):
+        assert_equal(self.runnable('late'), [])
+        try:
+            suite('late')(ExpressionTestCase.test_plain)
+            assert_equal(self.runnable('late'), ['test_plain'])
+        finally:
+            ExpressionTestCase.test_plain._suites = set()
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+
+import mock
+
+from testify import assert_equal
+from testify import assert_raises
+from testify import setup_teardown
+from testify import TestCase
+from testify import test_bisect
+from test.utils.temp_package import temp_package
+
+
+class SplitTestCase(TestCase):
+
+    def test_split(self):
+        assert_equal(test_bisect.split(list('abcde'), 2), [['a', 'b'], ['c', 'd', 'e']])
+        assert_equal(test_bisect.split(list('ab'), 4), [['a'], ['b']])
+
+
+class FakeBisector(test_bisect.PollutionBisector):
+    """The target fails whenever all of `culprits` ran before it."""
+
+    def __init__(self, culprits, *args, **kwargs):
+        super(FakeBisector, self).__init__(*args, **kwargs)
+        self.culprits = set(culprits)
+
+    def _target_fails(self, tests):
+        return self.culprits <= set(tests)
+
+
+class PollutionBisectorTestCase(TestCase):
+
+    def test_single_culprit(self):
+        for jobs in (1, 2, 3, 8):
+            bisector = FakeBisector(['t7'], 'target', ['t%d' % i for i in range(20)], jobs=jobs)
+            assert_equal(bisector.bisect(), ['t7'])
+
+    def test_culprits_which_only_fail_together(self):
+        for jobs in (1, 4):
+            bisector = FakeBisector(['t2', 't15'], 'target', ['t%d' % i for i in range(20)], jobs=jobs)
+            assert_equal(bisector.bisect(), ['t2', 't15'])
+
+    def test_no_reproduction(self):
+        assert_equal(FakeBisector(['t99'], 'target', ['t1', 't2']).bisect(), None)
+
+    def test_fails_alone(self):
+        assert_equal(FakeBisector([], 'target', ['t1', 't2']).bisect(), [])
+
+
+class TestsBeforeTestCase(TestCase):
+
+    def write_log(self, runs):
+        fd, self.filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            for run in runs:
+                for name, fixture_type, success in run:
+                    f.write(json.dumps(dict(success=success, method=dict(
+                        module='mod', class_name='A', name=name, fixture_type=fixture_type,
+                        full_name='mod A.%s' % name,
+                    ))) + '\n')
+                f.write('RUN COMPLETE\n')
+
+    @setup_teardown
+    def remove_log(self):
+        self.filename = None
+        try:
+            yield
+        finally:
+            if self.filename:
+                os.remove(self.filename)
+
+    def test_tests_before(self):
+        self.write_log([[
+            ('class_setup', 'class_setup', True),
+            ('test_a', None, True),
+            ('test_b', None, True),
+            ('run', None, True),
+            ('test_target', None, False),
+        ]])
+        assert_equal(test_bisect.tests_before(self.filename, 'mod A.test_target'), ['mod A.test_a', 'mod A.test_b'])
+        with assert_raises(ValueError):
+            test_bisect.tests_before(self.filename, 'mod A.test_missing')
+
+    def test_run_where_target_failed(self):
+        self.write_log([
+            [('test_a', None, True), ('test_target', None, True)],
+            [('test_b', None, True), ('test_c', None, True), ('test_target', None, False)],
+        ])
+        assert_equal(test_bisect.tests_before(self.filename, 'mod A.test_target'), ['mod A.test_b', 'mod A.test_c'])
+
+    def test_target_passed(self):
+        self.write_log([[('test_a', None, True), ('test_target', None, True)]])
+        with assert_raises(ValueError):
+            test_bisect.tests_before(self.filename, 'mod A.test_target')
+
+
+class BisectSubprocessTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        with temp_package({
+            'bisectpkg/__init__.py': '',
+            'bisectpkg/state.py': 'POLLUTED = False\n',
+            'bisectpkg/a_test.py': (
+                'import testify\nfrom bisectpkg import state\n\n\n'
+                'class ATest(testify.TestCase):\n'
+                '    def test_one(self):\n        pass\n\n'
+                '    def test_polluter(self):\n        state.POLLUTED = True\n\n'
+                '    def test_two(self):\n        pass\n'
+            ),
+            'bisectpkg/b_test.py': (
+                'import testify\nfrom bisectpkg import state\n\n\n'
+                'class BTest(testify.TestCase):\n'
+                '    def test_three(self):\n        pass\n\n'
+                '    def test_victim(self):\n        assert not state.POLLUTED\n'
+            ),
+        }) as root:
+            # the bisector's testify subprocesses import the package (and testify) through PYTHONPATH
+            repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            with mock.patch.dict(os.environ, PYTHONPATH=os.pathsep.join([root, repo_root])):
+                yield
+
+    def test_finds_polluter(self):
+        bisector = test_bisect.PollutionBisector(
+            'bisectpkg.b_test BTest.test_victim',
+            [
+                'bisectpkg.a_test ATest.test_one',
+                'bisectpkg.a_test ATest.test_polluter',
+                'bisectpkg.a_test ATest.test_two',
+                'bisectpkg.b_test BTest.test_three',
+            ],
+            jobs=2,
+        )
+        assert_equal(bisector.bisect(), ['bisectpkg.a_test ATest.test_polluter'])
@@ -148,6 +148,42 @@ class UnitTestTestYoDawg(TestCase):
         TestifiedUnitTest.from_unittest_case(UnitTest)().run()
         assert_equal(UnitTest.status, [True] * 6)
 
+
+class UnitTestConversionCacheTestCase(TestCase):
+    """Converting shares the converted base classes, and caches by (class, module suites)."""
+
+    def test_conversions_are_cached(self):
+        class Base(unittest.TestCase):
+            pass
+
+        class First(Base):
+            def test_first(self):
+                pass
+
+        class Second(Base):
+            def test_second(self):
+                pass
+
+        stats = dict(TestifiedUnitTest.conversion_stats)
+        first = TestifiedUnitTest.from_unittest_case(First, module_suites=['a'])
+        second = TestifiedUnitTest.from_unittest_case(Second, module_suites=['a'])
+        assert_equal(first.__bases__[0], second.__bases__[0])
+        assert_equal(TestifiedUnitTest.conversion_stats['built'] - stats['built'], 3)
+        assert_equal(TestifiedUnitTest.conversion_stats['reused'] - stats['reused'], 1)
+
+        assert TestifiedUnitTest.from_unittest_case(First, module_suites={'a'}) is first
+        other_suites = TestifiedUnitTest.from_unittest_case(First, module_suites=['b'])
+        assert other_suites is not first
+        assert_equal(other_suites._suites, {'b'})
+
+    def test_forget_conversions(self):
+        class Forgotten(unittest.TestCase):
+            pass
+
+        converted = TestifiedUnitTest.from_unittest_case(Forgotten)
+        TestifiedUnitTest.forget_conversions(__name__)
+        assert TestifiedUnitTest.from_unittest_case(Forgotten) is not converted
+
 # The following cases test unittest.TestCase inheritance, fixtures and mixins
 
 
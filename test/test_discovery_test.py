@@ -1,10 +1,23 @@
+import os
+import sys
 from os.path import abspath
 
+import mock
+import six
+
+from testify import assert_equal
+from testify import assert_in
 from testify import assert_length
 from testify import assert_raises
+from testify import assert_raises_such_that
+from testify import exit
 from testify import run
+from testify import setup_teardown
 from testify import TestCase
 from testify import test_discovery
+from testify import test_runner
+from testify.exceptions import DiscoveryErrors
+from test.utils.temp_package import temp_package
 
 
 class DiscoveryTestCase(TestCase):
@@ -41,6 +54,79 @@ class TestDiscoverIgnoreImportedThings(DiscoveryTestCase):
         assert_length(discovered_actually_defined_in_module, 1)
 
 
+class ModuleFilterTestCase(DiscoveryTestCase):
+
+    def test_patterns_match_module_file_names(self):
+        module_filter = test_discovery.ModuleFilter(patterns=['define_*.py'])
+        assert_equal(
+            sorted(cls.__name__ for cls in test_discovery.discover('test.test_suite_subdir', module_filter=module_filter)),
+            ['DummyTestCase', 'TestifiedDummyUnitTestCase'],
+        )
+        assert_equal(test_discovery.module_names('test.test_suite_subdir', module_filter), [
+            'test.test_suite_subdir',
+            'test.test_suite_subdir.define_testcase',
+            'test.test_suite_subdir.define_unittestcase',
+        ])
+
+    def test_excluded_packages_are_not_walked(self):
+        module_filter = test_discovery.ModuleFilter(patterns=['*_test.py'], exclude=['test.test_*_subdir', 'test.plugins'])
+        module_names = test_discovery.module_names('test', module_filter)
+        assert 'test.test_discovery_test' in module_names
+        assert 'test.failing_test_interrupt' not in module_names
+        assert not [name for name in module_names if name.startswith(('test.test_suite_subdir', 'test.plugins'))]
+        assert 'test.utils.stringdiffer_test' in module_names
+
+        with mock.patch.object(test_discovery, 'get_test_classes_from_module', return_value=()) as get_classes:
+            list(test_discovery.discover('test', module_filter=module_filter))
+        assert_equal(sorted(call[0][0].__name__ for call in get_classes.call_args_list), module_names)
+
+
+class KeepGoingTestCase(TestCase):
+
+    @setup_teardown
+    def make_package(self):
+        with temp_package({
+            'brokenpkg/__init__.py': '',
+            'brokenpkg/a_test.py': 'import does_not_exist\n',
+            'brokenpkg/b_test.py': 'import testify\n\n\nclass BTest(testify.TestCase):\n    def test_b(self):\n        pass\n',
+            'brokenpkg/c_test.py': 'raise ValueError("broken")\n',
+        }) as self.root:
+            yield
+
+    def test_discover_keeps_going(self):
+        discovered = []
+        with mock.patch.object(sys, 'stderr', six.StringIO()):
+            with assert_raises_such_that(DiscoveryErrors, lambda e: assert_length(e.errors, 2)):
+                discovered.extend(test_discovery.discover('brokenpkg', keep_going=True))
+        assert_equal([cls.__name__ for cls in discovered], ['BTest'])
+
+    def test_import_failures_in_subprocesses(self):
+        errors = test_discovery.import_failures(test_discovery.module_names('brokenpkg'), jobs=2)
+        assert_equal(len(errors), 2)
+        assert_in('While importing brokenpkg.a_test:', str(errors[0]))
+        assert_in('ValueError: broken', str(errors[1]))
+        assert 'brokenpkg.b_test' not in sys.modules
+
+    def test_import_failures_survive_crashing_modules(self):
+        for filename, source in (
+            ('d_test.py', 'import os\nos._exit(3)\n'),
+            ('e_test.py', 'import sys\nsys.stdout.write("no newline")\n'),
+        ):
+            with open(os.path.join(self.root, 'brokenpkg', filename), 'w') as f:
+                f.write(source)
+
+        errors = test_discovery.import_failures(test_discovery.module_names('brokenpkg'), jobs=1)
+        assert_equal(len(errors), 3)
+        assert_in('exited with status 3 while importing brokenpkg.d_test', str(errors[2]))
+
+    def test_runner_reports_every_failure_before_running(self):
+        reporter = mock.Mock()
+        runner = test_runner.TestRunner('brokenpkg', discovery_keep_going=True, discovery_jobs=2, test_reporters=[reporter])
+        assert_equal(runner.run(), exit.DISCOVERY_FAILED)
+        assert_equal(reporter.test_discovery_failure.call_count, 2)
+        assert not reporter.test_start.called
+
+
 class ImportTestClassCase(DiscoveryTestCase):
 
     def discover(self, module_path, class_name):
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import TestCase
+from testify.test_history import TestHistory
+
+
+def result(cls, name, run_time, fixture_type=None):
+    return {
+        'run_time': run_time,
+        'method': {'module': 'mod', 'class': cls, 'name': name, 'fixture_type': fixture_type},
+    }
+
+
+class TestHistoryTestCase(TestCase):
+
+    @setup_teardown
+    def write_results(self):
+        fd, self.filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as results:
+            for line in (
+                result('A', 'test_one', 1.0),
+                result('A', 'test_two', 2.0),
+                result('A', 'test_two', 4.0),
+                result('A', 'class_setup_db', 9.0, fixture_type='class_setup'),
+                result('B', 'test_one', 1.0),
+                result('B', 'run', 5.0),
+                result('B', 'class_setup_db', 1.5, fixture_type='class_setup'),
+                result('B', 'class_teardown_db', 0.5, fixture_type='class_teardown'),
+            ):
+                results.write(json.dumps(line) + '\n')
+            results.write('not json\nRUN COMPLETE\n')
+        try:
+            yield
+        finally:
+            os.remove(self.filename)
+
+    def test_method_durations_are_averaged(self):
+        history = TestHistory.from_files([self.filename])
+        assert_equal(history.method_durations('mod.A'), {'test_one': 1.0, 'test_two': 3.0})
+
+    def test_class_durations_prefer_test_case_timings(self):
+        history = TestHistory.from_files([self.filename])
+        assert_equal(history.class_durations(), {'mod.A': 4.0, 'mod.B': 5.0})
+
+    def test_class_fixture_duration(self):
+        history = TestHistory.from_files([self.filename])
+        assert_equal(history.class_fixture_duration('mod.B'), 2.0)
+        assert_equal(history.class_fixture_duration('mod.C'), 0.0)
+
+    def test_class_fixture_time_of_test_case_records(self):
+        history = TestHistory()
+        history.add_result(dict(result('D', 'run', 5.0), class_fixture_time=2.0))
+        history.add_result(dict(result('D', 'run', 3.0), class_fixture_time=1.0))
+        assert_equal(history.class_fixture_duration('mod.D'), 1.5)
+
+    def test_runs_appended_to_one_file(self):
+        with open(self.filename, 'a') as results:
+            for success, end_time in ((False, 100), (True, 200)):
+                line = dict(result('C', 'test_one', 1.0), success=success, end_time=end_time)
+                results.write(json.dumps(line) + '\nRUN COMPLETE\n')
+
+        history = TestHistory.from_files([self.filename])
+        # the failure was one run before the newest, and the test is flaky
+        assert_equal(history.failure_scores()['mod.C'], 0.5 + 1)
+
+    def test_median_duration(self):
+        assert_equal(TestHistory.median_duration([3.0, 1.0, 2.0]), 2.0)
+        assert_equal(TestHistory.median_duration([], default=1.0), 1.0)
@@ -0,0 +1,124 @@
+from testify import assert_equal
+from testify import class_setup
+from testify import TestCase
+from testify import test_ordering
+from testify.test_history import TestHistory
+
+
+def outcome(cls, name, success, end_time):
+    return {
+        'success': success,
+        'complete': True,
+        'end_time': end_time,
+        'run_time': 1.0,
+        'method': {'module': 'test.test_ordering_test', 'class': cls, 'name': name, 'fixture_type': None},
+    }
+
+
+class FirstCase(TestCase):
+    __test__ = False
+
+
+class SecondCase(TestCase):
+    __test__ = False
+
+
+class ThirdCase(TestCase):
+    __test__ = False
+
+
+class FourthCase(TestCase):
+    __test__ = False
+
+
+class DatabaseCase(TestCase):
+    __test__ = False
+
+    @class_setup
+    def create_database(self):
+        pass
+
+
+class FirstDatabaseCase(DatabaseCase):
+    __test__ = False
+
+
+class SecondDatabaseCase(DatabaseCase):
+    __test__ = False
+
+
+class FailedFirstOrderTestCase(TestCase):
+
+    def build_history(self):
+        history = TestHistory()
+        # run 0 is older than run 1
+        history.add_result(outcome('SecondCase', 'test_a', False, 100), run=0)
+        history.add_result(outcome('ThirdCase', 'test_a', True, 100), run=0)
+        history.add_result(outcome('SecondCase', 'test_a', False, 200), run=1)
+        history.add_result(outcome('ThirdCase', 'test_a', False, 200), run=1)
+        history.add_result(outcome('FourthCase', 'test_a', False, 100), run=0)
+        history.add_result(outcome('FourthCase', 'test_a', True, 200), run=1)
+        history.add_result(outcome('FirstCase', 'test_a', True, 200), run=1)
+        return history
+
+    def test_failure_scores(self):
+        assert_equal(self.build_history().failure_scores(), {
+            # failed in both runs
+            'test.test_ordering_test.SecondCase': 1.5,
+            # failed in the newest run and flaky
+            'test.test_ordering_test.ThirdCase': 2.0,
+            # failed in the older run and flaky
+            'test.test_ordering_test.FourthCase': 1.5,
+        })
+
+    def test_failing_classes_first_rest_in_original_order(self):
+        order = test_ordering.FailedFirstOrder(self.build_history())
+        assert_equal(
+            order.order([FirstCase, SecondCase, ThirdCase, FourthCase]),
+            [ThirdCase, SecondCase, FourthCase, FirstCase],
+        )
+
+
+class DurationOrderTestCase(TestCase):
+
+    def build_history(self):
+        history = TestHistory()
+        history.add_result(outcome('FirstCase', 'test_a', True, 100))
+        history.add_result(dict(outcome('SecondCase', 'test_a', True, 100), run_time=5.0))
+        history.add_result(dict(outcome('ThirdCase', 'test_a', True, 100), run_time=3.0))
+        return history
+
+    def test_longest_first(self):
+        order = test_ordering.LongestFirstOrder(self.build_history())
+        # FourthCase has no history and is assumed to take the median, 3.0
+        assert_equal(
+            order.order([FirstCase, SecondCase, ThirdCase, FourthCase]),
+            [SecondCase, ThirdCase, FourthCase, FirstCase],
+        )
+
+    def test_shortest_first(self):
+        order = test_ordering.ShortestFirstOrder(self.build_history())
+        assert_equal(
+            order.order([FirstCase, SecondCase, ThirdCase, FourthCase]),
+            [FirstCase, ThirdCase, FourthCase, SecondCase],
+        )
+
+
+class FixtureAffinityOrderTestCase(TestCase):
+
+    def test_classes_sharing_class_fixtures_are_grouped(self):
+        order = test_ordering.FixtureAffinityOrder(TestHistory())
+        assert_equal(
+            order.order([FirstDatabaseCase, FirstCase, SecondCase, SecondDatabaseCase]),
+            [FirstDatabaseCase, SecondDatabaseCase, FirstCase, SecondCase],
+        )
+
+
+class RandomOrderTestCase(TestCase):
+
+    def test_seed_is_reproducible(self):
+        classes = [FirstCase, SecondCase, ThirdCase, FourthCase, DatabaseCase]
+        first = test_ordering.RandomOrder(TestHistory(), seed=4).order(classes)
+        second = test_ordering.RandomOrder(TestHistory(), seed=4).order(classes)
+        assert_equal(first, second)
+        assert_equal(sorted(first, key=classes.index), classes)
@@ -1,6 +1,7 @@
 import re
 import subprocess
 import sys
+import tempfile
 
 import mock
 from testify import setup_teardown, TestCase, test_program
@@ -55,6 +56,58 @@ class ParseTestRunnerCommandLineArgsTest(TestCase):
         with assert_raises(OptionParserErrorException):
             test_program.parse_test_runner_command_line_args([], [])
 
+    def test_parse_test_runner_command_line_args_bucket_requires_count(self):
+        with assert_raises(OptionParserErrorException):
+            test_program.parse_test_runner_command_line_args([], ['path', '--bucket', '1'])
+        with assert_raises(OptionParserErrorException):
+            test_program.parse_test_runner_command_line_args([], ['path', '--bucket', '2', '--bucket-count', '2'])
+
+    def test_parse_test_runner_command_line_args_watch_only_runs_tests(self):
+        for args in (
+            ['--rerun-test-file', '-'],
+            ['--replay-json', 'results.json'],
+            ['--bisect-pollution', 'path A.test_a', '--bisect-log', 'results.json'],
+            ['path', '--list-tests'],
+            ['path', '--list-suites'],
+        ):
+            with assert_raises(OptionParserErrorException):
+                test_program.parse_test_runner_command_line_args([], args + ['--watch'])
+        test_program.parse_test_runner_command_line_args([], ['path', '--watch'])
+
+    def test_parse_test_runner_command_line_args_rerun_merge_requires_file(self):
+        with assert_raises(OptionParserErrorException):
+            test_program.parse_test_runner_command_line_args([], ['path', '--rerun-merge'])
+        test_program.parse_test_runner_command_line_args([], ['--rerun-test-file', '-', '--rerun-merge'])
+
+    def test_parse_test_runner_command_line_args_suite_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.suite') as suite_file:
+            suite_file.write(
+                '# generated\n'
+                'test.a_test ATest.test_one redundant\n'
+                'test.a_test ATest.test_one slow\n'
+                '\n'
+                'test.b_test BTest.test_two redundant\n'
+            )
+            suite_file.flush()
+            _, _, test_runner_args, _ = test_program.parse_test_runner_command_line_args(
+                [], ['path', '--suite-file', suite_file.name],
+            )
+
+        assert_equal(
+            test_runner_args['method_suites'],
+            {
+                ('test.a_test', 'ATest'): {'test_one': set(['redundant', 'slow'])},
+                ('test.b_test', 'BTest'): {'test_two': set(['redundant'])},
+            },
+        )
+
+    def test_parse_test_runner_command_line_args_malformed_suite_file(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.suite') as suite_file:
+            suite_file.write('test.a_test ATest.test_one redundant\ntest.a_test ATest.test_two\n')
+            suite_file.flush()
+            with assert_raises(OptionParserErrorException):
+                test_program.parse_test_runner_command_line_args([], ['path', '--suite-file', suite_file.name])
+
 
 def test_call(command):
     proc = subprocess.Popen(command, stdout=subprocess.PIPE)
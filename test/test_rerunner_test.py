@@ -0,0 +1,63 @@
+import os
+
+import mock
+
+from testify import assert_equal
+from testify import assert_raises
+from testify import setup_teardown
+from testify import test_discovery
+from testify import TestCase
+from testify.exceptions import DiscoveryError
+from testify.test_rerunner import TestRerunner
+from test.utils.temp_package import temp_package
+
+
+class TestRerunnerTestCase(TestCase):
+
+    @setup_teardown
+    def make_package(self):
+        with temp_package({
+            'rerunpkg/__init__.py': '',
+            'rerunpkg/a_test.py': (
+                'import testify\n\n\n'
+                'class ATest(testify.TestCase):\n'
+                '    def test_one(self):\n        pass\n\n    def test_two(self):\n        pass\n\n\n'
+                'class BTest(testify.TestCase):\n    def test_b(self):\n        pass\n'
+            ),
+        }) as root:
+            self.rerun_file = os.path.join(root, 'rerun.txt')
+            yield
+
+    def discover(self, lines, **kwargs):
+        with open(self.rerun_file, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        runner = TestRerunner(None, rerun_test_file=self.rerun_file, **kwargs)
+        with mock.patch.object(test_discovery, 'discover', side_effect=test_discovery.discover) as discover:
+            test_cases = [
+                (type(test_case).__name__, sorted(method.__name__ for method in test_case.runnable_test_methods()))
+                for test_case in runner.discover()
+            ]
+        return test_cases, discover.call_count
+
+    def test_consecutive_entries_share_an_instance(self):
+        test_cases, discover_calls = self.discover([
+            'rerunpkg.a_test ATest.test_one',
+            'rerunpkg.a_test ATest.test_two',
+            '',
+            'rerunpkg.a_test BTest.test_b',
+            'rerunpkg.a_test ATest.test_one',
+        ])
+        assert_equal(test_cases, [('ATest', ['test_one', 'test_two']), ('BTest', ['test_b']), ('ATest', ['test_one'])])
+        assert_equal(discover_calls, 1)
+
+    def test_merge(self):
+        test_cases, _ = self.discover([
+            '{"test": "rerunpkg.a_test ATest.test_one"}',
+            '{"test": "rerunpkg.a_test BTest.test_b"}',
+            '{"test": "rerunpkg.a_test ATest.test_two"}',
+        ], rerun_merge=True)
+        assert_equal(test_cases, [('ATest', ['test_one', 'test_two']), ('BTest', ['test_b'])])
+
+    def test_unknown_class(self):
+        with assert_raises(DiscoveryError):
+            self.discover(['rerunpkg.a_test CTest.test_c'])
@@ -2,6 +2,7 @@ import mock
 from testify import assert_equal
 from testify import setup
 from testify import setup_teardown
+from testify import suite
 from testify import test_case
 from testify import test_runner
 from types import ModuleType
@@ -120,3 +121,131 @@ class TestTestRunnerGetTestsForSuite(test_case.TestCase):
         instance = test_runner.TestRunner(mock.sentinel.test_class)
         ret = instance.get_tests_for_suite(mock.sentinel.selected_suite_name)
         assert_equal(list(ret), [])
+
+
+class PatternTestCase(test_case.TestCase):
+    __test__ = False
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        super(PatternTestCase, self).__init__(*args, **kwargs)
+        type(self).instances += 1
+
+    def test_alpha(self):
+        pass
+
+    def test_beta(self):
+        pass
+
+
+class OtherPatternTestCase(PatternTestCase):
+    __test__ = False
+
+    def test_gamma(self):
+        pass
+
+
+class TestRunnerNamePatternsTest(test_case.TestCase):
+
+    @setup
+    def reset_instances(self):
+        PatternTestCase.instances = 0
+
+    def select(self, patterns, test_case_classes, **kwargs):
+        runner = test_runner.TestRunner('test', name_patterns=patterns, **kwargs)
+        return [
+            (test_case_class.__name__, sorted(kwargs['name_overrides']))
+            for test_case_class, kwargs in runner.select_test_methods(test_case_classes)
+        ]
+
+    def test_glob_over_full_name(self):
+        pairs = [(PatternTestCase, {}), (OtherPatternTestCase, {})]
+        assert_equal(self.select(['*Other*gamma'], pairs), [('OtherPatternTestCase', ['test_gamma'])])
+        assert_equal(
+            self.select(['test.test_runner_test *.test_alpha'], pairs),
+            [('PatternTestCase', ['test_alpha']), ('OtherPatternTestCase', ['test_alpha'])],
+        )
+        assert_equal(PatternTestCase.instances, 0)
+
+    def test_glob_anchored_at_both_ends(self):
+        pairs = [(PatternTestCase, {}), (OtherPatternTestCase, {})]
+        assert_equal(self.select(['PatternTestCase.test_*'], pairs), [])
+        assert_equal(self.select(['test_runner_test *.test_alpha'], pairs), [])
+        assert_equal(self.select(['PatternTestCase'], pairs), [])
+
+    def test_regex_searched_for(self):
+        pairs = [(PatternTestCase, {}), (OtherPatternTestCase, {})]
+        assert_equal(self.select(['re:Other'], pairs), [('OtherPatternTestCase', ['test_alpha', 'test_beta', 'test_gamma'])])
+
+    def test_regex_and_multiple_patterns(self):
+        pairs = [(PatternTestCase, {}), (OtherPatternTestCase, {})]
+        assert_equal(
+            self.select(['re:^test\\.test_runner_test PatternTestCase', '*.test_gamma'], pairs),
+            [('PatternTestCase', ['test_alpha', 'test_beta']), ('OtherPatternTestCase', ['test_gamma'])],
+        )
+
+    def test_narrows_existing_overrides(self):
+        pairs = [(PatternTestCase, {'name_overrides': set(['test_beta'])})]
+        assert_equal(self.select(['*test_a*'], pairs), [])
+        assert_equal(
+            self.select(['*'], [(OtherPatternTestCase, {})], module_method_overrides={'OtherPatternTestCase': set(['test_beta'])}),
+            [('OtherPatternTestCase', ['test_beta'])],
+        )
+
+
+class SuiteFilteredTestCase(test_case.TestCase):
+    __test__ = False
+
+    @suite('slow')
+    def test_slow(self):
+        pass
+
+    def test_fast(self):
+        pass
+
+
+class TestRunnerRunnableTestClassesTest(test_case.TestCase):
+
+    def runnable(self, pairs, **kwargs):
+        runner = test_runner.TestRunner('test', **kwargs)
+        return [test_case_class.__name__ for test_case_class, _ in runner.runnable_test_classes(pairs)]
+
+    def test_suite_filters(self):
+        pairs = [(SuiteFilteredTestCase, {})]
+        assert_equal(self.runnable(pairs, suites_exclude=['slow']), ['SuiteFilteredTestCase'])
+        assert_equal(self.runnable(pairs, suites_require=['slow']), ['SuiteFilteredTestCase'])
+        assert_equal(self.runnable(pairs, suites_require=['db']), [])
+        assert_equal(self.runnable(pairs, suites_expression='slow and not fast'), ['SuiteFilteredTestCase'])
+        assert_equal(self.runnable(pairs, suites_expression='db or cache'), [])
+
+    def test_name_overrides(self):
+        assert_equal(self.runnable([(SuiteFilteredTestCase, {'name_overrides': set(['test_slow'])})], suites_exclude=['slow']), [])
+        assert_equal(
+            self.runnable(
+                [(SuiteFilteredTestCase, {})],
+                suites_exclude=['slow'],
+                module_method_overrides={'SuiteFilteredTestCase': set(['test_slow'])},
+            ),
+            [],
+        )
+
+    def test_suite_file_suites(self):
+        assert_equal(
+            self.runnable(
+                [(SuiteFilteredTestCase, {})],
+                suites_require=['picked'],
+                method_suites={(SuiteFilteredTestCase.__module__, 'SuiteFilteredTestCase'): {'test_fast': set(['picked'])}},
+            ),
+            ['SuiteFilteredTestCase'],
+        )
+
+    def test_classes_with_their_own_init_are_kept(self):
+        # PatternTestCase.__init__ could generate test methods, so it has to be constructed to know
+        assert_equal(self.runnable([(PatternTestCase, {})], suites_require=['db']), ['PatternTestCase'])
+
+    def test_filtered_classes_are_not_constructed(self):
+        runner = test_runner.TestRunner('test', suites_require=['db'])
+        with mock.patch.object(runner, 'discover_test_classes', return_value=[SuiteFilteredTestCase]):
+            with mock.patch.object(runner, '_construct_test') as construct_test:
+                assert_equal(list(runner.discover()), [])
+        assert_equal(construct_test.call_count, 0)
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import six
+
+from testify import assert_equal
+from testify import setup_teardown
+from testify import test_reporter
+from testify import TestCase
+from testify.import_graph import ImportGraph
+from testify.test_watcher import ImportRecorder
+from testify.test_watcher import TestWatcher
+from test.utils.temp_package import temp_package
+
+
+class ImportRecorderTestCase(TestCase):
+
+    def test_records_absolute_and_relative_imports(self):
+        graph = ImportGraph()
+        with ImportRecorder(graph).recording():
+            six.moves.builtins.__import__('os.path', {'__name__': 'fake_test'})
+            six.moves.builtins.__import__(
+                'test_runner_subdir',
+                {'__name__': 'test.fake_test', '__package__': 'test'},
+                None,
+                ['base_class'],
+                1,
+            )
+
+        assert_equal(
+            graph.imports['test.fake_test'],
+            set(['test.test_runner_subdir', 'test.test_runner_subdir.base_class']),
+        )
+        assert_equal(graph.imports['fake_test'], set(['os.path']))
+
+
+class RecordingReporter(test_reporter.TestReporter):
+
+    def __init__(self, options):
+        super(RecordingReporter, self).__init__(options)
+        self.tests = []
+
+    def test_complete(self, result):
+        self.tests.append(result['method']['full_name'])
+
+
+class TestWatcherTestCase(TestCase):
+
+    @setup_teardown
+    def make_project(self):
+        with temp_package({
+            'watchpkg/__init__.py': '',
+            'watchpkg/util.py': 'VALUE = 1\n',
+            'watchpkg/a_test.py': (
+                'from watchpkg import util\nimport testify\n\n\nclass ATest(testify.TestCase):\n'
+                '    def test_a(self):\n        assert util.VALUE\n'
+            ),
+            'watchpkg/b_test.py': 'import testify\n\n\nclass BTest(testify.TestCase):\n    def test_b(self):\n        pass\n',
+        }) as self.root:
+            yield
+
+    def test_rerun_only_affected_modules(self):
+        reporters = []
+
+        def build_reporters():
+            reporters.append(RecordingReporter(None))
+            return reporters[-1:]
+
+        watcher = TestWatcher('watchpkg', {}, build_reporters, root=self.root)
+        watcher.run_tests()
+        assert_equal(
+            sorted(reporters[-1].tests),
+            ['watchpkg.a_test ATest.test_a', 'watchpkg.b_test BTest.test_b'],
+        )
+
+        util_path = os.path.join(self.root, 'watchpkg', 'util.py')
+        with open(util_path, 'w') as f:
+            f.write('VALUE = 2\n')
+        os.utime(util_path, (0, 0))
+
+        changed = watcher.changed_modules()
+        assert_equal(changed, set(['watchpkg.util']))
+        affected = watcher.graph.dependents(changed)
+        assert_equal(affected & watcher.test_modules, set(['watchpkg.a_test']))
+
+        watcher.reload(affected)
+        watcher.run_tests(affected & watcher.test_modules)
+        assert_equal(reporters[-1].tests, ['watchpkg.a_test ATest.test_a'])
+        assert_equal(sys.modules['watchpkg.util'].VALUE, 2)
+
+    def test_runner_filters_apply(self):
+        reporters = []
+
+        def build_reporters():
+            reporters.append(RecordingReporter(None))
+            return reporters[-1:]
+
+        watcher = TestWatcher('watchpkg', {'name_patterns': ['*test_b*']}, build_reporters, root=self.root)
+        watcher.run_tests()
+        assert_equal(reporters[-1].tests, ['watchpkg.b_test BTest.test_b'])
+        # modules without a selected test are still watched
+        assert_equal(watcher.test_modules, set(['watchpkg.a_test', 'watchpkg.b_test']))
+
+        watcher.run_tests(set(['watchpkg.a_test', 'watchpkg.b_test']))
+        assert_equal(reporters[-1].tests, ['watchpkg.b_test BTest.test_b'])
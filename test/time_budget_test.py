@@ -0,0 +1,118 @@
+import mock
+
+from testify import assert_equal
+from testify import assert_raises
+from testify import test_reporter
+from testify import TestCase
+from testify.test_history import TestHistory
+from testify.test_runner import TestRunner
+from testify.time_budget import parse_duration
+from testify.time_budget import plan_time_budget
+from test.utils.temp_package import temp_package
+
+
+def result(name, run_time, success=True, fixture_type=None):
+    return dict(
+        method={'module': 'mod', 'class': 'A', 'name': name, 'fixture_type': fixture_type, 'full_name': 'mod A.%s' % name},
+        run_time=run_time,
+        success=success,
+        end_time=1,
+    )
+
+
+class ParseDurationTestCase(TestCase):
+
+    def test_units(self):
+        assert_equal(parse_duration('90'), 90)
+        assert_equal(parse_duration('90s'), 90)
+        assert_equal(parse_duration('10m'), 600)
+        assert_equal(parse_duration('1.5h'), 5400)
+
+    def test_invalid(self):
+        for text in ('', 'm', '10x', '-5', '1h30m'):
+            with assert_raises(ValueError):
+                parse_duration(text)
+
+
+class PlanTimeBudgetTestCase(TestCase):
+
+    def history(self, results):
+        history = TestHistory()
+        for method_result in results:
+            history.add_result(method_result)
+        return history
+
+    def test_prefers_likely_failures_per_second(self):
+        history = self.history([
+            result('test_flaky', 2.0, success=False),
+            result('test_stable', 2.0),
+            result('test_cheap', 0.5),
+        ])
+        plan = plan_time_budget([('mod.A', ['test_cheap', 'test_flaky', 'test_stable'])], history, 3.0)
+        assert_equal(plan, {'mod.A': set(['test_cheap', 'test_flaky'])})
+
+    def test_new_tests_are_favoured_and_estimated(self):
+        history = self.history([result('test_stable', 1.0), result('test_stable', 1.0)])
+        plan = plan_time_budget([('mod.A', ['test_new', 'test_stable'])], history, 1.5)
+        assert_equal(plan, {'mod.A': set(['test_new'])})
+
+    def test_class_fixture_cost(self):
+        history = self.history([result('class_setup', 5.0, fixture_type='class_setup'), result('test_one', 1.0)])
+        assert_equal(plan_time_budget([('mod.A', ['test_one'])], history, 5.5), {})
+        assert_equal(plan_time_budget([('mod.A', ['test_one'])], history, 6.0), {'mod.A': set(['test_one'])})
+
+    def test_no_history_chooses_everything(self):
+        assert_equal(plan_time_budget([('mod.A', ['test_one'])], TestHistory(), 0.0), {'mod.A': set(['test_one'])})
+
+
+class NotRunReporter(test_reporter.TestReporter):
+
+    def __init__(self):
+        super(NotRunReporter, self).__init__(None)
+        self.not_run = []
+        self.completed = []
+
+    def test_complete(self, result):
+        self.completed.append(result['method']['full_name'])
+
+    def tests_not_run(self, test_names):
+        self.not_run.extend(test_names)
+
+
+class BudgetedTestCase(TestCase):
+    __test__ = False
+
+    def test_one(self):
+        pass
+
+
+class TestRunnerDeadlineTestCase(TestCase):
+
+    def test_no_test_cases_start_after_the_deadline(self):
+        reporter = NotRunReporter()
+        TestRunner(BudgetedTestCase, time_budget=0, test_reporters=[reporter]).run()
+        assert_equal(reporter.completed, [])
+        assert_equal(reporter.not_run, ['test.time_budget_test BudgetedTestCase.test_one'])
+
+    def test_within_budget(self):
+        reporter = NotRunReporter()
+        TestRunner(BudgetedTestCase, time_budget=60, test_reporters=[reporter]).run()
+        assert_equal(reporter.completed, ['test.time_budget_test BudgetedTestCase.test_one'])
+        assert_equal(reporter.not_run, [])
+
+    def test_classes_after_the_deadline_are_not_constructed(self):
+        reporter = NotRunReporter()
+        with temp_package({
+            'budgetpkg/__init__.py': '',
+            'budgetpkg/a_test.py': (
+                'import testify\n\n\nclass ATest(testify.TestCase):\n'
+                '    def test_one(self):\n        pass\n\n'
+                '    @testify.suite("slow")\n    def test_slow(self):\n        pass\n\n'
+                '    def test_two(self):\n        pass\n'
+            ),
+        }):
+            runner = TestRunner('budgetpkg', time_budget=0, suites_exclude=['slow'], test_reporters=[reporter])
+            with mock.patch.object(runner, '_construct_test') as construct_test:
+                runner.run()
+        assert not construct_test.called
+        assert_equal(reporter.not_run, ['budgetpkg.a_test ATest.test_one', 'budgetpkg.a_test ATest.test_two'])
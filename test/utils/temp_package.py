@@ -0,0 +1,41 @@
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+
+
+def _top_level_name(path):
+    name = path.split('/')[0]
+    return name[:-3] if name.endswith('.py') else name
+
+
+@contextlib.contextmanager
+def temp_package(files, chdir=False):
+    """Write files ({path relative to the root: source}) under a new root directory on sys.path, and yield the root.
+
+    With chdir, the root is the current directory meanwhile. Afterwards the
+    root is removed, along with the modules imported from it.
+    """
+    root = tempfile.mkdtemp()
+    for path, source in files.items():
+        path = os.path.join(root, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(source)
+
+    top_level_names = set(_top_level_name(path) for path in files)
+    old_cwd = os.getcwd()
+    if chdir:
+        os.chdir(root)
+    sys.path.insert(0, root)
+    try:
+        yield root
+    finally:
+        os.chdir(old_cwd)
+        sys.path.remove(root)
+        for module_name in list(sys.modules):
+            if module_name.split('.')[0] in top_level_names:
+                del sys.modules[module_name]
+        shutil.rmtree(root)
@@ -0,0 +1,209 @@
+"""Assign TestCase classes to buckets (shards) for --bucket / --bucket-count.
+
+Every shard computes the same plan independently, so everything here must be
+deterministic given the same test methods and the same timing history.
+Classes with a recorded duration are packed longest-processing-time-first onto
+the least loaded bucket; classes we have never seen are placed by a stable hash
+of their name.
+
+A class which would dominate its bucket is split into pieces, each running a
+subset of its test methods on a different bucket. Every piece pays for the
+class's class_setup/class_teardown fixtures again, so a class is only split
+when the estimated makespan goes down.
+
+With the "consistent" strategy, classes are instead placed on a hash ring with
+virtual nodes, so adding classes moves nothing and changing the bucket count
+only moves the classes which have to move, keeping per-bucket caches warm.
+"""
+from __future__ import absolute_import
+
+import bisect
+from collections import defaultdict
+import hashlib
+import json
+
+STRATEGY_DURATION = 'duration'
+STRATEGY_CONSISTENT = 'consistent'
+STRATEGIES = (STRATEGY_DURATION, STRATEGY_CONSISTENT)
+
+VIRTUAL_NODES_PER_BUCKET = 64
+
+
+def _hash(name):
+    return int(hashlib.md5(name.encode('UTF-8')).hexdigest(), 16)
+
+
+def hash_bucket(name, bucket_count):
+    """A stable (unlike hash()) bucket for name."""
+    return _hash(name) % bucket_count
+
+
+class HashRing(object):
+    """Consistent hashing of names onto buckets."""
+
+    def __init__(self, bucket_count, virtual_nodes=VIRTUAL_NODES_PER_BUCKET):
+        self.points = sorted(
+            (_hash('bucket-%d-%d' % (bucket, node)), bucket)
+            for bucket in range(bucket_count)
+            for node in range(virtual_nodes)
+        )
+        self.hashes = [point for point, _ in self.points]
+
+    def bucket(self, name):
+        """The bucket owning the first point clockwise from name's hash."""
+        index = bisect.bisect(self.hashes, _hash(name)) % len(self.points)
+        return self.points[index][1]
+
+
+def test_method_names(test_case_class):
+    """The names of the test methods defined on a TestCase class, as matched by name_overrides."""
+    return sorted(test_case_class._test_method_table())
+
+
+class BucketPlan(object):
+    """Which bucket(s) each class runs on, and which of its methods run there."""
+
+    def __init__(self):
+        # class name -> {bucket: None for the whole class, or a set of method names}
+        self.pieces = defaultdict(dict)
+
+    def add(self, class_name, bucket, method_names=None):
+        self.pieces[class_name][bucket] = method_names
+
+    def buckets(self, class_name):
+        return set(self.pieces.get(class_name, ()))
+
+    def to_json_lines(self):
+        """One JSON object per class and bucket, for --list-buckets."""
+        for class_name in sorted(self.pieces):
+            for bucket, method_names in sorted(self.pieces[class_name].items()):
+                yield json.dumps(dict(
+                    test_case=class_name,
+                    bucket=bucket,
+                    methods=None if method_names is None else sorted(method_names),
+                ), sort_keys=True)
+
+    @classmethod
+    def from_json_lines(cls, lines):
+        plan = cls()
+        for line in lines:
+            if line.strip():
+                piece = json.loads(line)
+                methods = piece['methods']
+                plan.add(piece['test_case'], piece['bucket'], None if methods is None else set(methods))
+        return plan
+
+    def moved_classes(self, previous):
+        """Classes present in both plans whose buckets differ between them."""
+        return sorted(
+            class_name
+            for class_name in set(self.pieces) & set(previous.pieces)
+            if self.pieces[class_name] != previous.pieces[class_name]
+        )
+
+    def name_overrides(self, class_name, bucket):
+        """The methods of class_name to run on bucket; None means all of them.
+
+        Raises KeyError if the class doesn't run on this bucket at all.
+        """
+        return self.pieces.get(class_name, {})[bucket]
+
+
+def _split_methods(method_durations, piece_count):
+    """Distribute methods over piece_count pieces, longest first, balancing their run time."""
+    pieces = [set() for _ in range(piece_count)]
+    loads = [0.0] * piece_count
+    for method_name in sorted(method_durations, key=lambda name: (-method_durations[name], name)):
+        piece = min(range(piece_count), key=lambda index: (loads[index], index))
+        pieces[piece].add(method_name)
+        loads[piece] += method_durations[method_name]
+    return pieces, loads
+
+
+def _best_piece_count(fixed, variable, method_count, bucket_count, total):
+    """The number of pieces minimizing our makespan estimate for one class.
+
+    With k pieces the largest piece takes about fixed + variable / k, and the
+    other classes can't do better than the average bucket load, which grows by
+    fixed for every extra piece.
+    """
+    def makespan(piece_count):
+        return max(
+            fixed + variable / piece_count,
+            (total + (piece_count - 1) * fixed) / bucket_count,
+        )
+
+    return min(range(1, min(method_count, bucket_count) + 1), key=lambda k: (makespan(k), k))
+
+
+def consistent_hash_plan(class_names, bucket_count):
+    """Place every class on a HashRing; ignores timings and never splits classes."""
+    ring = HashRing(bucket_count)
+    plan = BucketPlan()
+    for name in class_names:
+        plan.add(name, ring.bucket(name))
+    return plan
+
+
+def plan_buckets(test_methods, bucket_count, history, strategy=STRATEGY_DURATION):
+    """Plan which bucket runs which class (or piece of a class).
+
+    test_methods maps each class name ("module.ClassName") to the names of its
+    test methods; history is a testify.test_history.TestHistory.
+    """
+    if strategy == STRATEGY_CONSISTENT:
+        return consistent_hash_plan(test_methods, bucket_count)
+
+    durations = history.class_durations()
+    known = sorted(
+        (name for name in test_methods if name in durations),
+        key=lambda name: (-durations[name], name),
+    )
+    unknown = sorted(name for name in test_methods if name not in durations)
+
+    estimate = history.median_duration(durations[name] for name in known)
+    total = sum(durations[name] for name in known) + estimate * len(unknown)
+
+    plan = BucketPlan()
+    loads = [0.0] * bucket_count
+    for name in unknown:
+        bucket = hash_bucket(name, bucket_count)
+        plan.add(name, bucket)
+        loads[bucket] += estimate
+
+    # (duration, class name, methods) for everything packed by run time
+    jobs = []
+    for name in known:
+        method_durations = history.method_durations(name)
+        method_names = set(test_methods[name])
+        fixed = history.class_fixture_duration(name)
+        piece_count = 1
+        # only split classes whose recorded methods all still exist on the class
+        if method_durations and set(method_durations) <= method_names:
+            piece_count = _best_piece_count(
+                fixed, durations[name] - fixed, len(method_names), bucket_count, total,
+            )
+
+        if piece_count == 1:
+            jobs.append((durations[name], name, None))
+            continue
+
+        pieces, piece_loads = _split_methods(method_durations, piece_count)
+        # methods without history (e.g. added since) go with the first piece
+        pieces[0] |= method_names - set(method_durations)
+        total += (piece_count - 1) * fixed
+        for piece, piece_load in zip(pieces, piece_loads):
+            jobs.append((fixed + piece_load, name, piece))
+
+    jobs.sort(key=lambda job: (-job[0], job[1], sorted(job[2] or ())))
+    for duration, name, method_names in jobs:
+        # pieces of the same class must not share a bucket
+        taken = plan.buckets(name)
+        bucket = min(
+            (bucket for bucket in range(bucket_count) if bucket not in taken),
+            key=lambda bucket: (loads[bucket], bucket),
+        )
+        plan.add(name, bucket, method_names)
+        loads[bucket] += duration
+
+    return plan
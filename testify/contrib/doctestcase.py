@@ -1,11 +1,53 @@
-import sys
-from doctest import DocTestFinder, DocTestRunner, REPORT_NDIFF
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import importlib
+from doctest import DocTest, DocTestFinder, DocTestRunner, REPORT_NDIFF
 
 import mock
 import six
 
 from testify import compat
-from testify import MetaTestCase, TestCase, setup_teardown
+from testify import MetaTestCase, TestCase, class_setup, setup_teardown
+from testify.suite_expression import suites_mask
+
+
+# (module name, sha1 of its source) -> the doctests found in it, with the module's own globals
+_doctest_cache = {}
+
+
+def module_source_sha1(module):
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return None
+    try:
+        with open(filename, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except (IOError, OSError):
+        return None
+
+
+def find_doctests(module, globs=None, extraglobs=None):
+    """Find the doctests in module, like DocTestFinder(recurse=True).find(module, name='test_doc').
+
+    Parsing is cached by the module's source hash; each call gets its own
+    copies of the doctests, with their own globals.
+    """
+    key = (module.__name__, module_source_sha1(module))
+    if key[1] is None:
+        return DocTestFinder(recurse=True).find(module, name='test_doc', globs=globs, extraglobs=extraglobs)
+    if key not in _doctest_cache:
+        _doctest_cache[key] = DocTestFinder(recurse=True).find(module, name='test_doc')
+
+    # build globals the way DocTestFinder.find does
+    globs = module.__dict__.copy() if globs is None else globs.copy()
+    if extraglobs is not None:
+        globs.update(extraglobs)
+    if '__name__' not in globs:
+        globs['__name__'] = '__main__'
+    return [
+        DocTest(doctest.examples, globs.copy(), doctest.name, doctest.filename, doctest.lineno, doctest.docstring)
+        for doctest in _doctest_cache[key]
+    ]
 
 
 class DocMetaTestCase(MetaTestCase):
@@ -13,24 +55,47 @@ class DocMetaTestCase(MetaTestCase):
     def __init__(cls, name, bases, dct):
         super(DocMetaTestCase, cls).__init__(name, bases, dct)
 
-        try:
-            module = dct['module']
-        except KeyError:
-            if not dct.get('__test__', True):
-                # This is some kind of abstract class. Do nothing.
-                return
-            else:
-                raise ValueError('No module was given for doctest search!')
-
-        globs = dct.get('globs', None)
-        extraglobs = dct.get('extraglobs', None)
+        if 'module' not in dct and dct.get('__test__', True):
+            raise ValueError('No module was given for doctest search!')
+        # doctests are found the first time the class's test methods are needed; see collect_doctests()
+        cls._doctests_collected = 'module' not in dct
+
+        if dct.get('jobs'):
+            # a new function each time, since class_setup marks the function itself
+            def run_doctests_in_workers(self):
+                self.run_doctests_in_workers()
+            cls.class_setup_doctest_workers = class_setup(run_doctests_in_workers)
+
+    def __call__(cls, *args, **kwargs):
+        cls.collect_doctests()
+        return super(DocMetaTestCase, cls).__call__(*args, **kwargs)
+
+    def _test_method_table(cls):
+        cls.collect_doctests()
+        return super(DocMetaTestCase, cls)._test_method_table()
+
+    def _has_runnable_methods(cls, runnable, method_suites=None, name_overrides=None):
+        # doctests have no suites of their own: if the class's suites rule them out, don't look for them
+        if not method_suites and not runnable(suites_mask(getattr(cls, '_suites', ()))):
+            return False
+        return super(DocMetaTestCase, cls)._has_runnable_methods(runnable, method_suites, name_overrides)
+
+    def collect_doctests(cls):
+        """Add a test method for each doctest in our module, unless that's been done already."""
+        if cls.__dict__['_doctests_collected']:
+            return
+        cls._doctests_collected = True
 
+        module = cls.__dict__['module']
         if isinstance(module, six.string_types):
             # transform a module name into a module
-            module = sys.modules[module]
+            module = importlib.import_module(module)
 
-        for doctest in DocTestFinder(recurse=True).find(module, name='test_doc', globs=globs, extraglobs=extraglobs):
+        for doctest in find_doctests(module, cls.__dict__.get('globs'), cls.__dict__.get('extraglobs')):
             cls.add_test(doctest)
+        # forget any table built before the test methods were added
+        if '_test_method_table_cache' in cls.__dict__:
+            del cls._test_method_table_cache
 
     def add_test(cls, doctest):
         "add a test to this TestCase"
@@ -39,11 +104,17 @@ class DocMetaTestCase(MetaTestCase):
             return
 
         def test(self):
-            return run_test(doctest)
+            if doctest_name in self.worker_results:
+                failures, output = self.worker_results[doctest_name]
+                assert failures == 0, '\n' + output
+            else:
+                return run_test(doctest)
 
         # Need to change dots to colons so that testify doesn't try to interpret them.
+        doctest_name = doctest.name
         testname = doctest.name.replace('.', ':')
         test.__name__ = doctest.name = testname
+        test.doctest_name = doctest_name
         test = test.__get__(None, cls)
         vars(test)['_suites'] = set()
 
@@ -51,25 +122,72 @@ class DocMetaTestCase(MetaTestCase):
 
 
 def run_test(doctest):
+    failures, output = run_doctest(doctest)
+    assert failures == 0, '\n' + output
+
+
+def run_doctest(doctest):
+    """Run a doctest; return its number of failures and its report."""
     summary = compat.NativeIO()
     runner = DocTestRunner(optionflags=REPORT_NDIFF)
     runner.run(doctest, out=summary.write)
+    return runner.failures, summary.getvalue()
+
 
-    assert runner.failures == 0, '\n' + summary.getvalue()
+def run_doctest_in_worker(module_name, doctest_name, globs, extraglobs):
+    """Find and run one doctest in a worker process."""
+    module = importlib.import_module(module_name)
+    for doctest in find_doctests(module, globs, extraglobs):
+        if doctest.name == doctest_name:
+            with mock.patch.dict(six.moves.builtins.__dict__):
+                return run_doctest(doctest)
+    raise LookupError('No doctest named %s in %s' % (doctest_name, module_name))
 
 
 class DocTestCase(six.with_metaclass(DocMetaTestCase, TestCase)):
     """
     A testify TestCase that turns doctests into unit tests.
 
+    The module is only searched for doctests once the class's tests are
+    needed, e.g. when it's instantiated to run.
+
     Subclass attributes:
-        module -- the module object to be introspected for doctests
+        module -- the module object (or name) to be introspected for doctests
         globs -- (optional) a dictionary containing the initial global variables for the tests.
             A new copy of this dictionary is created for each test.
         extraglobs -- (optional) an extra set of global variables, which is merged into globs.
+        jobs -- (optional) run this class's doctests across this many worker processes, which
+            each import the module again. globs and extraglobs must be picklable.
     """
     __test__ = False
 
+    jobs = None
+    # doctest name -> (failures, report), for the doctests run by workers
+    worker_results = {}
+
+    def run_doctests_in_workers(self):
+        """Run our selected doctests across self.jobs processes; a class_setup for classes with jobs set."""
+        if not self.jobs:
+            return
+
+        module = type(self).__dict__['module']
+        module_name = module if isinstance(module, six.string_types) else module.__name__
+        globs, extraglobs = type(self).__dict__.get('globs'), type(self).__dict__.get('extraglobs')
+        doctest_names = [
+            method.doctest_name
+            for method in self.runnable_test_methods()
+            if hasattr(method, 'doctest_name')
+        ]
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            results = executor.map(
+                run_doctest_in_worker,
+                [module_name] * len(doctest_names),
+                doctest_names,
+                [globs] * len(doctest_names),
+                [extraglobs] * len(doctest_names),
+            )
+            self.worker_results = dict(zip(doctest_names, results))
+
     @setup_teardown
     def patch_builtins(self):
         # XXX: doctest lets things spew into builtins._
@@ -0,0 +1,195 @@
+"""An on-disk index of module -> TestCase classes -> test methods -> suites.
+
+Discovery imports the whole test tree, which is slow. The index records what
+it found: each module's own _suites, and for each class its __test__ flag,
+suites, and test methods with their suites. Bucket planning and
+--list-tests/--list-suites can then answer from the index, and running a shard
+only imports the modules it was assigned.
+
+Each module's entry is keyed on its file's mtime, size and sha1. Loading the
+index re-imports only the modules whose files changed (or which import a
+changed module, per testify.import_graph), plus modules added since.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import unittest
+
+from . import import_graph
+from . import test_discovery
+from .test_case import MetaTestCase
+
+
+def file_sha1(filename):
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def file_key(filename):
+    """The (mtime, size, sha1) an index entry is keyed on, or Nones if filename is missing."""
+    if not filename or not os.path.exists(filename):
+        return None, None, None
+    stat = os.stat(filename)
+    return stat.st_mtime, stat.st_size, file_sha1(filename)
+
+
+def module_entry(module_name, test_case_classes):
+    """Build the index entry for an imported module, given the classes discovery found in it."""
+    module = sys.modules[module_name]
+    filename = getattr(module, '__file__', None)
+    mtime, size, sha1 = file_key(filename)
+
+    classes = {}
+    for test_case_class in test_case_classes:
+        classes[test_case_class.__name__] = dict(
+            test=True,
+            suites=sorted(getattr(test_case_class, '_suites', ())),
+            methods=dict(
+                (method_name, sorted(getattr(function, '_suites', ())))
+                for method_name, function in test_case_class._test_method_table().items()
+            ),
+        )
+    # record the classes discovery skipped because of __test__ = False, too
+    for class_name, member in inspect.getmembers(module, inspect.isclass):
+        if (
+                member.__module__ == module_name and
+                not member.__dict__.get('__test__', True) and
+                (isinstance(member, MetaTestCase) or issubclass(member, unittest.TestCase))
+        ):
+            classes[class_name] = dict(test=False)
+
+    return dict(
+        file=filename,
+        mtime=mtime,
+        size=size,
+        sha1=sha1,
+        suites=sorted(getattr(module, '_suites', ())),
+        classes=classes,
+    )
+
+
+class DiscoveryIndex(object):
+
+    VERSION = 2
+
+    def __init__(self, test_path, modules, module_filter=test_discovery.ALL_MODULES):
+        self.test_path = test_path
+        self.module_filter = module_filter
+        # module name -> entry, see module_entry()
+        self.modules = modules
+
+    @classmethod
+    def from_test_classes(cls, test_path, test_case_classes, module_filter=test_discovery.ALL_MODULES):
+        """Index the result of a full discovery of test_path with module_filter."""
+        classes_by_module = dict(
+            (module_name, []) for module_name in test_discovery.module_names(test_path, module_filter)
+        )
+        for test_case_class in test_case_classes:
+            classes_by_module.setdefault(test_case_class.__module__, []).append(test_case_class)
+        return cls(test_path, dict(
+            (module_name, module_entry(module_name, module_classes))
+            for module_name, module_classes in classes_by_module.items()
+        ), module_filter)
+
+    @classmethod
+    def load(cls, filename, test_path, module_filter=test_discovery.ALL_MODULES):
+        """Read the index in filename, or return None if it's missing, unreadable or for another test path or filter.
+
+        The index may be out of date; see refresh().
+        """
+        if not os.path.exists(filename):
+            return None
+        with open(filename) as index_file:
+            try:
+                data = json.load(index_file)
+            except ValueError:
+                return None
+
+        if (
+                data.get('version') != cls.VERSION or
+                data.get('test_path') != test_path or
+                data.get('module_filter') != module_filter.to_json()
+        ):
+            return None
+        return cls(data['test_path'], data['modules'], module_filter)
+
+    def save(self, filename):
+        with open(filename, 'w') as index_file:
+            json.dump(
+                dict(
+                    version=self.VERSION,
+                    test_path=self.test_path,
+                    module_filter=self.module_filter.to_json(),
+                    modules=self.modules,
+                ),
+                index_file,
+                sort_keys=True,
+            )
+
+    def stale_modules(self):
+        """The modules under our test path which need (re-)importing, and those which are gone.
+
+        Entries whose file has a new mtime or size but the same sha1 are
+        updated in place rather than reported.
+        """
+        module_names = set(test_discovery.module_names(self.test_path, self.module_filter))
+        removed = set(self.modules) - module_names
+        changed_files = set()
+        stale = module_names - set(self.modules)
+        for module_name in module_names & set(self.modules):
+            entry = self.modules[module_name]
+            filename = entry['file']
+            if not filename or not os.path.exists(filename):
+                stale.add(module_name)
+                continue
+            stat = os.stat(filename)
+            if (stat.st_mtime, stat.st_size) == (entry['mtime'], entry['size']):
+                continue
+            sha1 = file_sha1(filename)
+            if sha1 == entry['sha1']:
+                entry['mtime'], entry['size'] = stat.st_mtime, stat.st_size
+            else:
+                stale.add(module_name)
+                changed_files.add(filename)
+
+        if changed_files:
+            # a changed module can change the classes of every module which imports it
+            graph = import_graph.StaticImportGraph.build(os.getcwd())
+            stale |= graph.affected_modules(changed_files) & module_names
+        return stale, removed
+
+    def refresh(self):
+        """Re-import the stale modules and update their entries; return whether anything changed."""
+        stale, removed = self.stale_modules()
+        for module_name in removed:
+            del self.modules[module_name]
+        for module_name in sorted(stale):
+            test_case_classes = list(test_discovery.discover(module_name, recursive=False))
+            self.modules[module_name] = module_entry(module_name, test_case_classes)
+        return bool(stale or removed)
+
+    def test_classes(self):
+        """Yield (module name, class name, class entry) for every indexed TestCase with __test__ set."""
+        for module_name, entry in sorted(self.modules.items()):
+            for class_name, class_entry in sorted(entry['classes'].items()):
+                if class_entry['test']:
+                    yield module_name, class_name, class_entry
+
+    def test_methods(self, include_class=None):
+        """Map "module.ClassName" (see MetaTestCase._cmp_str) to its test method names.
+
+        include_class, if given, is called with each class name to filter them.
+        """
+        return dict(
+            ('%s.%s' % (module_name, class_name), sorted(class_entry['methods']))
+            for module_name, class_name, class_entry in self.test_classes()
+            if include_class is None or include_class(class_name)
+        )
+
+    @staticmethod
+    def module_of(class_key):
+        return class_key.rpartition('.')[0]
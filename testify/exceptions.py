@@ -10,5 +10,13 @@ class DiscoveryError(TestifyError):
     pass
 
 
+class DiscoveryErrors(DiscoveryError):
+    """Several modules failed to import during a --discovery-keep-going discovery."""
+
+    def __init__(self, errors):
+        super(DiscoveryErrors, self).__init__('\n'.join(str(error) for error in errors))
+        self.errors = list(errors)
+
+
 class Interruption(Testify):
     pass
@@ -0,0 +1,189 @@
+"""Module import graphs, used to find the tests affected by a change.
+
+ImportGraph is a plain ``importer -> imported`` graph of module names.
+StaticImportGraph fills one in by parsing every module of a project with ast,
+without importing anything, and can cache the parsed imports of each file
+between runs (keyed on the file's mtime and size).
+"""
+from __future__ import absolute_import
+
+from collections import defaultdict
+import ast
+import importlib.util
+import json
+import os
+
+
+class ImportGraph(object):
+    """Directed graph of ``importer -> imported`` module names."""
+
+    def __init__(self):
+        self.imports = defaultdict(set)
+
+    def add(self, importer, imported):
+        if importer != imported:
+            self.imports[importer].add(imported)
+
+    def forget(self, module_names):
+        """Drop the outgoing edges of these modules; they are about to be re-imported."""
+        for module_name in module_names:
+            self.imports.pop(module_name, None)
+
+    def modules(self):
+        modules = set(self.imports)
+        for imported in self.imports.values():
+            modules |= imported
+        return modules
+
+    def dependents(self, module_names):
+        """Return the given modules plus every module which transitively imports one of them."""
+        imported_by = defaultdict(set)
+        for importer, imported in self.imports.items():
+            for module_name in imported:
+                imported_by[module_name].add(importer)
+
+        seen = set(module_names)
+        pending = list(seen)
+        while pending:
+            for importer in imported_by[pending.pop()]:
+                if importer not in seen:
+                    seen.add(importer)
+                    pending.append(importer)
+        return seen
+
+
+def parse_imports(source, module_name, is_package):
+    """Return the names of every module an import statement in source may refer to.
+
+    `from package import name` yields both package and package.name, since
+    name may be a submodule; callers drop the names which aren't modules.
+    """
+    package = module_name if is_package else module_name.rpartition('.')[0]
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                try:
+                    base = importlib.util.resolve_name('.' * node.level + (node.module or ''), package)
+                except ValueError:
+                    continue
+            else:
+                base = node.module
+            names.add(base)
+            names.update('%s.%s' % (base, alias.name) for alias in node.names if alias.name != '*')
+    return names
+
+
+def project_modules(root):
+    """Map the module name of every .py file in root's packages to its path.
+
+    Only top-level modules and directories with an __init__.py are walked.
+    """
+    modules = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        relative = os.path.relpath(dirpath, root)
+        if relative == os.curdir:
+            package_parts = []
+        else:
+            package_parts = relative.split(os.sep)
+            if '__init__.py' not in filenames:
+                dirnames[:] = []
+                continue
+        dirnames[:] = sorted(dirname for dirname in dirnames if not dirname.startswith('.'))
+
+        for filename in filenames:
+            if not filename.endswith('.py'):
+                continue
+            if filename == '__init__.py':
+                if package_parts:
+                    modules['.'.join(package_parts)] = os.path.join(dirpath, filename)
+            else:
+                modules['.'.join(package_parts + [filename[:-3]])] = os.path.join(dirpath, filename)
+    return modules
+
+
+class StaticImportGraph(ImportGraph):
+    """The import graph of the project in root, built with ast."""
+
+    def __init__(self, root):
+        super(StaticImportGraph, self).__init__()
+        self.root = os.path.abspath(root)
+        self.files = {}
+
+    @classmethod
+    def build(cls, root, cache=None):
+        """Parse every module in root, reusing unchanged entries of the cache file if given."""
+        graph = cls(root)
+        graph.files = project_modules(graph.root)
+
+        cached = {}
+        if cache and os.path.exists(cache):
+            with open(cache) as cache_file:
+                try:
+                    cached = json.load(cache_file)
+                except ValueError:
+                    cached = {}
+
+        # imports of missing project modules are kept too, so deleting a module still affects its importers
+        top_level_names = set(module_name.partition('.')[0] for module_name in graph.files)
+        entries = {}
+        for module_name, filename in graph.files.items():
+            stat = os.stat(filename)
+            entry = cached.get(module_name)
+            if not (entry and entry['file'] == filename and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size):
+                with open(filename, 'rb') as source_file:
+                    source = source_file.read()
+                try:
+                    imports = parse_imports(source, module_name, filename.endswith('__init__.py'))
+                except SyntaxError:
+                    # it can't be imported either; treat it as depending on nothing
+                    imports = set()
+                entry = dict(file=filename, mtime=stat.st_mtime, size=stat.st_size, imports=sorted(imports))
+            entries[module_name] = entry
+
+            # importing a submodule always runs its package's __init__ first
+            parent_name = module_name.rpartition('.')[0]
+            if parent_name in graph.files:
+                graph.add(module_name, parent_name)
+            for imported in entry['imports']:
+                if imported in graph.files or imported.partition('.')[0] in top_level_names:
+                    graph.add(module_name, imported)
+
+        if cache:
+            with open(cache, 'w') as cache_file:
+                json.dump(entries, cache_file, sort_keys=True)
+        return graph
+
+    def modules_for_files(self, filenames):
+        """The names of the project modules backed by the given files.
+
+        Files which no longer exist (deleted, or the old side of a rename) are
+        mapped to the module name their path would have had.
+        """
+        modules_by_file = dict((os.path.abspath(filename), module_name) for module_name, filename in self.files.items())
+        module_names = set()
+        for filename in filenames:
+            filename = os.path.abspath(filename)
+            if filename in modules_by_file:
+                module_names.add(modules_by_file[filename])
+            elif not os.path.exists(filename):
+                module_name = self.module_name_for_path(filename)
+                if module_name is not None:
+                    module_names.add(module_name)
+        return module_names
+
+    def module_name_for_path(self, filename):
+        """The name of the module a .py file under our root would be, or None."""
+        relative = os.path.relpath(filename, self.root)
+        if not relative.endswith('.py') or relative.startswith(os.pardir + os.sep):
+            return None
+        parts = relative[:-3].split(os.sep)
+        if parts[-1] == '__init__':
+            parts.pop()
+        return '.'.join(parts) or None
+
+    def affected_modules(self, changed_files):
+        """Every project module which is, or transitively imports, one of changed_files."""
+        return self.dependents(self.modules_for_files(changed_files))
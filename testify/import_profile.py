@@ -0,0 +1,114 @@
+"""Time the imports test discovery performs (--import-profile).
+
+While discovery runs, builtins.__import__ is wrapped so each module loaded
+gets its inclusive time (including the modules it imported in turn) and its
+exclusive time, and is attributed to the test module whose import loaded it.
+Imports of modules which are already loaded aren't recorded.
+"""
+from __future__ import absolute_import
+
+import builtins
+import importlib.util
+import json
+import sys
+import time
+
+
+def _is_submodule(name):
+    """Whether name can be imported, e.g. as a submodule named in a fromlist (rather than a dummy like '__trash')."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class ImportProfiler(object):
+
+    def __init__(self):
+        # module name -> dict(inclusive=seconds, exclusive=seconds, test_module=name)
+        self.imports = {}
+        # one [module name, time spent in recorded child imports] per import in progress
+        self._stack = []
+        self._original_import = None
+
+    def __enter__(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc_info):
+        builtins.__import__ = self._original_import
+        self._original_import = None
+
+    def profile(self, iterator):
+        """Pass through iterator, profiling imports only while it's producing items (e.g. a discovery generator)."""
+        iterator = iter(iterator)
+        while True:
+            with self:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _loads(self, name, globals, fromlist, level):
+        """The name of the module an __import__ call will load, or None if it's already loaded."""
+        if level:
+            package = (globals or {}).get('__package__') or (globals or {}).get('__name__', '')
+            try:
+                name = importlib.util.resolve_name('.' * level + name, package)
+            except (ImportError, ValueError):
+                return None
+        if name not in sys.modules:
+            return name
+        if fromlist and hasattr(sys.modules[name], '__path__'):
+            for item in fromlist:
+                submodule = '%s.%s' % (name, item)
+                if item != '*' and submodule not in sys.modules and not hasattr(sys.modules[name], item) and \
+                        _is_submodule(submodule):
+                    return submodule
+        return None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_name = self._loads(name, globals, fromlist, level)
+        if module_name is None:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append([module_name, 0.0])
+        start = time.time()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.time() - start
+            _, children = self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+            test_module = self._stack[0][0] if self._stack else module_name
+            self.imports.setdefault(module_name, dict(inclusive=elapsed, exclusive=elapsed - children, test_module=test_module))
+
+    def slowest(self, top, key='exclusive'):
+        """The top (module name, record) pairs by key."""
+        return sorted(self.imports.items(), key=lambda item: -item[1][key])[:top]
+
+    def by_test_module(self):
+        """Map each test module to the total time of the imports it triggered."""
+        totals = {}
+        for record in self.imports.values():
+            totals[record['test_module']] = totals.get(record['test_module'], 0.0) + record['exclusive']
+        return totals
+
+    def format_table(self, top):
+        lines = ['%10s %10s  %-50s %s' % ('inclusive', 'exclusive', 'module', 'imported by test module')]
+        for module_name, record in self.slowest(top):
+            lines.append('%9.3fs %9.3fs  %-50s %s' % (
+                record['inclusive'], record['exclusive'], module_name, record['test_module'],
+            ))
+        lines.append('')
+        lines.append('%10s  %s' % ('total', 'test module'))
+        for test_module, total in sorted(self.by_test_module().items(), key=lambda item: -item[1])[:top]:
+            lines.append('%9.3fs  %s' % (total, test_module))
+        return lines
+
+    def save(self, filename):
+        with open(filename, 'w') as profile_file:
+            json.dump(dict(imports=self.imports, test_modules=self.by_test_module()), profile_file, indent=2, sort_keys=True)
@@ -0,0 +1,117 @@
+"""Unload test modules once all their test cases have run (--unload-modules).
+
+Every test module discovery imports would otherwise stay in sys.modules for
+the whole run, along with its module-level data. Once a module's last test
+case has finished, it's removed from sys.modules and from its package. Its
+classes go with it, along with the _suites discovery attached to them and
+any unittest conversions cached for them. Then a collection runs and the
+memory reclaimed is recorded.
+
+Packages aren't unloaded, since discovery reads their _suites when importing
+their submodules. A module imported again later (e.g. because another test
+module imports a base class from it) runs again.
+"""
+from __future__ import absolute_import
+
+from collections import Counter
+from collections import deque
+import gc
+import mmap
+import sys
+
+from .test_case import TestifiedUnitTest
+
+
+def resident_memory():
+    """This process's resident set size in bytes, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (IOError, OSError):
+        return None
+
+
+def unload_module(module_name):
+    """Remove a module from sys.modules and from its package; return whether it was loaded."""
+    if sys.modules.pop(module_name, None) is None:
+        return False
+    parent_name, _, attr_name = module_name.rpartition('.')
+    parent = sys.modules.get(parent_name)
+    if parent is not None and hasattr(parent, attr_name):
+        delattr(parent, attr_name)
+    TestifiedUnitTest.forget_conversions(module_name)
+    return True
+
+
+class ModuleUnloader(object):
+
+    def __init__(self):
+        # (module name, bytes of resident memory reclaimed or None, objects collected), in unloading order
+        self.unloaded = []
+        self._current = None
+        # module name -> test cases still to start, when the run's classes are known up front
+        self._remaining = None
+        self._finished = []
+
+    def expect(self, test_case_classes):
+        """Pass through the (class, kwargs) pairs a run will construct its test cases from.
+
+        When they're a list (e.g. reordered with --order), each module is
+        unloaded after its last class, and classes already run are let go of.
+        Otherwise each module's classes are assumed to come together, as
+        discovery yields them.
+        """
+        if not isinstance(test_case_classes, list):
+            return test_case_classes
+        self._remaining = Counter(test_case_class.__module__ for test_case_class, _ in test_case_classes)
+        return self._consume(deque(test_case_classes))
+
+    def _consume(self, pending):
+        while pending:
+            yield pending.popleft()
+
+    def starting(self, test_case):
+        """Called as each test case is about to run, once the previous one is done with."""
+        module_name = type(test_case).__module__
+        if self._remaining is None:
+            if self._current not in (None, module_name):
+                self._finished.append(self._current)
+        else:
+            self._remaining[module_name] -= 1
+        self.unload_finished()
+
+        self._current = module_name
+        if self._remaining is not None and self._remaining[module_name] <= 0:
+            self._finished.append(module_name)
+
+    def finish(self):
+        """Called after the last test case has run."""
+        if self._remaining is None and self._current is not None:
+            self._finished.append(self._current)
+        self._current = None
+        self.unload_finished()
+
+    def unload_finished(self):
+        while self._finished:
+            module_name = self._finished.pop(0)
+            module = sys.modules.get(module_name)
+            if module is None or hasattr(module, '__path__'):
+                continue
+            del module
+
+            before = resident_memory()
+            unload_module(module_name)
+            collected = gc.collect()
+            after = resident_memory()
+            reclaimed = before - after if before is not None and after is not None else None
+            self.unloaded.append((module_name, reclaimed, collected))
+
+    def format_report(self):
+        lines = ['%12s %10s  %s' % ('reclaimed', 'objects', 'unloaded module')]
+        for module_name, reclaimed, collected in self.unloaded:
+            lines.append('%12s %10d  %s' % (
+                '%.1f MB' % (reclaimed / 1024.0 / 1024.0) if reclaimed is not None else '?',
+                collected,
+                module_name,
+            ))
+        return lines
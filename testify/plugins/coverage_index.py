@@ -0,0 +1,441 @@
+"""Record which lines each test method executes, and select tests from a diff.
+
+Run with --coverage-index FILE to write an inverted index of
+file -> line -> test names. Lines are recorded with sys.monitoring on Python
+3.12+ (each line reports once per test, then is disabled until the next one),
+and with sys.settrace elsewhere. Lines run between two tests of a test
+case, such as class_setup fixtures, are credited to every test of that test
+case. Lines run outside any test case, such as module bodies run on import,
+are recorded as global: changing one of them selects every test.
+
+To run only the tests covering the lines touched by a change:
+
+    git diff | python -m testify.plugins.coverage_index cov.json | testify --rerun-test-file -
+
+To put the tests which add no coverage into a suite which a fast tier can
+exclude, given the --json-results logs of a previous run for their durations:
+
+    python -m testify.plugins.coverage_index --minimize --timings results.json cov.json > redundant.suite
+    testify tests --suite-file redundant.suite --exclude-suite redundant
+"""
+from __future__ import print_function
+
+from collections import defaultdict
+import heapq
+import json
+import optparse
+import os
+import re
+import sys
+
+from testify import test_history
+from testify import test_reporter
+
+
+class SetTraceRecorder(object):
+    """Records executed (filename, line) pairs with sys.settrace."""
+
+    def __init__(self):
+        self.lines = set()
+
+    def _trace(self, frame, event, arg):
+        if event == 'line':
+            self.lines.add((frame.f_code.co_filename, frame.f_lineno))
+        return self._trace
+
+    def start(self):
+        sys.settrace(self._trace)
+
+    def harvest(self):
+        lines, self.lines = self.lines, set()
+        return lines
+
+    def stop(self):
+        sys.settrace(None)
+
+
+class MonitoringRecorder(object):
+    """Records executed (filename, line) pairs with sys.monitoring (Python 3.12+)."""
+
+    def __init__(self):
+        self.lines = set()
+        self.tool_id = None
+
+    def _line(self, code, line_number):
+        self.lines.add((code.co_filename, line_number))
+        # don't report this line again until restart_events()
+        return sys.monitoring.DISABLE
+
+    def start(self):
+        monitoring = sys.monitoring
+        for tool_id in (monitoring.COVERAGE_ID, 3, 4, 5):
+            try:
+                monitoring.use_tool_id(tool_id, 'testify')
+            except ValueError:
+                continue
+            self.tool_id = tool_id
+            break
+        else:
+            raise RuntimeError('No free sys.monitoring tool id for recording coverage')
+
+        monitoring.register_callback(self.tool_id, monitoring.events.LINE, self._line)
+        monitoring.set_events(self.tool_id, monitoring.events.LINE)
+
+    def harvest(self):
+        lines, self.lines = self.lines, set()
+        sys.monitoring.restart_events()
+        return lines
+
+    def stop(self):
+        monitoring = sys.monitoring
+        monitoring.set_events(self.tool_id, monitoring.events.NO_EVENTS)
+        monitoring.register_callback(self.tool_id, monitoring.events.LINE, None)
+        monitoring.free_tool_id(self.tool_id)
+
+
+def build_recorder():
+    if hasattr(sys, 'monitoring'):
+        return MonitoringRecorder()
+    return SetTraceRecorder()
+
+
+class CoverageIndex(object):
+    """Inverted index of file -> line -> the tests which executed it.
+
+    Files are stored relative to root; tests by their full name, as printed by
+    --list-tests.
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or os.getcwd())
+        self.tests = []
+        self._test_ids = {}
+        self.lines = defaultdict(lambda: defaultdict(set))
+        # file -> lines run outside any test case, which every test may depend on
+        self.global_lines = defaultdict(set)
+
+    def _relative(self, filename):
+        if filename.startswith('<'):
+            # <string>, <frozen ...> and other code without a source file
+            return None
+        filename = os.path.abspath(filename)
+        if not filename.startswith(self.root + os.sep):
+            return None
+        return os.path.relpath(filename, self.root)
+
+    def add(self, test_name, executed_lines):
+        test_id = self._test_ids.get(test_name)
+        if test_id is None:
+            test_id = self._test_ids[test_name] = len(self.tests)
+            self.tests.append(test_name)
+        for filename, line_number in executed_lines:
+            relative = self._relative(filename)
+            if relative is not None:
+                self.lines[relative][line_number].add(test_id)
+
+    def add_global(self, executed_lines):
+        for filename, line_number in executed_lines:
+            relative = self._relative(filename)
+            if relative is not None:
+                self.global_lines[relative].add(line_number)
+
+    def tests_covering(self, changed_lines):
+        """The names of the tests which executed any of the given (filename, line) pairs.
+
+        A change to a global line selects every test.
+        """
+        test_ids = set()
+        for filename, line_number in changed_lines:
+            if line_number in self.global_lines.get(filename, ()):
+                return sorted(self.tests)
+            test_ids |= self.lines.get(filename, {}).get(line_number, set())
+        return sorted(self.tests[test_id] for test_id in test_ids)
+
+    def lines_by_test(self):
+        """Map each test id to the set of (filename, line) pairs it executed."""
+        covered = dict((test_id, set()) for test_id in range(len(self.tests)))
+        for path, lines in self.lines.items():
+            for line_number, test_ids in lines.items():
+                for test_id in test_ids:
+                    covered[test_id].add((path, line_number))
+        return covered
+
+    def save(self, filename):
+        with open(filename, 'w') as index_file:
+            json.dump(dict(
+                tests=self.tests,
+                files=dict(
+                    (path, dict((str(line_number), sorted(test_ids)) for line_number, test_ids in lines.items()))
+                    for path, lines in self.lines.items()
+                ),
+                global_lines=dict((path, sorted(lines)) for path, lines in self.global_lines.items()),
+            ), index_file, sort_keys=True)
+
+    @classmethod
+    def load(cls, filename, root=None):
+        with open(filename) as index_file:
+            data = json.load(index_file)
+        index = cls(root)
+        for test_name in data['tests']:
+            index._test_ids[test_name] = len(index.tests)
+            index.tests.append(test_name)
+        for path, lines in data['files'].items():
+            for line_number, test_ids in lines.items():
+                index.lines[path][int(line_number)] = set(test_ids)
+        for path, lines in data.get('global_lines', {}).items():
+            index.global_lines[path] = set(lines)
+        return index
+
+
+HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+\d+(?:,\d+)? @@')
+
+
+def changed_lines_from_diff(diff_lines):
+    """Parse a unified diff into the (filename, line) pairs it touches in the *old* files.
+
+    The old side is what the index was recorded against. A removed line counts
+    itself; added lines count the lines on either side of where they were added.
+    """
+    changed = set()
+    filename = None
+    old_line = 0
+    for line in diff_lines:
+        if line.startswith('--- '):
+            path = line[4:].strip().split('\t')[0]
+            filename = None if path == '/dev/null' else re.sub(r'^a/', '', path)
+            continue
+        if line.startswith('+++ '):
+            continue
+        match = HUNK_RE.match(line)
+        if match:
+            old_line = int(match.group(1))
+            continue
+        if filename is None:
+            continue
+        if line.startswith('-'):
+            changed.add((filename, old_line))
+            old_line += 1
+        elif line.startswith('+'):
+            changed.add((filename, old_line - 1))
+            changed.add((filename, old_line))
+        elif line.startswith(' '):
+            old_line += 1
+    return changed
+
+
+# Tests which took no measurable time still cost something to run.
+MIN_TEST_COST = 0.001
+
+
+def test_durations(index, history):
+    """Map each test in the index to its mean run time in history.
+
+    Tests without a recorded time are assumed to take the median time.
+    """
+    durations = {}
+    for test_name in index.tests:
+        module_name, _, method_path = test_name.partition(' ')
+        class_name, _, method_name = method_path.partition('.')
+        duration = history.method_durations('%s.%s' % (module_name, class_name)).get(method_name)
+        if duration is not None:
+            durations[test_name] = duration
+
+    estimate = history.median_duration(durations.values(), default=1.0)
+    return dict((test_name, durations.get(test_name, estimate)) for test_name in index.tests)
+
+
+def minimize(index, durations, budget=None):
+    """Choose tests which together cover every indexed line, as cheaply as possible.
+
+    This is a weighted set cover, solved greedily: repeatedly keep the test
+    covering the most not-yet-covered lines per second of run time. Since a
+    test's gain can only shrink, stale heap entries are re-scored lazily.
+    With a budget (in seconds), tests which no longer fit are skipped.
+
+    Lines in the test modules themselves are ignored: every test is the only
+    one to run its own body, which would make them all look necessary. Global
+    lines are left out too, since every test covers them.
+
+    Returns (kept, redundant, uncovered): two lists of test names and the set
+    of (filename, line) pairs the kept tests don't cover.
+    """
+    test_files = set()
+    for test_name in index.tests:
+        module_path = test_name.partition(' ')[0].replace('.', os.sep)
+        test_files.update((module_path + '.py', os.path.join(module_path, '__init__.py')))
+    covered_by_test = dict(
+        (test_id, set(line for line in lines if line[0] not in test_files))
+        for test_id, lines in index.lines_by_test().items()
+    )
+    costs = dict(
+        (test_id, max(durations[test_name], MIN_TEST_COST))
+        for test_id, test_name in enumerate(index.tests)
+    )
+    uncovered = set()
+    for lines in covered_by_test.values():
+        uncovered |= lines
+
+    heap = [
+        (-len(lines) / costs[test_id], test_id)
+        for test_id, lines in covered_by_test.items()
+        if lines
+    ]
+    heapq.heapify(heap)
+    kept = []
+    spent = 0.0
+    while heap and uncovered:
+        _, test_id = heapq.heappop(heap)
+        gain = len(covered_by_test[test_id] & uncovered)
+        if not gain:
+            continue
+        score = -gain / costs[test_id]
+        if heap and score > heap[0][0]:
+            # another test may do better now; look at it first
+            heapq.heappush(heap, (score, test_id))
+            continue
+        if budget is not None and spent + costs[test_id] > budget:
+            continue
+        kept.append(test_id)
+        spent += costs[test_id]
+        uncovered -= covered_by_test[test_id]
+
+    kept_ids = set(kept)
+    return (
+        [index.tests[test_id] for test_id in kept],
+        [test_name for test_id, test_name in enumerate(index.tests) if test_id not in kept_ids],
+        uncovered,
+    )
+
+
+class CoverageIndexReporter(test_reporter.TestReporter):
+
+    def __init__(self, *args, **kwargs):
+        super(CoverageIndexReporter, self).__init__(*args, **kwargs)
+        self.index = CoverageIndex()
+        # lines run by the current test case outside its tests, and the tests it has run
+        self.case_lines = set()
+        self.case_tests = []
+        self.recorder = build_recorder()
+        self.recorder.start()
+
+    def test_case_start(self, result):
+        self.index.add_global(self.recorder.harvest())
+
+    def test_start(self, result):
+        self.case_lines |= self.recorder.harvest()
+
+    def test_complete(self, result):
+        self.index.add(result['method']['full_name'], self.recorder.harvest())
+        self.case_tests.append(result['method']['full_name'])
+
+    def test_case_complete(self, result):
+        self.case_lines |= self.recorder.harvest()
+        for test_name in self.case_tests:
+            self.index.add(test_name, self.case_lines)
+        self.case_lines = set()
+        self.case_tests = []
+
+    def report(self):
+        self.index.add_global(self.recorder.harvest())
+        self.recorder.stop()
+        self.index.save(self.options.coverage_index)
+        return True
+
+
+# Hooks for plugin system
+def add_command_line_options(parser):
+    parser.add_option(
+        "--coverage-index",
+        action="store",
+        dest="coverage_index",
+        type="string",
+        default=None,
+        metavar="FILE",
+        help="Record the lines executed by each test method into an index in FILE",
+    )
+
+
+def build_test_reporters(options):
+    if options.coverage_index:
+        return [CoverageIndexReporter(options)]
+    else:
+        return []
+
+
+def print_minimization(index, options):
+    history = test_history.TestHistory.from_files(options.timings)
+    durations = test_durations(index, history)
+    kept, redundant, uncovered = minimize(index, durations, budget=options.budget)
+
+    for test_name in redundant:
+        print('%s %s' % (test_name, options.suite))
+    print(
+        'Keeping %d tests (%.2fs); %d tests (%.2fs) are redundant; %d lines left uncovered.' % (
+            len(kept), sum(durations[test_name] for test_name in kept),
+            len(redundant), sum(durations[test_name] for test_name in redundant),
+            len(uncovered),
+        ),
+        file=sys.stderr,
+    )
+
+
+def main(args=None):
+    """Print the tests covering the lines changed by a diff, one per line, for --rerun-test-file.
+
+    With --minimize, print a --suite-file of the tests which are redundant instead.
+    """
+    parser = optparse.OptionParser(usage="%prog INDEX [DIFF]\n       %prog --minimize [--timings FILE] INDEX")
+    parser.add_option(
+        "--minimize",
+        action="store_true",
+        dest="minimize",
+        help="Print the tests which add no coverage, as a --suite-file",
+    )
+    parser.add_option(
+        "--timings",
+        action="append",
+        dest="timings",
+        type="string",
+        metavar="FILE",
+        default=[],
+        help="A --json-results log to read test durations from; may be given several times",
+    )
+    parser.add_option(
+        "--budget",
+        action="store",
+        dest="budget",
+        type="float",
+        metavar="SECONDS",
+        default=None,
+        help="With --minimize, keep only as many tests as fit in this many seconds",
+    )
+    parser.add_option(
+        "--suite",
+        action="store",
+        dest="suite",
+        type="string",
+        default="redundant",
+        help="With --minimize, the suite name to put redundant tests in (default: %default)",
+    )
+    options, args = parser.parse_args(args)
+    if options.minimize:
+        if len(args) != 1:
+            parser.error('expected a coverage index')
+        print_minimization(CoverageIndex.load(args[0]), options)
+        return
+    if len(args) not in (1, 2):
+        parser.error('expected a coverage index and optionally a diff file (default: stdin)')
+
+    index = CoverageIndex.load(args[0])
+    if len(args) == 2:
+        with open(args[1]) as diff_file:
+            changed = changed_lines_from_diff(diff_file)
+    else:
+        changed = changed_lines_from_diff(sys.stdin)
+
+    for test_name in index.tests_covering(changed):
+        print(test_name)
+
+
+if __name__ == '__main__':
+    main()
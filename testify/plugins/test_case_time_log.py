@@ -26,6 +26,8 @@ class TestCaseJSONReporter(test_reporter.TestReporter):
         # We also want to track log output
         self.log_hndl = None
         self._reset_logging()
+        # seconds the current TestCase has spent in class_setup and class_teardown fixtures
+        self.class_fixture_time = 0.0
 
     def _reset_logging(self):
         root = logging.getLogger('')
@@ -34,11 +36,20 @@ class TestCaseJSONReporter(test_reporter.TestReporter):
             root.removeHandler(self.log_hndl)
 
     def test_case_complete(self, result):
-        self.log_file.write(json.dumps(result))
+        # Class fixture timings let shard planners model the fixed cost of
+        # running a TestCase's methods on more than one machine.
+        self.log_file.write(json.dumps(dict(result, class_fixture_time=self.class_fixture_time)))
         self.log_file.write("\n")
+        self.class_fixture_time = 0.0
 
         self._reset_logging()
 
+    def class_setup_complete(self, result):
+        self.class_fixture_time += result['run_time'] or 0.0
+
+    def class_teardown_complete(self, result):
+        self.class_fixture_time += result['run_time'] or 0.0
+
     def report(self):
         self.log_file.write("RUN COMPLETE\n")
         self.log_file.close()
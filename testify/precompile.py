@@ -0,0 +1,67 @@
+"""Compile the project's bytecode in parallel before discovery imports it (--precompile).
+
+On a fresh checkout every import pays for compiling its module, one at a
+time. Compiling them all across a process pool first means discovery only
+loads cached bytecode. The .pyc files are checked against a hash of their
+source rather than its mtime, so they stay valid across checkouts, and files
+whose .pyc still matches their source aren't compiled again.
+"""
+from __future__ import absolute_import
+
+from concurrent.futures import ProcessPoolExecutor
+import compileall
+import importlib.util
+import os
+import py_compile
+
+from . import import_graph
+from . import test_discovery
+
+# the flags word of a .pyc header for bytecode checked against a hash of its source
+CHECKED_HASH_FLAGS = 0b11
+
+
+def source_files(test_path, root=None):
+    """The .py files of the project in root (default: the current directory) and of test_path's package."""
+    root = os.path.abspath(root or os.getcwd())
+    files = set(import_graph.project_modules(root).values())
+
+    spec = importlib.util.find_spec(test_discovery.to_module(test_path))
+    for location in (spec.submodule_search_locations or ()) if spec else ():
+        if os.path.abspath(location).startswith(root + os.sep):
+            continue
+        for dirpath, dirnames, filenames in os.walk(location):
+            dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith('.')]
+            files.update(os.path.join(dirpath, filename) for filename in filenames if filename.endswith('.py'))
+    return sorted(files)
+
+
+def up_to_date(filename):
+    """Whether filename's .pyc is checked against a hash of its source, and that hash still matches."""
+    try:
+        with open(filename, 'rb') as source_file:
+            source = source_file.read()
+        with open(importlib.util.cache_from_source(filename), 'rb') as pyc_file:
+            header = pyc_file.read(16)
+    except (IOError, OSError):
+        return False
+    return (
+        header[:4] == importlib.util.MAGIC_NUMBER and
+        int.from_bytes(header[4:8], 'little') == CHECKED_HASH_FLAGS and
+        header[8:16] == importlib.util.source_hash(source)
+    )
+
+
+def compile_file(filename):
+    """Compile filename unless its .pyc is up to date; return whether it compiled (or didn't need to)."""
+    if up_to_date(filename):
+        return True
+    return compileall.compile_file(filename, quiet=1, invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+
+
+def compile_tree(test_path, jobs=None, root=None):
+    """Compile source_files() across jobs processes (default: one per CPU); return the files which failed."""
+    files = source_files(test_path, root)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(compile_file, files, chunksize=16))
+    return [filename for filename, success in zip(files, results) if not success]
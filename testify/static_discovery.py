@@ -0,0 +1,316 @@
+"""Listing tests by parsing modules with ast instead of importing them (--static-discovery).
+
+Each module under the test path is parsed, and its TestCase subclasses are
+resolved through the imports of the project's own modules. Literal
+@suite(...) decorators and _suites / __test__ assignments are evaluated.
+The result is a DiscoveryIndex, so it's listed the same way as a cached one.
+
+A module which can't be understood statically is imported instead; see
+Unresolvable for what that covers.
+"""
+from __future__ import absolute_import
+
+import ast
+import builtins
+import importlib.util
+import os
+
+from . import discovery_index
+from . import import_graph
+from . import test_discovery
+
+
+TESTIFY_TEST_CASES = frozenset(['testify.TestCase', 'testify.test_case.TestCase'])
+UNITTEST_TEST_CASES = frozenset(['unittest.TestCase', 'unittest.case.TestCase'])
+SUITE_DECORATORS = frozenset(['testify.suite', 'testify.test_case.suite', 'testify.test_fixtures.suite'])
+# class attributes starting with "test" which can't be test methods
+LITERAL_NODES = (ast.Constant, ast.List, ast.Tuple, ast.Dict, ast.Set)
+
+
+class Unresolvable(Exception):
+    """A module needs importing to know its tests.
+
+    That's the case when it defines classes conditionally, computes _suites
+    or suite arguments, has a base class or class decorator from outside the
+    project, uses a metaclass, assigns test methods rather than defining them,
+    or defines an __init__ (which may generate test methods).
+    """
+
+
+def literal_strings(node):
+    value = ast.literal_eval(node)
+    if isinstance(value, str):
+        return set([value])
+    if not all(isinstance(item, str) for item in value):
+        raise ValueError(value)
+    return set(value)
+
+
+class ParsedModule(object):
+
+    def __init__(self, name, filename):
+        self.name = name
+        self.is_package = filename.endswith('__init__.py')
+        with open(filename, 'rb') as f:
+            self.tree = ast.parse(f.read(), filename)
+        package = name if self.is_package else name.rpartition('.')[0]
+
+        # local name -> dotted name it refers to, or None if it's reassigned to something unknown
+        self.symbols = {}
+        self.classes = {}
+        self.functions = set()
+        self.suites = set()
+        self.nested_classes = False
+        for statement in self.tree.body:
+            self._scan(statement, package)
+
+    def _scan(self, statement, package, top_level=True):
+        if isinstance(statement, ast.Import):
+            for alias in statement.names:
+                if alias.asname:
+                    self.symbols[alias.asname] = alias.name
+                else:
+                    top_name = alias.name.split('.')[0]
+                    self.symbols[top_name] = top_name
+        elif isinstance(statement, ast.ImportFrom):
+            base = statement.module
+            if statement.level:
+                try:
+                    base = importlib.util.resolve_name('.' * statement.level + (statement.module or ''), package)
+                except ValueError:
+                    return
+            for alias in statement.names:
+                if alias.name != '*':
+                    self.symbols[alias.asname or alias.name] = '%s.%s' % (base, alias.name)
+        elif isinstance(statement, ast.ClassDef):
+            if top_level:
+                self.classes[statement.name] = statement
+                self.symbols[statement.name] = '%s.%s' % (self.name, statement.name)
+            else:
+                self.nested_classes = True
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self.functions.add(statement.name)
+            self.symbols[statement.name] = '%s.%s' % (self.name, statement.name)
+        elif isinstance(statement, (ast.Assign, ast.AnnAssign)):
+            targets = statement.targets if isinstance(statement, ast.Assign) else [statement.target]
+            for target in targets:
+                if isinstance(target, ast.Name):
+                    self.symbols[target.id] = None
+                    if target.id == '_suites' and top_level:
+                        try:
+                            self.suites = literal_strings(statement.value)
+                        except ValueError:
+                            self.suites = None
+        elif isinstance(statement, (ast.If, ast.Try, ast.For, ast.While, ast.With)):
+            # e.g. try: import x / except ImportError: ...
+            for child in ast.iter_child_nodes(statement):
+                if isinstance(child, ast.stmt):
+                    self._scan(child, package, top_level=False)
+                elif isinstance(child, ast.ExceptHandler):
+                    for handler_statement in child.body:
+                        self._scan(handler_statement, package, top_level=False)
+
+
+class StaticDiscovery(object):
+    """Parses the modules of the project in root (default: the current directory)."""
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root or os.getcwd())
+        self.files = import_graph.project_modules(self.root)
+        self._parsed = {}
+        self._class_info = {}
+
+    def parse(self, module_name):
+        if module_name not in self._parsed:
+            if module_name not in self.files:
+                raise Unresolvable('%s is not part of the project' % module_name)
+            try:
+                self._parsed[module_name] = ParsedModule(module_name, self.files[module_name])
+            except SyntaxError as e:
+                raise Unresolvable(str(e))
+        return self._parsed[module_name]
+
+    def dotted_name(self, module, node):
+        """The dotted name an expression like Name or package.module.Name refers to in module."""
+        if isinstance(node, ast.Name):
+            return module.symbols.get(node.id)
+        if isinstance(node, ast.Attribute):
+            base = self.dotted_name(module, node.value)
+            return base and '%s.%s' % (base, node.attr)
+        return None
+
+    def canonical(self, dotted_name, seen=()):
+        """Follow re-exports until dotted_name is a class defined in a project module, or outside the project."""
+        if dotted_name in TESTIFY_TEST_CASES or dotted_name in UNITTEST_TEST_CASES or dotted_name in SUITE_DECORATORS:
+            return dotted_name
+        module_name, _, attribute = dotted_name.rpartition('.')
+        if module_name not in self.files or dotted_name in seen:
+            return dotted_name
+        module = self.parse(module_name)
+        if attribute in module.classes or attribute in module.functions:
+            return dotted_name
+        target = module.symbols.get(attribute)
+        if target is None:
+            if attribute not in module.symbols and '%s.%s' % (module_name, attribute) in self.files:
+                return dotted_name  # a submodule
+            raise Unresolvable('Cannot resolve %s' % dotted_name)
+        return self.canonical(target, seen + (dotted_name,))
+
+    def suites_of_decorator(self, module, decorator):
+        """The suites a decorator adds, or None if it isn't @suite."""
+        if not isinstance(decorator, ast.Call):
+            return None
+        name = self.dotted_name(module, decorator.func)
+        if name is None or self.canonical(name) not in SUITE_DECORATORS:
+            return None
+        try:
+            suites = set()
+            for arg in decorator.args:
+                suites |= literal_strings(arg)
+            for keyword in decorator.keywords:
+                if keyword.arg == 'conditions':
+                    conditions = ast.literal_eval(keyword.value)
+                    if conditions is not None and not conditions:
+                        return set()
+        except ValueError:
+            raise Unresolvable('Non-literal @suite() in %s' % module.name)
+        return suites
+
+    def class_info(self, dotted_name):
+        """Return (kind, suites, methods, has_init) for a project class.
+
+        kind is 'testify', 'unittest' or None (not a TestCase); methods maps
+        test method names to their own suites.
+        """
+        if dotted_name not in self._class_info:
+            module_name, _, class_name = dotted_name.rpartition('.')
+            module = self.parse(module_name)
+            self._class_info[dotted_name] = self._build_class_info(module, module.classes[class_name])
+        return self._class_info[dotted_name]
+
+    def _build_class_info(self, module, class_def):
+        if class_def.keywords:
+            raise Unresolvable('%s.%s has a metaclass' % (module.name, class_def.name))
+
+        kind = None
+        suites = set()
+        methods = {}
+        has_init = False
+        for base in reversed(class_def.bases):
+            if isinstance(base, ast.Name) and base.id not in module.symbols and hasattr(builtins, base.id):
+                continue  # object, Exception...
+            name = self.dotted_name(module, base)
+            if name is None:
+                raise Unresolvable('Unknown base class of %s.%s' % (module.name, class_def.name))
+            name = self.canonical(name)
+            if name in TESTIFY_TEST_CASES:
+                kind = kind or 'testify'
+            elif name in UNITTEST_TEST_CASES:
+                kind = kind or 'unittest'
+            elif name.rpartition('.')[0] in self.files:
+                base_kind, base_suites, base_methods, base_init = self.class_info(name)
+                kind = kind or base_kind
+                suites |= base_suites
+                methods.update(base_methods)
+                has_init = has_init or base_init
+            else:
+                raise Unresolvable('%s.%s has a base class from outside the project' % (module.name, class_def.name))
+
+        for decorator in class_def.decorator_list:
+            decorator_suites = self.suites_of_decorator(module, decorator)
+            if decorator_suites is None:
+                raise Unresolvable('%s.%s has a class decorator' % (module.name, class_def.name))
+            suites |= decorator_suites
+
+        for statement in class_def.body:
+            if isinstance(statement, ast.FunctionDef):
+                if statement.name == '__init__':
+                    has_init = True
+                elif statement.name.startswith('test'):
+                    method_suites = set()
+                    for decorator in statement.decorator_list:
+                        method_suites |= self.suites_of_decorator(module, decorator) or set()
+                    methods[statement.name] = method_suites
+                else:
+                    methods.pop(statement.name, None)
+            elif isinstance(statement, ast.Assign):
+                for target in statement.targets:
+                    if not isinstance(target, ast.Name):
+                        continue
+                    if target.id.startswith('test'):
+                        if not isinstance(statement.value, LITERAL_NODES):
+                            raise Unresolvable('%s.%s assigns a test method' % (module.name, class_def.name))
+                        methods.pop(target.id, None)
+                    if target.id == '_suites':
+                        try:
+                            suites |= literal_strings(statement.value)
+                        except ValueError:
+                            raise Unresolvable('Non-literal _suites in %s.%s' % (module.name, class_def.name))
+        return kind, suites, methods, has_init
+
+    def module_suites(self, module_name):
+        """A module's _suites plus those of its parent packages, as test_discovery applies them."""
+        module = self.parse(module_name)
+        if module.suites is None:
+            raise Unresolvable('Non-literal _suites in %s' % module_name)
+        parent_name = module_name.rpartition('.')[0]
+        if parent_name in self.files:
+            return module.suites | self.module_suites(parent_name)
+        return set(module.suites)
+
+    def module_entry(self, module_name):
+        """A DiscoveryIndex entry for module_name, built without importing it."""
+        module = self.parse(module_name)
+        if module.nested_classes:
+            raise Unresolvable('%s defines classes conditionally' % module_name)
+        module_suites = self.module_suites(module_name)
+
+        classes = {}
+        for class_name, class_def in module.classes.items():
+            kind, suites, methods, has_init = self.class_info('%s.%s' % (module_name, class_name))
+            if kind is None:
+                continue
+            is_test = True
+            for statement in class_def.body:
+                if isinstance(statement, ast.Assign) and any(
+                    isinstance(target, ast.Name) and target.id == '__test__' for target in statement.targets
+                ):
+                    try:
+                        is_test = bool(ast.literal_eval(statement.value))
+                    except ValueError:
+                        raise Unresolvable('Non-literal __test__ in %s.%s' % (module_name, class_name))
+            if not is_test:
+                classes[class_name] = dict(test=False)
+                continue
+            if has_init:
+                raise Unresolvable('%s.%s defines __init__' % (module_name, class_name))
+            if kind == 'unittest':
+                class_name = 'Testified' + class_name
+            classes[class_name] = dict(
+                test=True,
+                suites=sorted(suites | module_suites),
+                methods=dict((method_name, sorted(method_suites)) for method_name, method_suites in methods.items()),
+            )
+
+        mtime, size, sha1 = discovery_index.file_key(self.files[module_name])
+        return dict(
+            file=self.files[module_name],
+            mtime=mtime,
+            size=size,
+            sha1=sha1,
+            suites=sorted(module_suites),
+            classes=classes,
+        )
+
+    def index(self, test_path, module_filter=test_discovery.ALL_MODULES):
+        """Return a DiscoveryIndex of test_path, and the names of the modules which had to be imported."""
+        modules = {}
+        imported = []
+        for module_name in test_discovery.module_names(test_path, module_filter):
+            try:
+                modules[module_name] = self.module_entry(module_name)
+            except Unresolvable:
+                imported.append(module_name)
+                test_case_classes = list(test_discovery.discover(module_name, recursive=False))
+                modules[module_name] = discovery_index.module_entry(module_name, test_case_classes)
+        return discovery_index.DiscoveryIndex(test_path, modules, module_filter), imported
@@ -0,0 +1,151 @@
+"""Boolean expressions over suite names, evaluated against integer bitmasks (--suites).
+
+Every suite name is given a bit the first time it's seen, so a set of suites
+can be represented as an int and tested with a couple of integer operations.
+MetaTestCase precomputes the mask of each test method when its class is
+created.
+
+Expressions combine suite names with ``and``, ``or``, ``not`` and parentheses,
+e.g. ``(db or cache) and not slow``.
+"""
+from __future__ import absolute_import
+
+import re
+
+
+_suite_bits = {}
+
+
+def suite_bit(suite_name):
+    """The bit representing suite_name, allocating one if it's new."""
+    bit = _suite_bits.get(suite_name)
+    if bit is None:
+        bit = _suite_bits[suite_name] = 1 << len(_suite_bits)
+    return bit
+
+
+def suites_mask(suites):
+    """The bitmask of an iterable of suite names."""
+    mask = 0
+    for suite_name in suites:
+        mask |= suite_bit(suite_name)
+    return mask
+
+
+def suites_filter(suites_exclude=(), suites_require=(), suites_expression=None):
+    """Return a function of a method's suite mask: whether the method should run.
+
+    A method runs unless it's in any of suites_exclude, if it's in all of
+    suites_require, and if it matches suites_expression (a SuiteExpression).
+    """
+    exclude_mask = suites_mask(suites_exclude)
+    require_mask = suites_mask(suites_require)
+
+    def runnable(mask):
+        if mask & exclude_mask or mask & require_mask != require_mask:
+            return False
+        return suites_expression is None or suites_expression.matches(mask)
+    return runnable
+
+
+TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|([^\s()]+))')
+OPERATORS = frozenset(['and', 'or', 'not'])
+
+
+def _tokenize(expression):
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_RE.match(expression, position)
+        if not match:
+            raise ValueError('Invalid suite expression: %r' % expression)
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class SuiteExpression(object):
+    """A compiled suite expression; call matches() with a method's suite mask.
+
+    Suite names joined by ``and`` (or by ``or``) are folded into a single mask,
+    so ``a and b and c`` is one comparison rather than three.
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self._tokens = _tokenize(expression)
+        self._position = 0
+        tree = self._parse_or()
+        if self._position != len(self._tokens):
+            raise ValueError('Unexpected %r in suite expression: %r' % (self._tokens[self._position], expression))
+        del self._tokens
+        self.matches = _compile(tree)
+
+    def _peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _take(self):
+        token = self._peek()
+        if token is None:
+            raise ValueError('Unexpected end of suite expression: %r' % self.expression)
+        self._position += 1
+        return token
+
+    def _parse_or(self):
+        operands = [self._parse_and()]
+        while self._peek() == 'or':
+            self._take()
+            operands.append(self._parse_and())
+        return operands[0] if len(operands) == 1 else ('or', operands)
+
+    def _parse_and(self):
+        operands = [self._parse_not()]
+        while self._peek() == 'and':
+            self._take()
+            operands.append(self._parse_not())
+        return operands[0] if len(operands) == 1 else ('and', operands)
+
+    def _parse_not(self):
+        if self._peek() == 'not':
+            self._take()
+            return ('not', self._parse_not())
+        return self._parse_atom()
+
+    def _parse_atom(self):
+        token = self._take()
+        if token == '(':
+            tree = self._parse_or()
+            if self._take() != ')':
+                raise ValueError('Unbalanced parentheses in suite expression: %r' % self.expression)
+            return tree
+        if token == ')' or token in OPERATORS:
+            raise ValueError('Unexpected %r in suite expression: %r' % (token, self.expression))
+        return ('suite', suite_bit(token))
+
+
+def _compile(tree):
+    """Turn a parsed expression into a function of a suite mask."""
+    kind, value = tree
+    if kind == 'suite':
+        return lambda mask: bool(mask & value)
+    if kind == 'not':
+        operand = _compile(value)
+        return lambda mask: not operand(mask)
+
+    bits = 0
+    others = []
+    for operand in value:
+        if operand[0] == 'suite':
+            bits |= operand[1]
+        else:
+            others.append(_compile(operand))
+    if kind == 'and':
+        if not others:
+            return lambda mask: mask & bits == bits
+        return lambda mask: mask & bits == bits and all(operand(mask) for operand in others)
+    if not others:
+        return lambda mask: bool(mask & bits)
+    return lambda mask: bool(mask & bits) or any(operand(mask) for operand in others)
@@ -0,0 +1,170 @@
+"""Find the tests which make another test fail when they run before it (--bisect-pollution).
+
+Given a --json-results log of a run in which the target test failed, the tests
+which ran before it are narrowed down with delta debugging: the candidates are
+split into chunks, each chunk is rerun (with --rerun-test-file) in front of
+the target in its own process, and the search continues into whichever chunk
+(or complement of a chunk) still makes the target fail. Chunks are run in parallel, and the number of
+chunks starts at the number of parallel jobs.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from . import exit
+from .test_history import iter_results
+from .test_history import iter_run_results
+
+
+def tests_before(log_filename, target):
+    """The full names of the test methods which ran before target, in order, in the latest run where it failed.
+
+    Raises ValueError if target didn't fail in the log.
+    """
+    tests, failing_run_tests = [], None
+    current_run = None
+    for run, result in iter_run_results(log_filename):
+        if run != current_run:
+            tests, current_run = [], run
+        method = result['method']
+        if method.get('fixture_type') or method['name'] == 'run':
+            continue
+        if method.get('full_name') == target:
+            if result.get('success') is False:
+                failing_run_tests = list(tests)
+            continue
+        tests.append(method['full_name'])
+    if failing_run_tests is None:
+        raise ValueError('%s did not fail in %s' % (target, log_filename))
+    return failing_run_tests
+
+
+def split(tests, chunk_count):
+    """Split tests into chunk_count contiguous chunks of (nearly) equal size."""
+    chunk_count = min(chunk_count, len(tests))
+    return [
+        tests[len(tests) * i // chunk_count:len(tests) * (i + 1) // chunk_count]
+        for i in range(chunk_count)
+    ]
+
+
+class PollutionBisector(object):
+    """Searches the tests which ran before target for a minimal set which makes it fail.
+
+    command is the testify command line to run each candidate list with;
+    --rerun-test-file and --json-results are appended to it.
+    """
+
+    def __init__(self, target, candidates, jobs=None, command=None):
+        self.target = target
+        self.candidates = list(candidates)
+        self.jobs = max(jobs or os.cpu_count() or 1, 1)
+        self.command = command or [sys.executable, '-m', 'testify.test_program']
+        self.runs = 0
+        self._outcomes = {}
+
+    def _target_fails(self, tests):
+        workdir = tempfile.mkdtemp(prefix='testify-bisect-')
+        try:
+            rerun_file = os.path.join(workdir, 'tests')
+            results_file = os.path.join(workdir, 'results.json')
+            with open(rerun_file, 'w') as f:
+                for test in list(tests) + [self.target]:
+                    print(test, file=f)
+
+            with open(os.devnull, 'w') as devnull:
+                subprocess.call(
+                    self.command + ['--rerun-test-file', rerun_file, '--json-results', results_file],
+                    stdout=devnull,
+                    stderr=devnull,
+                )
+
+            if not os.path.exists(results_file):
+                raise RuntimeError('testify did not run: %s' % ' '.join(self.command))
+            for result in iter_results(results_file):
+                if result['method'].get('full_name') == self.target and not result['method'].get('fixture_type'):
+                    return not result['success']
+            # the target never got to run, e.g. a module failed to import
+            raise RuntimeError('%s did not run' % self.target)
+        finally:
+            shutil.rmtree(workdir)
+
+    def target_fails(self, test_lists):
+        """Run the target after each list of tests, in parallel; return whether it failed each time."""
+        pending = [tests for tests in set(map(tuple, test_lists)) if tests not in self._outcomes]
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                for tests, failed in zip(pending, executor.map(self._target_fails, pending)):
+                    self._outcomes[tests] = failed
+            self.runs += len(pending)
+        return [self._outcomes[tuple(tests)] for tests in test_lists]
+
+    def bisect(self):
+        """Return a minimal list of culprits, or None if the failure doesn't reproduce.
+
+        An empty list means the target fails on its own.
+        """
+        alone, everything = self.target_fails([[], self.candidates])
+        if alone:
+            return []
+        if not everything:
+            return None
+
+        culprits = self.candidates
+        chunk_count = max(min(self.jobs, len(culprits)), 2)
+        while len(culprits) > 1:
+            chunks = split(culprits, chunk_count)
+            # with two chunks, each one is the other's complement
+            complements = [
+                [test for other in chunks if other is not chunk for test in other]
+                for chunk in chunks
+            ] if len(chunks) > 2 else []
+
+            outcomes = self.target_fails(chunks + complements)
+            failing = [
+                (position, tests)
+                for position, (tests, failed) in enumerate(zip(chunks + complements, outcomes))
+                if failed
+            ]
+            if failing and failing[0][0] < len(chunks):
+                culprits = failing[0][1]
+                chunk_count = max(min(self.jobs, len(culprits)), 2)
+            elif failing:
+                culprits = failing[0][1]
+                chunk_count = max(chunk_count - 1, 2)
+            elif chunk_count >= len(culprits):
+                break
+            else:
+                chunk_count = min(chunk_count * 2, len(culprits))
+        return culprits
+
+
+def bisect_pollution(target, log_filename, jobs=None, command=None):
+    """Print the tests which make target fail when run before it; return an exit code."""
+    try:
+        candidates = tests_before(log_filename, target)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return exit.DISCOVERY_FAILED
+
+    bisector = PollutionBisector(target, candidates, jobs=jobs, command=command)
+    culprits = bisector.bisect()
+    if culprits is None:
+        print('%s passed after the %d tests which ran before it; nothing to bisect.' % (
+            target, len(candidates)), file=sys.stderr)
+        return exit.TESTS_FAILED
+    elif not culprits:
+        print('%s fails when run on its own.' % target, file=sys.stderr)
+        return exit.TESTS_FAILED
+
+    for test in culprits:
+        print(test)
+    print('%d of %d tests make %s fail (%d runs).' % (
+        len(culprits), len(candidates), target, bisector.runs), file=sys.stderr)
+    return exit.OK
@@ -20,6 +20,8 @@ from __future__ import absolute_import
 from collections import defaultdict
 import functools
 import inspect
+import logging
+import time
 import types
 import unittest
 
@@ -31,6 +33,8 @@ from testify.utils import class_logger
 from testify.test_fixtures import DEPRECATED_FIXTURE_TYPE_MAP
 from testify.test_fixtures import TestFixtures
 from testify.test_fixtures import suite
+from .suite_expression import suites_filter
+from .suite_expression import suites_mask
 from .test_result import TestResult
 from . import deprecated_assertions
 
@@ -38,6 +42,8 @@ from . import deprecated_assertions
 __author__ = "Oliver Nicholas <bigo@yelp.com>"
 __testify = 1
 
+log = logging.getLogger('testify')
+
 
 class MetaTestCase(type):
     """This base metaclass is used to collect each TestCase's decorated fixture methods at
@@ -48,10 +54,16 @@ class MetaTestCase(type):
 
     def __new__(mcls, name, bases, dct):
         # This is the constructor for all TestCase *classes*.
+        # Precompute each test method's suite mask: method name -> (its _suites, their mask).
+        suite_masks = {}
+        for base in reversed(bases):
+            suite_masks.update(getattr(base, '_suite_masks', {}))
         for member_name, member in dct.items():
             if member_name.startswith('test') and isinstance(member, types.FunctionType):
                 if not hasattr(member, '_suites'):
                     member._suites = set()
+                suite_masks[member_name] = (member._suites, suites_mask(member._suites))
+        dct['_suite_masks'] = suite_masks
 
         # Unfortunately, this implementation detail has become a public interface.
         # The set of suites must include the suites from all bases classes.
@@ -64,6 +76,60 @@ class MetaTestCase(type):
 
         return super(MetaTestCase, mcls).__new__(mcls, name, bases, dct)
 
+    def _test_method_table(cls):
+        """Map the name of each test method of this class to its function.
+
+        This is read from the class alone, without instantiating it, and is
+        cached on the class. Test methods generated in __init__ aren't included.
+        """
+        table = cls.__dict__.get('_test_method_table_cache')
+        if table is None:
+            table = {}
+            for member_name in dir(cls):
+                if member_name.startswith('test'):
+                    member = getattr(cls, member_name)
+                    if inspect.isfunction(member):
+                        table[member.__name__] = member
+            cls._test_method_table_cache = table
+        return table
+
+    def _function_suites_mask(cls, function):
+        """The suite mask of a test method's own suites, as precomputed in __new__ where possible."""
+        function_suites = getattr(function, '_suites', set())
+        cached = cls._suite_masks.get(function.__name__)
+        if cached is not None and cached[0] is function_suites:
+            return cached[1]
+        # generated in __init__, or given suites since its class was created
+        return suites_mask(function_suites)
+
+    def _has_runnable_methods(cls, runnable, method_suites=None, name_overrides=None):
+        """Whether an instance would have any runnable test methods, judged from the class alone.
+
+        runnable is a suite_expression.suites_filter; method_suites and
+        name_overrides are as for TestCase.__init__. Classes with their own
+        __init__ may generate test methods there, so they're assumed runnable.
+        """
+        if cls.__init__ is not TestCase.__init__:
+            return True
+        return any(True for _ in cls._runnable_method_names(runnable, method_suites, name_overrides))
+
+    def _runnable_method_names(cls, runnable, method_suites=None, name_overrides=None):
+        """Yield the names of the test methods an instance would run, judged from the class alone.
+
+        Arguments are as for _has_runnable_methods; test methods generated in
+        __init__ aren't included.
+        """
+        method_suites = method_suites or {}
+        class_mask = suites_mask(getattr(cls, '_suites', ()))
+        for method_name, function in cls._test_method_table().items():
+            if name_overrides is not None and method_name not in name_overrides:
+                continue
+            mask = cls._function_suites_mask(function) | class_mask
+            if method_name in method_suites:
+                mask |= suites_mask(method_suites[method_name])
+            if runnable(mask):
+                yield method_name
+
     @staticmethod
     def _cmp_str(instance):
         """Return a canonical representation of a TestCase for sorting and hashing."""
@@ -133,7 +199,10 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
 
         self.__suites_exclude = kwargs.get('suites_exclude', set())
         self.__suites_require = kwargs.get('suites_require', set())
+        self.__suites_expression = kwargs.get('suites_expression', None)
         self.__name_overrides = kwargs.get('name_overrides', None)
+        # method name -> extra suites, e.g. from a --suite-file
+        self.__method_suites = kwargs.get('method_suites', {})
 
         TestResult.debug = kwargs.get('debugger')  # sorry :(
 
@@ -168,6 +237,8 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
         any of our exclude_suites.  If there are any require_suites, it will then further
         limit itself to test methods in those suites.
         """
+        class_mask = suites_mask(getattr(self, '_suites', ()))
+        runnable = suites_filter(self.__suites_exclude, self.__suites_require, self.__suites_expression)
         for member_name in dir(self):
             if not member_name.startswith("test"):
                 continue
@@ -175,13 +246,8 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
             if not inspect.ismethod(member):
                 continue
 
-            member_suites = self.suites(member)
-
-            # if there are any exclude suites, exclude methods under them
-            if self.__suites_exclude and self.__suites_exclude & member_suites:
-                continue
-            # if there are any require suites, only run methods in *all* of those suites
-            if self.__suites_require and not ((self.__suites_require & member_suites) == self.__suites_require):
+            # skip methods in any exclude suite, missing a require suite, or not matching --suites
+            if not runnable(self.suites_mask(member) | class_mask):
                 continue
 
             # if there are any name overrides, only run the named methods
@@ -234,8 +300,16 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
         suites = set(getattr(self, '_suites', []))
         if method is not None:
             suites |= getattr(method, '_suites', set())
+            suites |= self.__method_suites.get(method.__name__, set())
         return suites
 
+    def suites_mask(self, method):
+        """The bitmask (see testify.suite_expression) of the given method's own suites."""
+        mask = type(self)._function_suites_mask(method)
+        if method.__name__ in self.__method_suites:
+            mask |= suites_mask(self.__method_suites[method.__name__])
+        return mask
+
     def results(self):
         """Available after calling `self.run()`."""
         if self._stage != self.STAGE_CLASS_TEARDOWN:
@@ -249,6 +323,7 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
         suite if none.
         """
         method_suites = set(getattr(method, '_suites', set()))
+        method_suites |= self.__method_suites.get(method.__name__, set())
         return (self.__suites_exclude & method_suites)
 
     def __run_test_methods(self, class_fixture_failures):
@@ -376,6 +451,11 @@ class TestCase(six.with_metaclass(MetaTestCase, object)):
 
 class TestifiedUnitTest(TestCase, unittest.TestCase):
 
+    # (original class, module suites) -> converted class, for every conversion so far
+    conversion_cache = {}
+    # counters for from_unittest_case(): classes built, classes reused from the cache, and total seconds spent
+    conversion_stats = dict(built=0, reused=0, seconds=0.0)
+
     @classmethod
     def from_unittest_case(cls, unittest_class, module_suites=None):
         """"Constructs a new testify.TestCase from a unittest.TestCase class.
@@ -385,13 +465,37 @@ class TestifiedUnitTest(TestCase, unittest.TestCase):
 
         If 'suites' are provided, they are treated as module-level suites to be
         applied in addition to class- and test-level suites.
+
+        Conversions are cached by (class, module suites), so a base class
+        shared by many TestCases is converted once, and converting a class
+        again returns the same TestCase.
         """
+        start = time.time()
+        stats = dict(built=0, reused=0)
+        converted = cls._convert_unittest_case(unittest_class, frozenset(module_suites or ()), stats)
+        elapsed = time.time() - start
+
+        cls.conversion_stats['built'] += stats['built']
+        cls.conversion_stats['reused'] += stats['reused']
+        cls.conversion_stats['seconds'] += elapsed
+        log.debug(
+            'Converted %s.%s in %.4fs (%d classes built, %d reused)',
+            unittest_class.__module__, unittest_class.__name__, elapsed, stats['built'], stats['reused'],
+        )
+        return converted
 
+    @classmethod
+    def _convert_unittest_case(cls, unittest_class, module_suites, stats):
         # our base case: once we get to the parent TestCase, replace it with our
         # own parent class that will just handle inheritance for super()
         if unittest_class == unittest.TestCase:
             return TestifiedUnitTest
 
+        key = (unittest_class, module_suites)
+        if key in cls.conversion_cache:
+            stats['reused'] += 1
+            return cls.conversion_cache[key]
+
         # we're going to update our class dict with some testify defaults to
         # make things Just Work
         unittest_dict = dict(unittest_class.__dict__)
@@ -411,14 +515,14 @@ class TestifiedUnitTest(TestCase, unittest.TestCase):
 
         # add module-level suites in addition to any suites already on the class
         class_suites = set(getattr(unittest_class, '_suites', []))
-        unittest_dict['_suites'] = class_suites | set(module_suites or [])
+        unittest_dict['_suites'] = class_suites | set(module_suites)
 
         # traverse our class hierarchy and 'testify' parent unittest.TestCases
         bases = []
 
         for base_class in unittest_class.__bases__:
             if issubclass(base_class, unittest.TestCase):
-                base_class = cls.from_unittest_case(base_class, module_suites=module_suites)
+                base_class = cls._convert_unittest_case(base_class, module_suites, stats)
             bases.append(base_class)
 
         # include our original unittest class so existing super() calls still
@@ -428,7 +532,16 @@ class TestifiedUnitTest(TestCase, unittest.TestCase):
 
         new_name = 'Testified' + unittest_class.__name__
 
-        return MetaTestCase(new_name, tuple(bases), unittest_dict)
+        converted = MetaTestCase(new_name, tuple(bases), unittest_dict)
+        cls.conversion_cache[key] = converted
+        stats['built'] += 1
+        return converted
+
+    @classmethod
+    def forget_conversions(cls, module_name):
+        """Drop the cached conversions of a module's classes, e.g. when it's unloaded."""
+        for key in [key for key in cls.conversion_cache if key[0].__module__ == module_name]:
+            del cls.conversion_cache[key]
 
 
 # vim: set ts=4 sts=4 sw=4 et:
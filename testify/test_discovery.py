@@ -13,14 +13,21 @@
 # limitations under the License.
 
 
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+import importlib.util
 import inspect
+import json
 import os
 import pkgutil
+import subprocess
 import sys
+import tempfile
 import traceback
 import unittest
 from .test_case import MetaTestCase, TestifiedUnitTest
 from .exceptions import DiscoveryError
+from .exceptions import DiscoveryErrors
 
 
 def to_module(path):
@@ -67,7 +74,53 @@ def get_test_classes_from_module(mod):
             )
 
 
-def discover(what):
+class ModuleFilter(object):
+    """Which of a package's submodules discovery imports.
+
+    patterns are matched against a module's file name (e.g. '*_test.py');
+    packages are always walked. exclude is matched against dotted module and
+    package names, and skips everything beneath a matching package.
+    """
+
+    def __init__(self, patterns=(), exclude=()):
+        self.patterns = sorted(patterns)
+        self.exclude = sorted(exclude)
+
+    def includes(self, module_name, is_package):
+        if any(fnmatch.fnmatchcase(module_name, pattern) for pattern in self.exclude):
+            return False
+        if is_package or not self.patterns:
+            return True
+        file_name = module_name.rpartition('.')[2] + '.py'
+        return any(fnmatch.fnmatchcase(file_name, pattern) for pattern in self.patterns)
+
+    def to_json(self):
+        return dict(patterns=self.patterns, exclude=self.exclude)
+
+
+ALL_MODULES = ModuleFilter()
+
+
+def walk_modules(package, module_filter=ALL_MODULES):
+    """Yield the names of a package's submodules, depth first like pkgutil.walk_packages.
+
+    Modules module_filter excludes are skipped without being imported. The
+    caller must import each subpackage yielded before the walk continues.
+    """
+    for _, module_name, is_package in pkgutil.iter_modules(package.__path__, package.__name__ + '.'):
+        if not module_filter.includes(module_name, is_package):
+            continue
+        yield module_name
+        if is_package and module_name in sys.modules:
+            for name in walk_modules(sys.modules[module_name], module_filter):
+                yield name
+
+
+def format_discovery_error(tb):
+    return DiscoveryError(('\n    ' + tb.replace('\n', '\n    ')).rstrip())
+
+
+def discover(what, recursive=True, module_filter=ALL_MODULES, keep_going=False):
     """Given a string module path, drill into it for its TestCases.
 
     This will descend recursively into packages and lists, so the following are valid:
@@ -75,22 +128,34 @@ def discover(what):
         - add_test_module('tests.biz_cmds.biz_ad_test.tests')
         - add_test_module('tests.biz_cmds')
         - add_test_module('tests')
+
+    With recursive=False, only the TestCases defined in a package's own
+    __init__ are returned, and its submodules aren't imported. Otherwise only
+    the submodules module_filter includes are.
+
+    With keep_going, a package's submodules which fail to import are skipped,
+    and a DiscoveryErrors listing them all is raised once the walk is done.
     """
+    errors = []
     try:
         what = to_module(what)
         mod = __import__(what, fromlist=[str('__trash')])
         for cls in get_test_classes_from_module(mod):
             yield cls
 
-        if not hasattr(mod, '__path__'):
+        if not recursive or not hasattr(mod, '__path__'):
             return
 
         # It's a package!
-        for _, module_name, _ in pkgutil.walk_packages(
-            mod.__path__,
-            prefix=mod.__name__ + '.',
-        ):
-            submod = __import__(module_name, fromlist=[str('__trash')])
+        for module_name in walk_modules(mod, module_filter):
+            try:
+                submod = __import__(module_name, fromlist=[str('__trash')])
+            except Exception:
+                if not keep_going:
+                    raise
+                traceback.print_exc()
+                errors.append(format_discovery_error('While importing %s:\n%s' % (module_name, traceback.format_exc())))
+                continue
             for cls in get_test_classes_from_module(submod):
                 yield cls
     except GeneratorExit:
@@ -98,12 +163,105 @@ def discover(what):
     except BaseException:
         # print the traceback to stderr, or else we can't see errors during --list-tests > testlist
         traceback.print_exc()
-        raise DiscoveryError(
-            (
-                '\n    ' +
-                traceback.format_exc().replace('\n', '\n    ')
-            ).rstrip()
-        )
+        raise format_discovery_error(traceback.format_exc())
+    if errors:
+        raise DiscoveryErrors(errors)
+
+
+# run by import_failures() in each subprocess: import the modules named in
+# argv[2:], appending a JSON line of [module name, traceback or null] to the
+# file named by argv[1] as each one is done
+IMPORT_CHECK_SCRIPT = '''
+import importlib, json, sys, traceback
+with open(sys.argv[1], 'a') as results:
+    for module_name in sys.argv[2:]:
+        try:
+            importlib.import_module(module_name)
+            failure = None
+        except BaseException:
+            failure = traceback.format_exc()
+        results.write(json.dumps([module_name, failure]) + '\\n')
+        results.flush()
+'''
+
+
+def _import_failures_in_subprocess(names):
+    """Check names in a subprocess; return {module name: traceback} for those which fail.
+
+    If a module kills the subprocess (e.g. os._exit() or a segfault), it's
+    reported as failing and the rest are checked in a new subprocess.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path or os.curdir for path in sys.path))
+    failures = {}
+    pending = list(names)
+    while pending:
+        fd, results_filename = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            with open(os.devnull, 'w') as devnull:
+                returncode = subprocess.call(
+                    [sys.executable, '-c', IMPORT_CHECK_SCRIPT, results_filename] + pending,
+                    env=env,
+                    stdout=devnull,
+                )
+            with open(results_filename) as results:
+                checked = [json.loads(line) for line in results if line.endswith('\n')]
+        finally:
+            os.remove(results_filename)
+
+        failures.update((module_name, failure) for module_name, failure in checked if failure is not None)
+        pending = pending[len(checked):]
+        if pending:
+            if returncode < 0:
+                how = 'was killed by signal %d' % -returncode
+            else:
+                how = 'exited with status %d' % returncode
+            failures[pending[0]] = 'The import checking subprocess %s while importing %s.\n' % (how, pending[0])
+            pending = pending[1:]
+    return failures
+
+
+def import_failures(names, jobs):
+    """Import the named modules in `jobs` fresh subprocesses; return DiscoveryErrors for those which fail, in order.
+
+    This finds every broken module without importing anything here.
+    """
+    names = list(names)
+    chunks = [names[i::jobs] for i in range(jobs) if names[i::jobs]]
+    failures = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for chunk_failures in executor.map(_import_failures_in_subprocess, chunks):
+            failures.update(chunk_failures)
+    return [
+        format_discovery_error('While importing %s:\n%s' % (module_name, failures[module_name]))
+        for module_name in names
+        if module_name in failures
+    ]
+
+
+def module_names(what, module_filter=ALL_MODULES):
+    """List the modules discover(what, module_filter=module_filter) would import, without importing them.
+
+    Only the parent packages of `what` get imported (to locate it); packages
+    are walked on disk with pkgutil.iter_modules.
+    """
+    what = to_module(what)
+    spec = importlib.util.find_spec(what)
+    if spec is None:
+        raise DiscoveryError('No module named %s' % what)
+
+    names = [what]
+    pending = [(what, list(spec.submodule_search_locations or ()))]
+    while pending:
+        package_name, path = pending.pop()
+        for _, name, is_package in pkgutil.iter_modules(path):
+            module_name = package_name + '.' + name
+            if not module_filter.includes(module_name, is_package):
+                continue
+            names.append(module_name)
+            if is_package:
+                pending.append((module_name, [os.path.join(location, name) for location in path]))
+    return sorted(names)
 
 
 def import_test_class(module_path, class_name):
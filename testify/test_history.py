@@ -0,0 +1,177 @@
+"""Helpers for reading the results of previous test runs.
+
+Both the --json-results log (one line per test method) and the
+--test-case-results log (one line per TestCase) write one JSON-encoded
+TestResult dict per line, terminated by "RUN COMPLETE". TestHistory reads any
+number of those files and aggregates timings per TestCase class, keyed the
+same way as MetaTestCase._cmp_str: "module.ClassName".
+
+The --test-case-results log also records the time each TestCase spent in its
+class_setup and class_teardown fixtures, which TestHistory keeps as the fixed
+cost of running a class.
+
+Since both reporters append to their files, a file may hold several runs,
+each ending at its "RUN COMPLETE" line. TestHistory keeps them apart, so it
+also knows how recently each test method failed, and which ones both passed
+and failed (were flaky).
+"""
+from __future__ import absolute_import
+
+from collections import defaultdict
+import json
+
+
+CLASS_FIXTURE_TYPES = frozenset(['class_setup', 'class_teardown', 'class_setup_teardown'])
+
+
+def class_key(method_dict):
+    """The history key for the class of a TestResult's 'method' dict."""
+    return '%s.%s' % (method_dict['module'], method_dict['class'])
+
+
+def iter_results(filename):
+    """Yield each TestResult dict in a results file, skipping anything that isn't one."""
+    for _, result in iter_run_results(filename):
+        yield result
+
+
+def iter_run_results(filename):
+    """Yield (run, TestResult dict) for each result in a results file.
+
+    Runs are numbered from 0 within the file; each "RUN COMPLETE" line starts
+    the next one.
+    """
+    run = 0
+    with open(filename) as results_file:
+        for line in results_file:
+            line = line.strip()
+            if line == 'RUN COMPLETE':
+                run += 1
+                continue
+            if not line.startswith('{'):
+                continue
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(result.get('method'), dict):
+                yield run, result
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+class TestHistory(object):
+    """Aggregated timings and outcomes from previous runs."""
+
+    def __init__(self):
+        self._case_times = defaultdict(list)
+        self._method_times = defaultdict(lambda: defaultdict(list))
+        self._fixture_times = defaultdict(float)
+        # class key -> method name -> [(run, success)]
+        self._outcomes = defaultdict(lambda: defaultdict(list))
+        # run -> the time its latest result ended, used to order runs
+        self._run_end_times = {}
+
+    @classmethod
+    def from_files(cls, filenames):
+        history = cls()
+        first_run = 0
+        for filename in filenames:
+            runs = 0
+            for run, result in iter_run_results(filename):
+                history.add_result(result, run=first_run + run)
+                runs = run + 1
+            first_run += runs
+        return history
+
+    def add_result(self, result, run=0):
+        method = result['method']
+        end_time = result.get('end_time') or 0
+        self._run_end_times[run] = max(self._run_end_times.get(run, end_time), end_time)
+
+        if not method.get('fixture_type') and method['name'] != 'run' and result.get('complete', True):
+            self._outcomes[class_key(method)][method['name']].append((run, bool(result.get('success'))))
+
+        run_time = result.get('run_time')
+        if run_time is None:
+            return
+
+        key = class_key(method)
+        if method.get('fixture_type') in CLASS_FIXTURE_TYPES:
+            self._fixture_times[key] += run_time
+        elif method.get('fixture_type'):
+            return
+        elif method['name'] == 'run':
+            # TestCase.run: the whole class, fixtures included
+            self._case_times[key].append(run_time)
+            self._fixture_times[key] += result.get('class_fixture_time') or 0.0
+        else:
+            self._method_times[key][method['name']].append(run_time)
+
+    @staticmethod
+    def median_duration(durations, default=0.0):
+        """The time to assume for a test without a recorded one: the median of the durations given, or default."""
+        known_times = sorted(durations)
+        return known_times[len(known_times) // 2] if known_times else default
+
+    def method_durations(self, key):
+        """Map each test method name recorded for this class to its mean run time."""
+        return dict(
+            (method_name, _mean(times))
+            for method_name, times in self._method_times.get(key, {}).items()
+        )
+
+    def method_failure_rates(self, key):
+        """Map each test method name with recorded outcomes for this class to its failure rate.
+
+        Rates are smoothed towards 1/2 (add one failure and one success), so a
+        method seen once isn't certain to fail or to pass.
+        """
+        return dict(
+            (method_name, (sum(1 for _, success in outcomes if not success) + 1.0) / (len(outcomes) + 2))
+            for method_name, outcomes in self._outcomes.get(key, {}).items()
+        )
+
+    def class_fixture_duration(self, key):
+        """The time spent in this class's class_setup and class_teardown fixtures, per run."""
+        # A class_setup_teardown reports both of its halves under one name, so
+        # divide the total by the number of recorded runs of the whole class.
+        return self._fixture_times.get(key, 0.0) / max(len(self._case_times.get(key, ())), 1)
+
+    def class_durations(self):
+        """Map "module.ClassName" to its expected run time in seconds.
+
+        Whole-TestCase timings are preferred since they include class fixtures;
+        otherwise the class is estimated as the sum of its test methods.
+        """
+        durations = dict(
+            (key, sum(self.method_durations(key).values()))
+            for key in self._method_times
+        )
+        for key, times in self._case_times.items():
+            durations[key] = _mean(times)
+        return durations
+
+    def failure_scores(self, decay=0.5):
+        """Score each class by how recently and how often it failed, and how flaky it is.
+
+        A failure in the newest run counts 1, one run older counts decay, and
+        so on; every test method which has both passed and failed adds 1.
+        Classes which never failed are left out.
+        """
+        runs = sorted(self._run_end_times, key=lambda run: (self._run_end_times[run], run), reverse=True)
+        weights = dict((run, decay ** age) for age, run in enumerate(runs))
+
+        scores = {}
+        for key, methods in self._outcomes.items():
+            failed_runs = set()
+            flaky_methods = 0
+            for outcomes in methods.values():
+                failed_runs.update(run for run, success in outcomes if not success)
+                if len(set(success for _, success in outcomes)) > 1:
+                    flaky_methods += 1
+            if failed_runs:
+                scores[key] = sum(weights[run] for run in failed_runs) + flaky_methods
+        return scores
@@ -40,6 +40,7 @@ class TestLoggerBase(test_reporter.TestReporter):
         self.stream = stream
         self.results = []
         self.test_case_classes = set()
+        self.not_run = []
 
     def test_start(self, result):
         self.test_case_classes.add((result['method']['module'], result['method']['class']))
@@ -60,6 +61,9 @@ class TestLoggerBase(test_reporter.TestReporter):
             self.report_test_result(result)
             self.results.append(result)
 
+    def tests_not_run(self, test_names):
+        self.not_run.extend(test_names)
+
     def report(self):
         # All the TestCases have been run - now collate results by status and log them
         results_by_status = collections.defaultdict(list)
@@ -75,6 +79,8 @@ class TestLoggerBase(test_reporter.TestReporter):
 
         if self.options.summary_mode:
             self.report_failures(results_by_status['failed'])
+        if self.not_run:
+            self.report_not_run(self.not_run)
         self.report_stats(len(self.test_case_classes), **results_by_status)
 
         if len(self.results) == 0:
@@ -108,6 +114,11 @@ class TestLoggerBase(test_reporter.TestReporter):
     def report_failure(self, result):
         pass
 
+    def report_not_run(self, test_names):
+        self.heading('NOT RUN', '%d tests did not fit in the time budget:' % len(test_names))
+        for test_name in test_names:
+            self.writeln(test_name)
+
     def report_stats(self, test_case_count, all_results, failed_results, unknown_results):
         pass
 
@@ -242,7 +253,7 @@ class TextTestLogger(TestLoggerBase):
             if successful:
                 status_string = self._colorize("PASSED", self.GREEN)
             else:
-                if test_method_count == 0:
+                if test_method_count == 0 and not self.not_run:
                     self.writeln(
                         "No tests were discovered (tests must subclass TestCase and test methods must begin with 'test').",
                     )
@@ -0,0 +1,120 @@
+"""Strategies for the order in which TestRunner runs the discovered TestCases (--order).
+
+A strategy is a TestOrder subclass; TestRunner builds the one named by --order
+(or uses an instance passed in as order=) and hands it every discovered class.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import random
+import sys
+
+from .test_case import MetaTestCase, TestCase
+from .test_history import CLASS_FIXTURE_TYPES
+
+
+class TestOrder(object):
+    """Base class for ordering strategies.
+
+    history is a testify.test_history.TestHistory; seed is for strategies
+    which involve randomness.
+    """
+
+    def __init__(self, history, seed=None):
+        self.history = history
+        self.seed = seed
+
+    def order(self, test_case_classes):
+        """Return test_case_classes (a list of TestCase classes) in the order they should run."""
+        raise NotImplementedError
+
+
+class FailedFirstOrder(TestOrder):
+    """Run the classes which failed recently, or are flaky, before everything else.
+
+    Classes are scored with TestHistory.failure_scores, highest first; the rest
+    keep their discovery order.
+    """
+
+    def order(self, test_case_classes):
+        scores = self.history.failure_scores()
+        return sorted(
+            test_case_classes,
+            key=lambda test_case_class: -scores.get(MetaTestCase._cmp_str(test_case_class), 0),
+        )
+
+
+class LongestFirstOrder(TestOrder):
+    """Run the slowest classes first, which shortens the tail of parallel runs.
+
+    Classes without a recorded duration are assumed to take the median time.
+    """
+
+    reverse = True
+
+    def order(self, test_case_classes):
+        durations = self.history.class_durations()
+        estimate = self.history.median_duration(durations.values())
+        return sorted(
+            test_case_classes,
+            key=lambda test_case_class: durations.get(MetaTestCase._cmp_str(test_case_class), estimate),
+            reverse=self.reverse,
+        )
+
+
+class ShortestFirstOrder(LongestFirstOrder):
+    """Run the fastest classes first, for quick feedback."""
+
+    reverse = False
+
+
+def class_fixture_bases(test_case_class):
+    """The base classes of test_case_class which define class fixtures, root first."""
+    return [
+        base
+        for base in reversed(test_case_class.__mro__[1:])
+        if base is not TestCase and any(
+            getattr(member, '_fixture_type', None) in CLASS_FIXTURE_TYPES
+            for member in vars(base).values()
+        )
+    ]
+
+
+class FixtureAffinityOrder(TestOrder):
+    """Run classes which inherit the same class_setup code back to back.
+
+    Classes are grouped by the bases they share which define class fixtures,
+    so that caches warmed by those fixtures are reused. Each group runs where
+    its first member was discovered, and discovery order is kept within it.
+    """
+
+    def order(self, test_case_classes):
+        first_seen = {}
+        keys = {}
+        for position, test_case_class in enumerate(test_case_classes):
+            bases = class_fixture_bases(test_case_class)
+            for base in bases:
+                first_seen.setdefault(base, position)
+            keys[test_case_class] = tuple(first_seen[base] for base in bases) + (position,)
+        return sorted(test_case_classes, key=keys.__getitem__)
+
+
+class RandomOrder(TestOrder):
+    """Shuffle the classes; pass the printed seed to --order-seed to reproduce an order."""
+
+    def order(self, test_case_classes):
+        if self.seed is None:
+            self.seed = random.randrange(2 ** 32)
+            print('Random order seed: %d' % self.seed, file=sys.stderr)
+        shuffled = list(test_case_classes)
+        random.Random(self.seed).shuffle(shuffled)
+        return shuffled
+
+
+ORDERS = {
+    'failed-first': FailedFirstOrder,
+    'longest-first': LongestFirstOrder,
+    'shortest-first': ShortestFirstOrder,
+    'fixture-affinity': FixtureAffinityOrder,
+    'random': RandomOrder,
+}
@@ -17,18 +17,25 @@ from collections import defaultdict
 from optparse import OptionParser
 import os
 import pprint
+import re
 import sys
 import logging
 from importlib.machinery import SourceFileLoader
 
 import testify
+from testify import bucketing
 from testify import exit
 from testify import test_logger
+from testify import test_ordering
+from testify import time_budget
+from testify.suite_expression import SuiteExpression
+from testify.test_runner import name_pattern_regex
 from testify.test_runner import TestRunner
 
 ACTION_RUN_TESTS = 0
 ACTION_LIST_SUITES = 1
 ACTION_LIST_TESTS = 2
+ACTION_LIST_BUCKETS = 3
 
 DEFAULT_PLUGIN_PATH = os.path.join(os.path.split(__file__)[0], 'plugins')
 
@@ -96,6 +103,44 @@ def default_parser():
 
     parser.add_option("-x", "--exclude-suite", action="append", dest="suites_exclude", type="string", default=[])
     parser.add_option("-q", "--require-suite", action="append", dest="suites_require", type="string", default=[])
+    parser.add_option(
+        "-k", "--name-pattern",
+        action="append",
+        dest="name_patterns",
+        type="string",
+        metavar="PATTERN",
+        default=[],
+        help=(
+            "Only run test methods whose full name ('path.to.class ClassName.test_method_name') "
+            "matches the glob PATTERN, or the regular expression after 're:' if PATTERN starts "
+            "with it, e.g. -k '*Bucket*' or -k 're:Plan.*json'. May be given several times."
+        ),
+    )
+    parser.add_option(
+        "--suites",
+        action="store",
+        dest="suites_expression",
+        type="string",
+        metavar="EXPRESSION",
+        default=None,
+        help=(
+            "Only run test methods whose suites match EXPRESSION, which combines suite "
+            "names with and, or, not and parentheses, e.g. '(db or cache) and not slow'."
+        ),
+    )
+    parser.add_option(
+        "--suite-file",
+        action="append",
+        dest="suite_files",
+        type="string",
+        metavar="FILE",
+        default=[],
+        help=(
+            "Add test methods to suites listed in FILE, one per line in the format "
+            "'path.to.class ClassName.test_method_name suite_name'. Can be combined "
+            "with --exclude-suite and --require-suite."
+        ),
+    )
 
     parser.add_option("--list-suites", action="store_true", dest="list_suites")
     parser.add_option("--list-tests", action="store_true", dest="list_tests")
@@ -169,6 +214,341 @@ def default_parser():
             "instance."
         ),
     )
+    parser.add_option(
+        '--rerun-merge',
+        action="store_true",
+        dest="rerun_merge",
+        default=False,
+        help=(
+            "With --rerun-test-file, run every test of a class on one test "
+            "class instance, even when they're not consecutive in FILE, so "
+            "each class_setup runs once. Reads the whole file before running."
+        ),
+    )
+
+    parser.add_option(
+        '--bisect-pollution',
+        action="store",
+        dest="bisect_pollution",
+        type="string",
+        metavar="TEST",
+        default=None,
+        help=(
+            "Find the tests which make TEST ('path.to.class ClassName.test_method_name') "
+            "fail when they run before it, from the order they ran in --bisect-log."
+        ),
+    )
+    parser.add_option(
+        '--bisect-log',
+        action="store",
+        dest="bisect_log",
+        type="string",
+        metavar="FILE",
+        default=None,
+        help="The --json-results log of a run in which the --bisect-pollution test failed.",
+    )
+    parser.add_option(
+        '--bisect-jobs',
+        action="store",
+        dest="bisect_jobs",
+        type="int",
+        default=None,
+        help="Run this many candidate lists at once while bisecting (default: the number of CPUs).",
+    )
+
+    parser.add_option(
+        '--bucket',
+        action="store",
+        dest="bucket",
+        type="int",
+        default=None,
+        help="Only run the TestCases assigned to this bucket (0-based); requires --bucket-count.",
+    )
+    parser.add_option(
+        '--bucket-count',
+        action="store",
+        dest="bucket_count",
+        type="int",
+        default=None,
+        help="Split the TestCases into this many buckets of roughly equal run time.",
+    )
+    parser.add_option(
+        '--bucket-timings',
+        action="append",
+        dest="bucket_timings",
+        type="string",
+        metavar="FILE",
+        default=[],
+        help=(
+            "A --json-results or --test-case-results log from a previous run, "
+            "used to balance buckets by run time. May be passed multiple times. "
+            "TestCases without any recorded timing are bucketed by name."
+        ),
+    )
+
+    parser.add_option(
+        '--bucket-strategy',
+        action="store",
+        dest="bucket_strategy",
+        type="choice",
+        choices=bucketing.STRATEGIES,
+        default=bucketing.STRATEGY_DURATION,
+        help=(
+            "How TestCases are assigned to buckets: 'duration' balances run time "
+            "using --bucket-timings, 'consistent' uses a hash ring so that adding "
+            "tests or buckets moves as few TestCases as possible."
+        ),
+    )
+    parser.add_option(
+        '--discovery-index',
+        action="store",
+        dest="discovery_index",
+        type="string",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Cache of the TestCases, test methods and suites found under the test "
+            "path, written whenever the whole path is discovered. --list-tests, "
+            "--list-suites and bucket planning answer from it, re-importing only "
+            "modules whose files changed; a bucket imports only its own modules."
+        ),
+    )
+    parser.add_option(
+        '--module-pattern',
+        action="append",
+        dest="module_patterns",
+        type="string",
+        metavar="PATTERN",
+        default=[],
+        help=(
+            "Only import the modules of a test package whose file names match "
+            "PATTERN, e.g. '*_test.py'. Subpackages are still walked. May be "
+            "given more than once."
+        ),
+    )
+    parser.add_option(
+        '--exclude-package',
+        action="append",
+        dest="exclude_packages",
+        type="string",
+        metavar="PACKAGE",
+        default=[],
+        help=(
+            "Don't import PACKAGE (a dotted name, which may use shell wildcards) "
+            "or anything beneath it when walking a test package. May be given "
+            "more than once."
+        ),
+    )
+    parser.add_option(
+        '--discovery-keep-going',
+        action="store_true",
+        dest="discovery_keep_going",
+        default=False,
+        help=(
+            "Try to import every test module, even after one fails, and report "
+            "all the failures before running any tests."
+        ),
+    )
+    parser.add_option(
+        '--discovery-jobs',
+        action="store",
+        dest="discovery_jobs",
+        type="int",
+        metavar="N",
+        default=None,
+        help=(
+            "With --discovery-keep-going, first check the test modules import "
+            "in N parallel subprocesses."
+        ),
+    )
+    parser.add_option(
+        '--import-profile',
+        action="store",
+        dest="import_profile_top",
+        type="int",
+        metavar="N",
+        default=None,
+        help=(
+            "Time the imports done by test discovery, and print the N slowest "
+            "modules (by time excluding their own imports) and the test modules "
+            "which triggered the most import time to stderr."
+        ),
+    )
+    parser.add_option(
+        '--import-profile-json',
+        action="store",
+        dest="import_profile_json",
+        type="string",
+        metavar="FILE",
+        default=None,
+        help="Time the imports done by test discovery, and write every module's times to FILE as JSON.",
+    )
+    parser.add_option(
+        '--precompile',
+        action="store_true",
+        dest="precompile",
+        default=False,
+        help=(
+            "Before discovery, compile the bytecode of the project and the test "
+            "path in parallel, checked against source hashes, so imports only "
+            "load cached .pyc files."
+        ),
+    )
+    parser.add_option(
+        '--precompile-jobs',
+        action="store",
+        dest="precompile_jobs",
+        type="int",
+        metavar="N",
+        default=None,
+        help="Number of processes --precompile uses. Defaults to one per CPU.",
+    )
+    parser.add_option(
+        '--unload-modules',
+        action="store_true",
+        dest="unload_modules",
+        default=False,
+        help=(
+            "Remove each test module from sys.modules once its tests have run, "
+            "and report the memory reclaimed per module to stderr. Packages are "
+            "kept; a module imported again by a later test module is re-run."
+        ),
+    )
+    parser.add_option(
+        '--static-discovery',
+        action="store_true",
+        dest="static_discovery",
+        default=False,
+        help=(
+            "For --list-tests and --list-suites, find TestCases by parsing the test "
+            "modules rather than importing them. Modules which can't be understood "
+            "statically (computed suites, classes from outside the project, custom "
+            "__init__s...) are still imported."
+        ),
+    )
+    parser.add_option(
+        '--list-buckets',
+        action="store_true",
+        dest="list_buckets",
+        help="Print the bucket assignment for --bucket-count buckets, one JSON object per line.",
+    )
+    parser.add_option(
+        '--compare-buckets',
+        action="store",
+        dest="compare_buckets",
+        type="string",
+        metavar="FILE",
+        default=None,
+        help=(
+            "Compare the bucket assignment with one saved from an earlier "
+            "--list-buckets, and print how many TestCases moved."
+        ),
+    )
+
+    parser.add_option(
+        '--order',
+        action="store",
+        dest="order",
+        type="choice",
+        choices=sorted(test_ordering.ORDERS),
+        default=None,
+        help=(
+            "Run TestCases in this order instead of discovery order: "
+            "'failed-first' runs recently failing and flaky TestCases first, "
+            "'longest-first' and 'shortest-first' order by historical run time, "
+            "'fixture-affinity' runs TestCases sharing class fixtures back to back, "
+            "and 'random' shuffles them (see --order-seed)."
+        ),
+    )
+    parser.add_option(
+        '--order-history',
+        action="append",
+        dest="order_history",
+        type="string",
+        metavar="FILE",
+        default=[],
+        help=(
+            "A --json-results or --test-case-results log from a previous run, "
+            "used by --order. May be passed multiple times."
+        ),
+    )
+    parser.add_option(
+        '--order-seed',
+        action="store",
+        dest="order_seed",
+        type="int",
+        default=None,
+        help="Seed for --order random.",
+    )
+
+    parser.add_option(
+        '--changed-files',
+        action="store",
+        dest="changed_files",
+        type="string",
+        metavar="FILES",
+        default=None,
+        help=(
+            "Comma-separated list of changed files, or - to read them from stdin "
+            "one per line. Only test modules which (transitively) import one of "
+            "them are discovered and run."
+        ),
+    )
+    parser.add_option(
+        '--import-graph-cache',
+        action="store",
+        dest="import_graph_cache",
+        type="string",
+        metavar="FILE",
+        default=None,
+        help="Cache the parsed imports used by --changed-files in FILE, re-parsing only changed modules.",
+    )
+
+    parser.add_option(
+        '--time-budget',
+        action="store",
+        dest="time_budget",
+        type="string",
+        metavar="DURATION",
+        default=None,
+        help=(
+            "Run the tests most likely to fail which fit in DURATION (e.g. 600, 90s, 10m, 1h), "
+            "judged from --budget-history, and start no new test cases once it has passed."
+        ),
+    )
+    parser.add_option(
+        '--budget-history',
+        action="append",
+        dest="budget_history",
+        type="string",
+        metavar="FILE",
+        default=[],
+        help=(
+            "A --json-results or --test-case-results log from a previous run, "
+            "used by --time-budget. May be passed multiple times."
+        ),
+    )
+
+    parser.add_option(
+        '--watch',
+        action="store_true",
+        dest="watch",
+        default=False,
+        help=(
+            "After running the tests, keep watching their source files and "
+            "re-run only the tests in modules which (transitively) import a "
+            "changed file."
+        ),
+    )
+    parser.add_option(
+        '--watch-interval',
+        action="store",
+        dest="watch_interval",
+        type="float",
+        default=0.5,
+        metavar="SECONDS",
+        help="How often --watch polls for changed files.",
+    )
 
     return parser
 
@@ -187,18 +567,74 @@ def parse_test_runner_command_line_args(plugin_modules, args):
             len(args) < 1 and
             not (
                 options.rerun_test_file or
+                options.bisect_pollution or
                 options.replay_json or
                 options.replay_json_inline
             )
     ):
         parser.error(
-            'Test path required unless --rerun-test-file, --replay-json, or '
-            '--replay-json-inline specified.'
+            'Test path required unless --rerun-test-file, --bisect-pollution, '
+            '--replay-json, or --replay-json-inline specified.'
+        )
+    if options.bisect_pollution and not options.bisect_log:
+        parser.error('--bisect-pollution requires --bisect-log.')
+    time_budget_seconds = None
+    if options.time_budget is not None:
+        try:
+            time_budget_seconds = time_budget.parse_duration(options.time_budget)
+        except ValueError as e:
+            parser.error(str(e))
+    for pattern in options.name_patterns:
+        try:
+            name_pattern_regex(pattern)
+        except re.error as e:
+            parser.error('Invalid -k pattern %r: %s' % (pattern, e))
+    if options.suites_expression is not None:
+        try:
+            SuiteExpression(options.suites_expression)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if options.list_buckets or options.compare_buckets:
+        if options.bucket_count is None:
+            parser.error('--list-buckets and --compare-buckets require --bucket-count.')
+    elif options.bucket_count is not None or options.bucket is not None:
+        if options.bucket_count is None or options.bucket is None:
+            parser.error('--bucket and --bucket-count must be specified together.')
+    if options.bucket_count is not None and options.bucket_count < 1:
+        parser.error('--bucket-count must be at least 1.')
+    if options.bucket is not None and not 0 <= options.bucket < options.bucket_count:
+        parser.error('--bucket must be between 0 and --bucket-count - 1.')
+    if options.precompile_jobs is not None and options.precompile_jobs < 1:
+        parser.error('--precompile-jobs must be at least 1.')
+    if options.watch and (
+            options.rerun_test_file or
+            options.replay_json or
+            options.replay_json_inline or
+            options.bisect_pollution or
+            options.list_tests or
+            options.list_suites or
+            options.list_buckets or
+            options.compare_buckets or
+            options.bucket_count is not None
+    ):
+        parser.error(
+            '--watch can\'t be combined with --rerun-test-file, --replay-json, --replay-json-inline, '
+            '--bisect-pollution, --list-tests, --list-suites, --list-buckets or bucketing.'
         )
+    if options.rerun_merge and not options.rerun_test_file:
+        parser.error('--rerun-merge requires --rerun-test-file.')
+    if options.discovery_jobs is not None:
+        if not options.discovery_keep_going:
+            parser.error('--discovery-jobs requires --discovery-keep-going.')
+        if options.discovery_jobs < 1:
+            parser.error('--discovery-jobs must be at least 1.')
 
     test_path, module_method_overrides = _parse_test_runner_command_line_module_method_overrides(args)
 
-    if options.list_suites:
+    if options.list_buckets or options.compare_buckets:
+        runner_action = ACTION_LIST_BUCKETS
+    elif options.list_suites:
         runner_action = ACTION_LIST_SUITES
     elif options.list_tests:
         runner_action = ACTION_LIST_TESTS
@@ -209,7 +645,32 @@ def parse_test_runner_command_line_args(plugin_modules, args):
         'debugger': options.debugger,
         'suites_exclude': options.suites_exclude,
         'suites_require': options.suites_require,
+        'suites_expression': options.suites_expression,
+        'name_patterns': options.name_patterns,
         'failure_limit': options.failure_limit,
+        'bucket': options.bucket,
+        'bucket_count': options.bucket_count,
+        'bucket_timings': options.bucket_timings,
+        'bucket_strategy': options.bucket_strategy,
+        'discovery_index': options.discovery_index,
+        'static_discovery': options.static_discovery,
+        'module_patterns': options.module_patterns,
+        'exclude_packages': options.exclude_packages,
+        'discovery_keep_going': options.discovery_keep_going,
+        'discovery_jobs': options.discovery_jobs,
+        'import_profile_top': options.import_profile_top,
+        'import_profile_json': options.import_profile_json,
+        'precompile': options.precompile,
+        'precompile_jobs': options.precompile_jobs,
+        'unload_modules': options.unload_modules,
+        'order': options.order,
+        'order_history': options.order_history,
+        'order_seed': options.order_seed,
+        'changed_files': _parse_changed_files(options.changed_files),
+        'import_graph_cache': options.import_graph_cache,
+        'time_budget': time_budget_seconds,
+        'budget_history': options.budget_history,
+        'method_suites': _parse_suite_files(parser, options.suite_files),
         'module_method_overrides': module_method_overrides,
         'options': options,
         'plugin_modules': plugin_modules
@@ -218,6 +679,34 @@ def parse_test_runner_command_line_args(plugin_modules, args):
     return runner_action, test_path, test_runner_args, options
 
 
+def _parse_changed_files(changed_files):
+    """Split the --changed-files argument into a list of paths, reading stdin for '-'."""
+    if changed_files is None:
+        return None
+    elif changed_files == '-':
+        return [line.strip() for line in sys.stdin if line.strip()]
+    else:
+        return [path for path in changed_files.split(',') if path]
+
+
+def _parse_suite_files(parser, suite_files):
+    """Read --suite-file files into {(module, class name): {method name: set of suites}}."""
+    method_suites = defaultdict(lambda: defaultdict(set))
+    for suite_file in suite_files:
+        with open(suite_file) as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.split('#', 1)[0].strip()
+                if not line:
+                    continue
+                try:
+                    module_name, test_name, suite_name = line.split()
+                except ValueError:
+                    parser.error('%s:%d: expected "module Class.method suite"' % (suite_file, line_number))
+                class_name, _, method_name = test_name.partition('.')
+                method_suites[module_name, class_name][method_name].add(suite_name)
+    return method_suites
+
+
 def _parse_test_runner_command_line_module_method_overrides(args):
     """Parse a set of positional args (returned from an OptionParser probably)
     for specific modules or test methods.
@@ -272,6 +761,14 @@ class TestProgram(object):
         """Run testify, return 0 on success, nonzero on failure."""
         self.setup_logging(self.other_opts)
 
+        if self.other_opts.bisect_pollution:
+            from .test_bisect import bisect_pollution
+            return bisect_pollution(
+                self.other_opts.bisect_pollution,
+                self.other_opts.bisect_log,
+                jobs=self.other_opts.bisect_jobs,
+            )
+
         if self.other_opts.replay_json or self.other_opts.replay_json_inline:
             from .test_runner_json_replay import TestRunnerJSONReplay
             test_runner_class = TestRunnerJSONReplay
@@ -281,6 +778,7 @@ class TestProgram(object):
             from .test_rerunner import TestRerunner
             test_runner_class = TestRerunner
             self.test_runner_args['rerun_test_file'] = self.other_opts.rerun_test_file
+            self.test_runner_args['rerun_merge'] = self.other_opts.rerun_merge
         else:
             test_runner_class = TestRunner
 
@@ -299,6 +797,24 @@ class TestProgram(object):
             pp = pprint.PrettyPrinter(indent=2)
             print(pp.pformat(dict(suite_counts)))
             return exit.OK
+        elif self.runner_action == ACTION_LIST_BUCKETS:
+            plan = runner.list_buckets()
+            if self.other_opts.compare_buckets:
+                with open(self.other_opts.compare_buckets) as previous_file:
+                    previous = bucketing.BucketPlan.from_json_lines(previous_file)
+                moved = plan.moved_classes(previous)
+                for class_name in moved:
+                    print(class_name)
+                print("%d of %d test cases moved, %d added, %d removed" % (
+                    len(moved),
+                    len(set(plan.pieces) & set(previous.pieces)),
+                    len(set(plan.pieces) - set(previous.pieces)),
+                    len(set(previous.pieces) - set(plan.pieces)),
+                ))
+            else:
+                for line in plan.to_json_lines():
+                    print(line)
+            return exit.OK
         elif self.runner_action == ACTION_LIST_TESTS:
             runner.list_tests(format=self.other_opts.list_tests_format)
             return exit.OK
@@ -313,6 +829,16 @@ class TestProgram(object):
                 if hasattr(plugin_mod, "prepare_test_runner"):
                     plugin_mod.prepare_test_runner(self.test_runner_args['options'], runner)
 
+            if self.other_opts.watch:
+                from .test_watcher import TestWatcher
+                watcher = TestWatcher(
+                    self.test_path,
+                    self.test_runner_args,
+                    build_reporters=lambda: self.get_reporters(self.other_opts, self.test_runner_args['plugin_modules']),
+                    poll_interval=self.other_opts.watch_interval,
+                )
+                return watcher.watch()
+
             return runner.run()
 
     def setup_logging(self, options):
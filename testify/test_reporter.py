@@ -62,6 +62,10 @@ class TestReporter(object):
         """Called when a test case and all of its fixtures have been run."""
         pass
 
+    def tests_not_run(self, test_names):
+        """Called before report() with the full names of tests which were left out to keep within --time-budget."""
+        pass
+
     def report(self):
         """Called at the end of the test run to report results
 
@@ -3,8 +3,10 @@ from itertools import groupby
 from json import loads
 import sys
 from collections import namedtuple
+from collections import OrderedDict
 
 from . import test_discovery
+from .exceptions import DiscoveryError
 from .test_runner import TestRunner
 
 
@@ -24,31 +26,54 @@ class Test(namedtuple('TestTuple', ('module', 'cls', 'method'))):
 class TestRerunner(TestRunner):
     def __init__(self, *args, **kwargs):
         self.filename = kwargs.pop('rerun_test_file')
+        self.merge = kwargs.pop('rerun_merge', False)
         super(TestRerunner, self).__init__(*args, **kwargs)
+        # module path -> {class name: test class}, filled in as modules come up
+        self._class_index = {}
 
-    def discover(self):
+    def read_tests(self):
+        """Yield a Test for each line of the rerun file, reading it as we go."""
         if self.filename == '-':
             tests = sys.stdin
         else:
             tests = open(self.filename)
 
+        constructor = None
         with tests as tests:
-            tests = tests.read()
-
-        if tests.startswith('{'):
-            constructor = Test.from_json
-        else:
-            constructor = Test.from_name
+            for line in tests:
+                line = line.rstrip('\n')
+                if not line:  # Skip blank lines
+                    continue
+                if constructor is None:
+                    constructor = Test.from_json if line.startswith('{') else Test.from_name
+                yield constructor(line)
 
-        tests = [
-            constructor(test)
-            for test in tests.splitlines()
-            if test  # Skip blank lines
-        ]
+    def test_class(self, module, class_name):
+        """Look up a test class, discovering each module only once."""
+        classes = self._class_index.get(module)
+        if classes is None:
+            classes = self._class_index[module] = dict(
+                (klass.__name__, klass) for klass in test_discovery.discover(module)
+            )
+        try:
+            return classes[class_name]
+        except KeyError:
+            raise DiscoveryError(class_name)
 
-        for class_path, tests in groupby(tests, lambda test: test[:2]):
-            methods = [test.method for test in tests]
-            module, cls = class_path
+    def discover(self):
+        tests = self.read_tests()
+        if self.merge:
+            # one instance per class, so each class_setup runs once; this needs the whole file first
+            methods_by_class = OrderedDict()
+            for test in tests:
+                methods_by_class.setdefault(test[:2], []).append(test.method)
+            groups = methods_by_class.items()
+        else:
+            groups = (
+                (class_path, [test.method for test in tests])
+                for class_path, tests in groupby(tests, lambda test: test[:2])
+            )
 
-            cls = test_discovery.import_test_class(module, cls)
+        for (module, cls), methods in groups:
+            cls = self.test_class(module, cls)
             yield self._construct_test(cls, name_overrides=methods)
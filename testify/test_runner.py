@@ -18,13 +18,32 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 from collections import defaultdict
+import fnmatch
 import functools
+import itertools
 import json
+import os
+import re
+import sys
+import time
 
 import six
 
+from .suite_expression import suites_filter
+from .suite_expression import suites_mask
+from .suite_expression import SuiteExpression
 from .test_case import MetaTestCase, TestCase
+from . import bucketing
+from . import discovery_index
+from . import import_graph
+from . import import_profile
+from . import module_unloading
+from . import precompile
+from . import static_discovery
 from . import test_discovery
+from . import test_history
+from . import test_ordering
+from . import time_budget
 from . import exit
 from . import exceptions
 
@@ -33,6 +52,20 @@ __author__ = "Oliver Nicholas <bigo@yelp.com>"
 __testify = 1
 
 
+def name_pattern_regex(pattern):
+    """Compile a -k pattern: a glob over the whole test name, or a regex searched for if it starts with 're:'."""
+    if pattern.startswith('re:'):
+        return re.compile(pattern[len('re:'):])
+    return re.compile(fnmatch.translate(pattern))
+
+
+def name_pattern_matcher(pattern):
+    """A function telling whether a test name matches a -k pattern (see name_pattern_regex)."""
+    if pattern.startswith('re:'):
+        return name_pattern_regex(pattern).search
+    return name_pattern_regex(pattern).match
+
+
 class TestRunner(object):
     """TestRunner is the controller class of the testify suite.
 
@@ -45,11 +78,36 @@ class TestRunner(object):
                  debugger=None,
                  suites_exclude=(),
                  suites_require=(),
+                 suites_expression=None,
+                 name_patterns=(),
+                 method_suites=None,
                  options=None,
                  test_reporters=None,
                  plugin_modules=None,
                  module_method_overrides=None,
-                 failure_limit=None
+                 failure_limit=None,
+                 bucket=None,
+                 bucket_count=None,
+                 bucket_timings=(),
+                 bucket_strategy=bucketing.STRATEGY_DURATION,
+                 discovery_index=None,
+                 static_discovery=False,
+                 module_patterns=(),
+                 exclude_packages=(),
+                 discovery_keep_going=False,
+                 discovery_jobs=None,
+                 import_profile_top=None,
+                 import_profile_json=None,
+                 precompile=False,
+                 precompile_jobs=None,
+                 unload_modules=False,
+                 order=None,
+                 order_history=(),
+                 order_seed=None,
+                 changed_files=None,
+                 import_graph_cache=None,
+                 time_budget=None,
+                 budget_history=(),
                  ):
         """After instantiating a TestRunner, call run() to run them."""
 
@@ -59,6 +117,10 @@ class TestRunner(object):
 
         self.suites_exclude = set(suites_exclude)
         self.suites_require = set(suites_require)
+        self.suites_expression = SuiteExpression(suites_expression) if suites_expression is not None else None
+        self.name_patterns = [name_pattern_matcher(pattern) for pattern in name_patterns]
+        # (module, class name) -> {method name: extra suites}
+        self.method_suites = method_suites or {}
 
         self.options = options
 
@@ -69,6 +131,43 @@ class TestRunner(object):
         self.failure_limit = failure_limit
         self.failure_count = 0
 
+        self.bucket = bucket
+        self.bucket_count = bucket_count
+        self.bucket_timings = list(bucket_timings)
+        self.bucket_strategy = bucket_strategy
+        self.discovery_index = discovery_index
+        self.static_discovery = static_discovery
+        self.module_filter = test_discovery.ModuleFilter(module_patterns, exclude_packages)
+        self.discovery_keep_going = discovery_keep_going
+        self.discovery_jobs = discovery_jobs
+
+        self.import_profile_top = import_profile_top
+        self.import_profile_json = import_profile_json
+        if import_profile_top or import_profile_json:
+            self.import_profiler = import_profile.ImportProfiler()
+        else:
+            self.import_profiler = None
+
+        self.precompile = precompile
+        self.precompile_jobs = precompile_jobs
+
+        self.module_unloader = module_unloading.ModuleUnloader() if unload_modules else None
+
+        self.order = order
+        self.order_history = list(order_history)
+        self.order_seed = order_seed
+
+        self.changed_files = changed_files
+        self._affected_test_modules = None
+        self.import_graph_cache = import_graph_cache
+
+        self.time_budget = time_budget
+        self.budget_history = list(budget_history)
+        # full names of the runnable tests left out to keep within time_budget
+        self.tests_not_run = []
+        # when run() stops starting test cases, with a time_budget
+        self.deadline = None
+
     @classmethod
     def get_test_method_name(cls, test_method):
         test_method_self_t = type(six.get_method_self(test_method))
@@ -81,14 +180,25 @@ class TestRunner(object):
             test_method.__name__,
         )
 
+    def _name_overrides(self, test_case_cls, kwargs):
+        """The test method names a (class, _construct_test kwargs) pair is limited to, or None for all of them."""
+        return kwargs.get('name_overrides', self.module_method_overrides.get(test_case_cls.__name__))
+
+    def _test_method_names(self, test_case_cls, kwargs):
+        """The names of the test methods a (class, _construct_test kwargs) pair may run, from the class alone."""
+        method_names = self._name_overrides(test_case_cls, kwargs)
+        if method_names is None:
+            method_names = test_case_cls._test_method_table()
+        return method_names
+
     def _construct_test(self, test_case_cls, **kwargs):
-        name_overrides = kwargs.pop(
-            'name_overrides',
-            self.module_method_overrides.get(test_case_cls.__name__, None),
-        )
+        name_overrides = self._name_overrides(test_case_cls, kwargs)
+        kwargs.pop('name_overrides', None)
         test_case = test_case_cls(
             suites_exclude=self.suites_exclude,
             suites_require=self.suites_require,
+            suites_expression=self.suites_expression,
+            method_suites=self.method_suites.get((test_case_cls.__module__, test_case_cls.__name__), {}),
             name_overrides=name_overrides,
             failure_limit=(self.failure_limit - self.failure_count) if self.failure_limit else None,
             debugger=self.debugger,
@@ -102,16 +212,302 @@ class TestRunner(object):
 
         return test_case
 
+    def _included(self, test_case_class_name):
+        return not self.module_method_overrides or test_case_class_name in self.module_method_overrides
+
+    def discover_test_classes(self):
+        if self.changed_files is not None:
+            test_case_classes = (
+                test_case_class
+                for module_name in self.affected_test_modules()
+                for test_case_class in test_discovery.discover(module_name, recursive=False)
+            )
+        elif self.discovery_index:
+            test_case_classes = self._indexing(self.discover_test_path())
+        else:
+            test_case_classes = self.discover_test_path()
+        return (
+            test_case_class
+            for test_case_class in test_case_classes
+            if self._included(test_case_class.__name__)
+        )
+
+    def discover_test_path(self):
+        """Discover the classes in our whole test path.
+
+        With discovery_keep_going, every module is tried and all the import
+        failures are raised together; with discovery_jobs as well, that check
+        is first done in parallel subprocesses.
+        """
+        if self.discovery_keep_going and self.discovery_jobs:
+            errors = test_discovery.import_failures(
+                test_discovery.module_names(self.test_path_or_test_case, self.module_filter),
+                self.discovery_jobs,
+            )
+            if errors:
+                raise exceptions.DiscoveryErrors(errors)
+        return test_discovery.discover(
+            self.test_path_or_test_case,
+            module_filter=self.module_filter,
+            keep_going=self.discovery_keep_going,
+        )
+
+    def _indexing(self, test_case_classes):
+        """Pass through a full discovery's classes, then save them as our discovery index."""
+        discovered = []
+        for test_case_class in test_case_classes:
+            discovered.append(test_case_class)
+            yield test_case_class
+        index = discovery_index.DiscoveryIndex.from_test_classes(self.test_path_or_test_case, discovered, self.module_filter)
+        index.save(self.discovery_index)
+
+    def affected_test_modules(self):
+        """The modules under our test path which (transitively) import one of self.changed_files."""
+        if self._affected_test_modules is None:
+            graph = import_graph.StaticImportGraph.build(os.getcwd(), cache=self.import_graph_cache)
+            affected = graph.affected_modules(self.changed_files)
+            self._affected_test_modules = [
+                module_name
+                for module_name in test_discovery.module_names(self.test_path_or_test_case, self.module_filter)
+                if module_name in affected
+            ]
+        return self._affected_test_modules
+
     def discover(self):
         if isinstance(self.test_path_or_test_case, (TestCase, MetaTestCase)):
             # For testing purposes only
             return [self.test_path_or_test_case()]
+
+        if self.precompile:
+            precompile.compile_tree(self.test_path_or_test_case, self.precompile_jobs)
+        if self.bucket_count:
+            test_case_classes = self.bucket_test_classes()
         else:
-            return (
-                self._construct_test(test_case_class)
-                for test_case_class in test_discovery.discover(self.test_path_or_test_case)
-                if not self.module_method_overrides or test_case_class.__name__ in self.module_method_overrides
+            test_case_classes = ((test_case_class, {}) for test_case_class in self.discover_test_classes())
+        if self.import_profiler is not None:
+            test_case_classes = self.import_profiler.profile(test_case_classes)
+        if self.name_patterns:
+            test_case_classes = self.select_test_methods(test_case_classes)
+        test_case_classes = self.runnable_test_classes(test_case_classes)
+        if self.time_budget is not None:
+            test_case_classes = self.budget_test_classes(test_case_classes)
+        if self.order:
+            test_case_classes = self.order_test_classes(test_case_classes)
+        if self.module_unloader is not None:
+            test_case_classes = self.module_unloader.expect(test_case_classes)
+        return self._construct_tests(test_case_classes)
+
+    def _construct_tests(self, test_case_classes):
+        """Construct a test case for each (class, kwargs) pair, until self.deadline passes.
+
+        The runnable tests of the classes left then are added to
+        self.tests_not_run, as judged from the classes alone.
+        """
+        test_case_classes = iter(test_case_classes)
+        for test_case_class, kwargs in test_case_classes:
+            if self.deadline is not None and time.time() >= self.deadline:
+                runnable = suites_filter(self.suites_exclude, self.suites_require, self.suites_expression)
+                for test_case_class, kwargs in itertools.chain([(test_case_class, kwargs)], test_case_classes):
+                    self.tests_not_run.extend(
+                        '%s %s.%s' % (test_case_class.__module__, test_case_class.__name__, method_name)
+                        for method_name in sorted(test_case_class._runnable_method_names(
+                            runnable,
+                            method_suites=self.method_suites.get((test_case_class.__module__, test_case_class.__name__)),
+                            name_overrides=self._name_overrides(test_case_class, kwargs),
+                        ))
+                    )
+                return
+            yield self._construct_test(test_case_class, **kwargs)
+
+    def select_test_methods(self, test_case_classes):
+        """Narrow (class, kwargs) pairs to the test methods whose names match our -k patterns.
+
+        Matching uses the class's method table, so classes with no matching
+        methods are dropped without being instantiated.
+        """
+        for test_case_class, kwargs in test_case_classes:
+            method_names = self._test_method_names(test_case_class, kwargs)
+            name_prefix = '%s %s.' % (test_case_class.__module__, test_case_class.__name__)
+            selected = set(
+                method_name
+                for method_name in method_names
+                if any(matches(name_prefix + method_name) for matches in self.name_patterns)
             )
+            if selected:
+                yield test_case_class, dict(kwargs, name_overrides=selected)
+
+    def runnable_test_classes(self, test_case_classes):
+        """Drop the (class, kwargs) pairs whose class would have no runnable test methods.
+
+        This is decided from per-class metadata, so classes filtered out by
+        suites or name overrides are never instantiated.
+        """
+        runnable = suites_filter(self.suites_exclude, self.suites_require, self.suites_expression)
+        for test_case_class, kwargs in test_case_classes:
+            if test_case_class._has_runnable_methods(
+                runnable,
+                method_suites=self.method_suites.get((test_case_class.__module__, test_case_class.__name__)),
+                name_overrides=self._name_overrides(test_case_class, kwargs),
+            ):
+                yield test_case_class, kwargs
+
+    def budget_test_classes(self, test_case_classes):
+        """Narrow (class, kwargs) pairs to the test methods chosen to fit in our time budget.
+
+        See testify.time_budget. The methods left out are added to self.tests_not_run.
+        """
+        test_methods = []
+        for test_case_class, kwargs in test_case_classes:
+            method_names = self._test_method_names(test_case_class, kwargs)
+            test_methods.append((test_case_class, kwargs, sorted(method_names)))
+
+        chosen = time_budget.plan_time_budget(
+            [(MetaTestCase._cmp_str(test_case_class), method_names) for test_case_class, _, method_names in test_methods],
+            test_history.TestHistory.from_files(self.budget_history),
+            self.time_budget,
+        )
+        for test_case_class, kwargs, method_names in test_methods:
+            chosen_names = chosen.get(MetaTestCase._cmp_str(test_case_class), set())
+            self.tests_not_run.extend(
+                '%s %s.%s' % (test_case_class.__module__, test_case_class.__name__, method_name)
+                for method_name in method_names
+                if method_name not in chosen_names
+            )
+            if chosen_names:
+                yield test_case_class, dict(kwargs, name_overrides=chosen_names)
+
+    def order_test_classes(self, test_case_classes):
+        """Reorder (class, kwargs) pairs with our order strategy.
+
+        self.order is either the name of a strategy in test_ordering.ORDERS or a
+        test_ordering.TestOrder instance.
+        """
+        construct_kwargs = dict(test_case_classes)
+        if isinstance(self.order, test_ordering.TestOrder):
+            strategy = self.order
+        else:
+            strategy = test_ordering.ORDERS[self.order](
+                test_history.TestHistory.from_files(self.order_history),
+                seed=self.order_seed,
+            )
+        return [
+            (test_case_class, construct_kwargs[test_case_class])
+            for test_case_class in strategy.order(list(construct_kwargs))
+        ]
+
+    def load_discovery_index(self):
+        """Return an up to date DiscoveryIndex for our test path, running a full discovery if it isn't indexed yet.
+
+        Also returns the discovered classes in that case, or None if the index
+        could be used, re-importing only the modules which changed.
+        """
+        if self.discovery_index:
+            index = discovery_index.DiscoveryIndex.load(
+                self.discovery_index, self.test_path_or_test_case, self.module_filter,
+            )
+            if index is not None:
+                if index.refresh():
+                    index.save(self.discovery_index)
+                return index, None
+
+        test_case_classes = list(self.discover_test_path())
+        index = discovery_index.DiscoveryIndex.from_test_classes(
+            self.test_path_or_test_case, test_case_classes, self.module_filter,
+        )
+        if self.discovery_index:
+            index.save(self.discovery_index)
+        return index, [
+            test_case_class
+            for test_case_class in test_case_classes
+            if self._included(test_case_class.__name__)
+        ]
+
+    def indexed_tests(self, index):
+        """Yield (full test name, suites) for the runnable test methods in a DiscoveryIndex.
+
+        This applies the same filters as discover() and runnable_test_methods(),
+        without importing anything.
+        """
+        runnable = suites_filter(self.suites_exclude, self.suites_require, self.suites_expression)
+        for module_name, class_name, class_entry in index.test_classes():
+            if not self._included(class_name):
+                continue
+            name_overrides = self.module_method_overrides.get(class_name)
+            extra_suites = self.method_suites.get((module_name, class_name), {})
+            for method_name, method_suites in sorted(class_entry['methods'].items()):
+                if name_overrides is not None and method_name not in name_overrides:
+                    continue
+                name = '%s %s.%s' % (module_name, class_name, method_name)
+                if self.name_patterns and not any(matches(name) for matches in self.name_patterns):
+                    continue
+                suites = set(class_entry['suites']) | set(method_suites) | extra_suites.get(method_name, set())
+                if runnable(suites_mask(suites)):
+                    yield name, suites, set(method_suites)
+
+    def listing_index(self):
+        """The DiscoveryIndex --list-tests and --list-suites answer from."""
+        if self.static_discovery:
+            index, _ = static_discovery.StaticDiscovery().index(self.test_path_or_test_case, self.module_filter)
+        else:
+            index, _ = self.load_discovery_index()
+        return index
+
+    def _lists_from_index(self):
+        return bool(
+            (self.discovery_index or self.static_discovery) and
+            isinstance(self.test_path_or_test_case, six.string_types) and
+            self.changed_files is None and
+            not self.bucket_count
+        )
+
+    def bucket_plan(self, index):
+        """Plan every bucket; see testify.bucketing."""
+        return bucketing.plan_buckets(
+            index.test_methods(self._included),
+            self.bucket_count,
+            test_history.TestHistory.from_files(self.bucket_timings),
+            strategy=self.bucket_strategy,
+        )
+
+    def bucket_test_classes(self):
+        """Yield (class, _construct_test kwargs) for the classes and pieces of classes in our bucket.
+
+        Planning needs every class up front. Without a discovery index that
+        means importing the whole test path before the first test runs; with
+        one, only the modules holding our bucket's classes get imported.
+        """
+        index, test_case_classes = self.load_discovery_index()
+        plan = self.bucket_plan(index)
+
+        # module -> the buckets which will import it
+        module_buckets = defaultdict(set)
+        for class_key, pieces in plan.pieces.items():
+            module_buckets[index.module_of(class_key)].update(pieces)
+
+        if test_case_classes is None:
+            test_case_classes = (
+                test_case_class
+                for module_name in sorted(module_buckets)
+                if self.bucket in module_buckets[module_name]
+                for test_case_class in test_discovery.discover(module_name, recursive=False)
+                if self._included(test_case_class.__name__)
+            )
+
+        for test_case_class in test_case_classes:
+            try:
+                name_overrides = plan.name_overrides(MetaTestCase._cmp_str(test_case_class), self.bucket)
+            except KeyError:
+                # Not indexed yet: run it on the first bucket which imports its module anyway.
+                if (
+                    MetaTestCase._cmp_str(test_case_class) in plan.pieces or
+                    min(module_buckets[test_case_class.__module__]) != self.bucket
+                ):
+                    continue
+                name_overrides = None
+            if name_overrides is None:
+                yield test_case_class, {}
+            else:
+                yield test_case_class, {'name_overrides': name_overrides}
 
     def run(self):
         """Instantiate our found test case classes and run their test methods.
@@ -129,10 +525,31 @@ class TestRunner(object):
             http://linux.die.net/include/sysexits.h
         """
 
+        if self.changed_files is not None and not self.affected_test_modules():
+            # e.g. a change to docs or data only: there's nothing to test, which isn't an error
+            print('No test modules import the changed files; not running any tests.', file=sys.stderr)
+            return exit.OK
+
+        self.deadline = time.time() + self.time_budget if self.time_budget is not None else None
         try:
-            for test_case in self.discover():
+            test_cases = self.discover()
+            if self.discovery_keep_going:
+                # find every import error before running anything
+                test_cases = list(test_cases)
+            test_cases = iter(test_cases)
+            for test_case in test_cases:
+                if self.module_unloader is not None:
+                    self.module_unloader.starting(test_case)
                 if self.failure_limit and self.failure_count >= self.failure_limit:
                     break
+                if self.deadline is not None and time.time() >= self.deadline:
+                    # out of time: don't start any more test cases (see also _construct_tests())
+                    for test_case in itertools.chain([test_case], test_cases):
+                        self.tests_not_run.extend(
+                            self.get_test_method_name(test_method)
+                            for test_method in test_case.runnable_test_methods()
+                        )
+                    break
 
                 # We allow our plugins to mutate the test case prior to execution
                 for plugin_mod in self.plugin_modules:
@@ -172,29 +589,65 @@ class TestRunner(object):
 
                 # And we finally execute our finely wrapped test case
                 runnable()
+                # don't keep the test case alive once it's done (see --unload-modules)
+                del runnable
 
         except exceptions.DiscoveryError as exc:
+            errors = exc.errors if isinstance(exc, exceptions.DiscoveryErrors) else [exc]
             for reporter in self.test_reporters:
-                reporter.test_discovery_failure(exc)
+                for error in errors:
+                    reporter.test_discovery_failure(error)
+            self.report_import_profile()
             return exit.DISCOVERY_FAILED
         except exceptions.Interruption:
             # handle interruption so we can cancel in the middle of a run
             # but still get a testing summary.
             pass
 
+        if self.tests_not_run:
+            for reporter in self.test_reporters:
+                reporter.tests_not_run(self.tests_not_run)
+        if self.module_unloader is not None:
+            test_case = test_cases = None
+            self.module_unloader.finish()
+            for line in self.module_unloader.format_report():
+                print(line, file=sys.stderr)
         report = [reporter.report() for reporter in self.test_reporters]
+        self.report_import_profile()
         if all(report):
             return exit.OK
         else:
             return exit.TESTS_FAILED
 
+    def report_import_profile(self):
+        """Print the slowest imports discovery did to stderr, and/or save them all as JSON; see --import-profile."""
+        if self.import_profiler is None:
+            return
+        if self.import_profile_top:
+            for line in self.import_profiler.format_table(self.import_profile_top):
+                print(line, file=sys.stderr)
+        if self.import_profile_json:
+            self.import_profiler.save(self.import_profile_json)
+
+    def list_buckets(self):
+        """Plan the buckets for all of this TestRunner's test classes."""
+        index, _ = self.load_discovery_index()
+        return self.bucket_plan(index)
+
     def list_suites(self):
         """List the suites represented by this TestRunner's tests."""
         suites = defaultdict(list)
-        for test_instance in self.discover():
-            for test_method in test_instance.runnable_test_methods():
-                for suite_name in test_instance.suites(test_method):
-                    suites[suite_name].append(test_method)
+        if self._lists_from_index():
+            index = self.listing_index()
+            for name, test_suites, _ in self.indexed_tests(index):
+                for suite_name in test_suites:
+                    suites[suite_name].append(name)
+        else:
+            for test_instance in self.discover():
+                for test_method in test_instance.runnable_test_methods():
+                    for suite_name in test_instance.suites(test_method):
+                        suites[suite_name].append(test_method)
+        self.report_import_profile()
         return {suite_name: "%d tests" % len(suite_members) for suite_name, suite_members in suites.items()}
 
     def get_tests_for_suite(self, selected_suite_name):
@@ -205,21 +658,36 @@ class TestRunner(object):
                     yield test_method
 
     def list_tests(self, format, selected_suite_name=None):
-        """Lists all tests, optionally scoped to a single suite."""
-        for test in self.get_tests_for_suite(selected_suite_name):
-            name = self.get_test_method_name(test)
+        """Lists all tests, optionally scoped to a single suite.
+
+        With a discovery index or static discovery, the tests are listed from that index.
+        """
+        if self._lists_from_index():
+            index = self.listing_index()
+            tests = (
+                (name, suites)
+                for name, suites, method_suites in self.indexed_tests(index)
+                if not selected_suite_name or selected_suite_name in method_suites
+            )
+        else:
+            tests = (
+                (self.get_test_method_name(test), test.__self__.suites(test))
+                for test in self.get_tests_for_suite(selected_suite_name)
+            )
+
+        for name, suites in tests:
             if format == 'txt':
                 print(name)
             elif format == 'json':
-                testcase = test.__self__
                 print(json.dumps(
                     dict(
                         test=name,
-                        suites=sorted(testcase.suites(test)),
+                        suites=sorted(suites),
                     ),
                     sort_keys=True,
                 ))
             else:
                 raise ValueError("unknown test list format: '%s'" % format)
+        self.report_import_profile()
 
 # vim: set ts=4 sts=4 sw=4 et:
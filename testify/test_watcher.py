@@ -0,0 +1,189 @@
+"""This module contains the TestWatcher class used by ``testify --watch``.
+
+While the watcher is running it records which module imported which, building
+a module -> dependents graph as a side-effect of test discovery. When a source
+file changes, only the modules that (transitively) import it are reloaded, and
+only the TestCases defined in those modules are run again.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import importlib.util
+import os
+import sys
+import time
+
+import six
+
+from . import exit
+from . import test_discovery
+from .import_graph import ImportGraph
+from .test_runner import TestRunner
+
+
+class ImportRecorder(object):
+    """Wraps ``__import__`` and records every import statement into an ImportGraph."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def _resolve(self, name, globals, level):
+        if level:
+            package = globals.get('__package__') or globals.get('__name__', '').rpartition('.')[0]
+            return importlib.util.resolve_name('.' * level + name, package)
+        return name
+
+    @contextlib.contextmanager
+    def recording(self):
+        original_import = six.moves.builtins.__import__
+
+        def recording_import(name, globals=None, locals=None, fromlist=(), level=0):
+            module = original_import(name, globals, locals, fromlist, level)
+            importer = (globals or {}).get('__name__')
+            if importer:
+                imported = self._resolve(name, globals, level)
+                self.graph.add(importer, imported)
+                # `from package import submodule` depends on the submodule too
+                for attr_name in fromlist or ():
+                    submodule_name = '%s.%s' % (imported, attr_name)
+                    if submodule_name in sys.modules:
+                        self.graph.add(importer, submodule_name)
+            return module
+
+        six.moves.builtins.__import__ = recording_import
+        try:
+            yield
+        finally:
+            six.moves.builtins.__import__ = original_import
+
+
+def module_source_file(module):
+    """Return the .py file backing a module, or None for builtins and extension modules."""
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return None
+    if filename.endswith(('.pyc', '.pyo')):
+        filename = filename[:-1]
+    if not filename.endswith('.py'):
+        return None
+    return os.path.abspath(filename)
+
+
+class WatchTestRunner(TestRunner):
+    """A TestRunner which runs only the TestCases defined in a given set of modules.
+
+    With test_modules=None the whole test path is discovered. Either way, the
+    name of every module a TestCase was found in is added to discovered_modules,
+    and the rest of TestRunner.discover() (-k, suites, ordering...) still applies.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.test_modules = kwargs.pop('test_modules')
+        self.discovered_modules = kwargs.pop('discovered_modules')
+        super(WatchTestRunner, self).__init__(*args, **kwargs)
+
+    def discover_test_classes(self):
+        if self.test_modules is None:
+            test_case_classes = super(WatchTestRunner, self).discover_test_classes()
+        else:
+            # test modules are re-run on their own, without their submodules
+            test_case_classes = (
+                test_case_class
+                for test_path in sorted(self.test_modules)
+                for test_case_class in test_discovery.discover(test_path, recursive=False)
+                if self._included(test_case_class.__name__)
+            )
+
+        for test_case_class in test_case_classes:
+            self.discovered_modules.add(test_case_class.__module__)
+            yield test_case_class
+
+
+class TestWatcher(object):
+    """Runs the tests under test_path, then re-runs affected tests whenever a source file changes."""
+
+    def __init__(self, test_path, test_runner_args, build_reporters, poll_interval=0.5, root=None):
+        self.test_path = test_path
+        self.test_runner_args = dict(test_runner_args)
+        self.build_reporters = build_reporters
+        self.poll_interval = poll_interval
+        self.root = os.path.abspath(root or os.getcwd())
+
+        self.graph = ImportGraph()
+        self.recorder = ImportRecorder(self.graph)
+        self.test_modules = set()
+        self.module_files = {}
+        self.file_mtimes = {}
+
+    def watched_files(self):
+        """Map each project source file we know about to its module name."""
+        for module_name in self.graph.modules() | self.test_modules:
+            if module_name in sys.modules:
+                filename = module_source_file(sys.modules[module_name])
+                if filename and filename.startswith(self.root + os.sep):
+                    self.module_files[module_name] = filename
+        # modules which failed to re-import are still watched via their last known file
+        return dict((filename, module_name) for module_name, filename in self.module_files.items())
+
+    def snapshot(self):
+        mtimes = {}
+        for filename, module_name in self.watched_files().items():
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            mtimes[filename] = (stat.st_mtime, stat.st_size)
+        return mtimes
+
+    def changed_modules(self):
+        """Return the modules whose source files changed since the last call."""
+        files = self.watched_files()
+        mtimes = self.snapshot()
+        changed = set(
+            files[filename]
+            for filename, mtime in mtimes.items()
+            if self.file_mtimes.get(filename, mtime) != mtime
+        )
+        self.file_mtimes = mtimes
+        return changed
+
+    def run_tests(self, test_modules=None):
+        """Run the whole test path (test_modules=None) or only the given test modules."""
+        runner = WatchTestRunner(
+            self.test_path,
+            test_modules=test_modules,
+            discovered_modules=self.test_modules,
+            **dict(self.test_runner_args, test_reporters=self.build_reporters())
+        )
+        with self.recorder.recording():
+            result = runner.run()
+        self.file_mtimes = self.snapshot()
+        return result
+
+    def reload(self, module_names):
+        """Forget the given modules so the next import executes their (changed) source."""
+        self.graph.forget(module_names)
+        for module_name in module_names:
+            sys.modules.pop(module_name, None)
+            # `from package import module` would otherwise find the stale module on its parent
+            parent_name, _, attr_name = module_name.rpartition('.')
+            parent = sys.modules.get(parent_name)
+            if parent is not None and hasattr(parent, attr_name):
+                delattr(parent, attr_name)
+
+    def watch(self):
+        result = self.run_tests()
+        try:
+            while True:
+                changed = self.changed_modules()
+                if not changed:
+                    time.sleep(self.poll_interval)
+                    continue
+
+                affected = self.graph.dependents(changed)
+                test_modules = affected & self.test_modules
+                self.reload(affected)
+                if test_modules:
+                    result = self.run_tests(test_modules)
+        except KeyboardInterrupt:
+            return result if result is not None else exit.OK
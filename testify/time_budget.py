@@ -0,0 +1,73 @@
+"""Choosing which tests fit in a time budget (--time-budget).
+
+Each test method is valued by how likely it is to fail, judged from
+TestHistory: its smoothed failure rate, which is 1/2 for methods without any
+history, so new tests are favoured over ones which have always passed. Methods
+are then picked greedily by value per second of expected run time, charging a
+class's class_setup and class_teardown time to the first method picked from it.
+
+TestRunner also stops starting new TestCases once the budget has run out.
+"""
+from __future__ import absolute_import
+
+import re
+
+
+DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d*)?|\.\d+)\s*([hms]?)\s*$')
+DURATION_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(text):
+    """Parse a duration such as '90', '90s', '10m' or '1.5h' into seconds.
+
+    Raises ValueError for anything else.
+    """
+    match = DURATION_RE.match(text)
+    if not match:
+        raise ValueError('Invalid duration: %r' % text)
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def plan_time_budget(test_methods, history, budget):
+    """Choose the test methods to run within budget seconds.
+
+    test_methods is a list of ("module.ClassName", [method names]) pairs and
+    history a testify.test_history.TestHistory. Returns a dict mapping each
+    class key to the set of its chosen methods; classes with none are left out.
+
+    Methods without a recorded duration are assumed to take the median time;
+    if nothing has a recorded duration, there's nothing to plan with and every
+    method is chosen.
+    """
+    durations = {}
+    failure_rates = {}
+    for key, method_names in test_methods:
+        durations[key] = history.method_durations(key)
+        failure_rates[key] = history.method_failure_rates(key)
+
+    estimate = history.median_duration(
+        (duration for methods in durations.values() for duration in methods.values()),
+        default=None,
+    )
+    if estimate is None:
+        return dict((key, set(method_names)) for key, method_names in test_methods if method_names)
+
+    candidates = []
+    for key, method_names in test_methods:
+        for method_name in method_names:
+            cost = max(durations[key].get(method_name, estimate), 1e-6)
+            value = failure_rates[key].get(method_name, 0.5)
+            candidates.append((value / cost, cost, key, method_name))
+    # highest value per second first; ties keep the discovery order
+    candidates.sort(key=lambda candidate: -candidate[0])
+
+    chosen = {}
+    spent = 0.0
+    for _, cost, key, method_name in candidates:
+        if key not in chosen:
+            cost += history.class_fixture_duration(key)
+        if spent + cost > budget:
+            continue
+        chosen.setdefault(key, set()).add(method_name)
+        spent += cost
+    return chosen